@@ -0,0 +1,224 @@
+import asyncio
+import json
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from circuit_breaker import OPEN
+from metrics import RequestTimer, observe_request
+
+# Per-call timeouts (seconds) for the two upstream calls made on every /chat
+LLM_TIMEOUT = float(os.getenv("LLM_TIMEOUT", "20"))
+YOUTUBE_TIMEOUT = float(os.getenv("YOUTUBE_TIMEOUT", "5"))
+
+# Threads used to run the blocking SDK calls; one event loop can keep this
+# many upstream calls in flight at once
+ASYNC_IO_THREADS = int(os.getenv("ASYNC_IO_THREADS", "64"))
+
+FALLBACK_MESSAGE = "I'm here for you. Stay strong! 😊"
+FALLBACK_VIDEO = {"title": "Error fetching video", "url": ""}
+
+
+async def _call(func, *args):
+    if asyncio.iscoroutinefunction(func):
+        return await func(*args)
+    return await asyncio.to_thread(func, *args)
+
+
+# Run the LLM call and the video lookup concurrently so a chat turn costs
+# max(LLM, YouTube) instead of their sum. If the LLM call fails or times out
+# the video lookup is cancelled and the usual fallback reply is returned.
+async def gather_response(prompt, video_query, generate, fetch_video,
+                          llm_timeout=LLM_TIMEOUT, youtube_timeout=YOUTUBE_TIMEOUT):
+    llm_task = asyncio.create_task(asyncio.wait_for(_call(generate, prompt), llm_timeout))
+    video_task = asyncio.create_task(asyncio.wait_for(_call(fetch_video, video_query), youtube_timeout))
+
+    try:
+        message = await llm_task
+    except asyncio.CancelledError:
+        video_task.cancel()
+        raise
+    except Exception as e:
+        video_task.cancel()
+        print(f"❌ Gemini API error: {e!r}")
+        return {"message": FALLBACK_MESSAGE, "video": dict(FALLBACK_VIDEO)}
+
+    try:
+        video = await video_task
+    except asyncio.CancelledError:
+        raise
+    except Exception as e:
+        print(f"❌ YouTube API error: {e!r}")
+        video = dict(FALLBACK_VIDEO)
+
+    return {"message": message or FALLBACK_MESSAGE, "video": video}
+
+
+# The same for synchronous callers (the Flask /chat route), using a
+# long-lived executor. Each call is bounded by its timeout measured from the
+# start of the turn: a call still running when it expires is abandoned to
+# finish in its pool thread, so it never holds up the reply (unlike
+# asyncio.run, which joins every to_thread worker before returning).
+def gather_response_sync(prompt, video_query, generate, fetch_video, executor,
+                         llm_timeout=LLM_TIMEOUT, youtube_timeout=YOUTUBE_TIMEOUT):
+    start = time.monotonic()
+    llm_future = executor.submit(generate, prompt)
+    video_future = executor.submit(fetch_video, video_query)
+
+    try:
+        message = llm_future.result(timeout=llm_timeout)
+    except Exception as e:
+        video_future.cancel()
+        print(f"❌ Gemini API error: {e!r}")
+        return {"message": FALLBACK_MESSAGE, "video": dict(FALLBACK_VIDEO)}
+
+    try:
+        video = video_future.result(timeout=max(0.0, youtube_timeout - (time.monotonic() - start)))
+    except Exception as e:
+        video_future.cancel()
+        print(f"❌ YouTube API error: {e!r}")
+        video = dict(FALLBACK_VIDEO)
+
+    return {"message": message or FALLBACK_MESSAGE, "video": video}
+
+
+# Minimal ASGI application serving POST /chat, e.g. `uvicorn async_chat:app`.
+# The backend module (model, API clients) is imported on lifespan startup.
+_backend = None
+
+
+def _get_backend():
+    global _backend
+    if _backend is None:
+        import backend
+        _backend = backend
+    return _backend
+
+
+async def _read_body(receive):
+    body = b""
+    while True:
+        event = await receive()
+        body += event.get("body", b"")
+        if not event.get("more_body"):
+            return body
+
+
+async def _send_json(send, status, payload):
+    body = json.dumps(payload).encode("utf-8")
+    await send({
+        "type": "http.response.start",
+        "status": status,
+        "headers": [(b"content-type", b"application/json"), (b"content-length", str(len(body)).encode())],
+    })
+    await send({"type": "http.response.body", "body": body})
+
+
+async def _lifespan(receive, send):
+    while True:
+        event = await receive()
+        if event["type"] == "lifespan.startup":
+            asyncio.get_running_loop().set_default_executor(ThreadPoolExecutor(max_workers=ASYNC_IO_THREADS))
+            await asyncio.to_thread(_get_backend)
+            await send({"type": "lifespan.startup.complete"})
+        elif event["type"] == "lifespan.shutdown":
+            await send({"type": "lifespan.shutdown.complete"})
+            return
+
+
+# Same stages, outcomes and metrics as the Flask /chat route (backend.handle_chat)
+async def chat(user_message, chat_id=None, context=None, timer=None):
+    backend = _get_backend()
+    timer = timer or RequestTimer()
+    with timer.span("triage"):
+        crisis = backend.crisis_triage.check(user_message)
+    if crisis:
+        timer.outcome = "crisis"
+        return backend.crisis_reply(crisis)
+    sentiment = await asyncio.to_thread(backend.classify_message, user_message, timer)
+    sentiment_label = sentiment["label"]
+    video_query = backend.pick_video_query(sentiment_label)
+    fetch_video = timer.wrap("youtube", backend.fetch_youtube_link)
+    with timer.span("context"):
+        context = await asyncio.to_thread(backend.load_context, chat_id, user_message, context)
+    with timer.span("response_cache"):
+        reply = backend.cached_reply(user_message, sentiment_label, context)
+    if reply is not None:
+        timer.outcome = "cached"
+        return {"response": reply, "video": await asyncio.to_thread(fetch_video, video_query),
+                "sentiment": sentiment}
+    if backend.gemini_breaker.state() == OPEN:
+        timer.outcome = "breaker_open"
+        return {"response": backend.canned_reply(sentiment_label),
+                "video": await asyncio.to_thread(fetch_video, video_query), "sentiment": sentiment}
+
+    timing = {}
+    bot_response = await gather_response(
+        backend.build_prompt(user_message, sentiment_label, context),
+        video_query,
+        timer.wrap("gemini", backend.timed_generate_reply(timing)),
+        fetch_video
+    )
+    backend.remember_reply(user_message, sentiment_label, bot_response["message"], timing.get("generate_ms", 0.0),
+                           context)
+    bot_response, fell_back = backend.with_fallbacks(bot_response, sentiment_label, video_query)
+    if fell_back:
+        timer.outcome = "fallback"
+    return {"response": bot_response["message"], "video": bot_response["video"], "sentiment": sentiment}
+
+
+async def app(scope, receive, send):
+    if scope["type"] == "lifespan":
+        await _lifespan(receive, send)
+        return
+    if scope["type"] != "http":
+        return
+
+    if scope["path"] == "/metrics" and scope["method"] == "GET":
+        body = _get_backend().metrics_registry.render().encode("utf-8")
+        await send({"type": "http.response.start", "status": 200,
+                    "headers": [(b"content-type", b"text/plain; version=0.0.4")]})
+        await send({"type": "http.response.body", "body": body})
+        return
+    if scope["path"] != "/chat":
+        await _send_json(send, 404, {"error": "Not found"})
+        return
+    if scope["method"] != "POST":
+        await _send_json(send, 405, {"error": "Method not allowed"})
+        return
+
+    timer = RequestTimer()
+    try:
+        await _handle_chat(receive, send, timer)
+    finally:
+        observe_request(ASGI_ENDPOINT, timer)
+
+
+# Requests served here are labelled apart from the Flask route's in /metrics
+ASGI_ENDPOINT = "/chat (asgi)"
+
+
+async def _handle_chat(receive, send, timer):
+    with timer.span("parse"):
+        try:
+            data = json.loads(await _read_body(receive) or b"null")
+        except ValueError:
+            data = None
+    if not isinstance(data, dict) or not isinstance(data.get("message"), str) or not data["message"].strip():
+        timer.outcome = "bad_request"
+        await _send_json(send, 400, {"error": "Message cannot be empty"})
+        return
+    if data.get("chat_id") is not None and not isinstance(data["chat_id"], str):
+        timer.outcome = "bad_request"
+        await _send_json(send, 400, {"error": "chat_id must be a string"})
+        return
+
+    try:
+        result = await chat(data["message"].strip(), data.get("chat_id"), data.get("context"), timer)
+    except Exception as e:
+        timer.outcome = "error"
+        _get_backend().report_error(ASGI_ENDPOINT, "Error in async /chat endpoint: %s", e, exc_info=True)
+        await _send_json(send, 500, {"error": "Internal server error"})
+        return
+    with timer.span("serialize"):
+        await _send_json(send, 200, result)
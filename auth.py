@@ -1,7 +1,9 @@
-import streamlit as st
-import json
+import logging
 import os
-import hashlib
+
+import streamlit as st
+
+from credentials import VerifierBusy, get_credential_service
 
 st.set_page_config(page_title="Authentication", layout="centered")
 
@@ -11,46 +13,45 @@ st.markdown("""
     </style>
     """, unsafe_allow_html=True)
 
-USER_DB = "users.json"
-
-# Load user credential
-def load_users():
-    if os.path.exists(USER_DB):
-        with open(USER_DB, "r") as file:
-            try:
-                return json.load(file)
-            except json.JSONDecodeError:
-                return {}  # Return empty dict if file is corrupted
-    return {}
-
-# Save new users
-def save_users(users):
-    with open(USER_DB, "w") as file:
-        json.dump(users, file, indent=4)
-
-# Hash password for security
-def hash_password(password):
-    return hashlib.sha256(password.encode()).hexdigest()
-
-# Authenticate user
+# User accounts (SQLite, see user_store.py) behind salted scrypt hashing,
+# a bounded verification pool and failed-login throttling (see credentials.py)
+credentials = get_credential_service()
+logger = logging.getLogger("auth")
+
+# Number of reverse proxies in front of the app (e.g. 1 on Render). Only then
+# is X-Forwarded-For used, and only the entry the nearest trusted proxy added;
+# anything further left is client-supplied and can be spoofed.
+TRUSTED_PROXY_HOPS = int(os.getenv("AUTH_TRUSTED_PROXY_HOPS", "0"))
+
+# Address of the connection's peer ("" if unknown)
+def peer_ip():
+    ip = getattr(st.context, "ip_address", None)  # Streamlit >= 1.45
+    if ip:
+        return ip
+    try:
+        from streamlit.runtime import get_instance
+        from streamlit.runtime.scriptrunner import get_script_run_ctx
+
+        return get_instance().get_client(get_script_run_ctx().session_id).request.remote_ip or ""
+    except Exception:
+        return ""
+
+# Client address for per-IP login throttling
+def client_ip():
+    if TRUSTED_PROXY_HOPS:
+        forwarded = [hop.strip() for hop in st.context.headers.get("X-Forwarded-For", "").split(",") if hop.strip()]
+        if len(forwarded) >= TRUSTED_PROXY_HOPS:
+            return forwarded[-TRUSTED_PROXY_HOPS]
+    return peer_ip()
+
+# Authenticate user; returns (ok, message)
 def authenticate(username, password):
-    users = load_users()
-    hashed_password = hash_password(password)
-
-    if username in users:
-        stored_password = users[username]
-        if stored_password == password or stored_password == hashed_password:
-            return True
-    return False
+    return credentials.login(username, password, client_ip())
 
 # Register a new user
 def register_user(username, password):
-    users = load_users()
-    if username in users:
-        return False  # Username already exists
-    users[username] = hash_password(password)  # Store hashed password
-    save_users(users)
-    return True
+    # Atomic insert; False if the username already exists
+    return credentials.register(username, password)
 
 # Initialize session state
 if "authenticated" not in st.session_state:
@@ -64,16 +65,18 @@ with tab1:
     login_username = st.text_input("Username", key="login_user")
     login_password = st.text_input("Password", type="password", key="login_pass")
 
+    # Only check credentials when the button is pressed, not on every rerun
     if st.button("Login"):
-        print(f"Trying to login: {login_username}")
-    if authenticate(login_username, login_password):
-        st.session_state["authenticated"] = True
-        st.session_state["username"] = login_username
-        st.success("✅ Login successful! Redirecting...")
-        print("Login successful!")
-        st.switch_page("pages/frontend.py")  # Redirect to your chatbot page
-    else:
-        print("Login failed!")
+        login_ok, login_message = authenticate(login_username, login_password)
+        if login_ok:
+            st.session_state["authenticated"] = True
+            st.session_state["username"] = login_username
+            st.success("✅ Login successful! Redirecting...")
+            logger.debug("Login succeeded")
+            st.switch_page("pages/frontend.py")  # Redirect to your chatbot page
+        else:
+            st.error(f"❌ {login_message}")
+            logger.debug("Login failed")
 
 
 # 🔹 Sign-up Tab
@@ -86,7 +89,11 @@ with tab2:
     if st.button("Sign Up"):
         if signup_password != confirm_password:
             st.error("❌ Passwords do not match!")
-        elif register_user(signup_username, signup_password):
-            st.success("✅ Account created! Please log in.")
         else:
-            st.warning("⚠️ Username already exists! Try logging in.")
+            try:
+                if register_user(signup_username, signup_password):
+                    st.success("✅ Account created! Please log in.")
+                else:
+                    st.warning("⚠️ Username already exists! Try logging in.")
+            except VerifierBusy:
+                st.error("❌ The server is busy. Please try again in a moment.")
@@ -1,108 +1,310 @@
+import json
+import logging
 import os
-import sqlite3
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
+from urllib.parse import quote_plus
 
-import joblib
-import pandas as pd
-from flask import Flask, request, jsonify
+from flask import Flask, Response, request, jsonify, stream_with_context
 from flask_cors import CORS
-from googleapiclient.discovery import build
-from sklearn.feature_extraction.text import TfidfVectorizer
-from sklearn.linear_model import LogisticRegression
-from textblob import TextBlob
-import google.generativeai as genai
+
+from async_chat import ASYNC_IO_THREADS, FALLBACK_MESSAGE, FALLBACK_VIDEO, YOUTUBE_TIMEOUT, gather_response_sync
+from circuit_breaker import OPEN, CircuitBreaker
+from clients import close_all, configure_gemini, execute_youtube, gemini_generate, gemini_stream
+from context_window import ContextWindow, render_context
+from crisis_triage import get_crisis_triage, render_crisis_reply
+from history_store import get_history_store
+from metrics import ERRORS_TOTAL, RequestTimer, SlowRequestProfiler, observe_request, registry as metrics_registry
+from model_registry import ModelRegistry
+from response_cache import ResponseCache
+from sentiment_batcher import SentimentBatcher
+from youtube_cache import MemoryBackend, RecommendationCache, SQLiteBackend
+
+logger = logging.getLogger("backend")
+
+
+# Log an error the backend recovered from and count it in chat_errors_total
+# under `where`; endpoint failures also log the traceback
+def report_error(where, message, *args, exc_info=False):
+    ERRORS_TOTAL.inc(where=where)
+    logger.error(message, *args, exc_info=exc_info)
+
 
 # Initialize Flask app
 app = Flask(__name__)
-CORS(app, resources={r"/chat": {"origins": "https://mental-health-chatbot-0yvl.onrender.com/"}})  # Allow all origins; restrict this in production if needed
+CORS(app, resources={r"/chat.*": {"origins": "https://mental-health-chatbot-0yvl.onrender.com/"}})  # Allow all origins; restrict this in production if needed
 
-# Load environment variables for API keys
+# Load environment variables for API keys. Missing keys no longer stop the
+# process from starting; /ready reports them and the API calls fall back.
 GENAI_API_KEY = os.getenv("GENAI_API_KEY")
 YOUTUBE_API_KEY = os.getenv("YOUTUBE_API_KEY")
 
 if not GENAI_API_KEY or not YOUTUBE_API_KEY:
-    raise EnvironmentError("Please set GENAI_API_KEY and YOUTUBE_API_KEY environment variables.")
+    logger.warning("Please set GENAI_API_KEY and YOUTUBE_API_KEY environment variables.")
+
+# Optional overrides that point the API clients at local stub servers (see stub_servers.py)
+GEMINI_API_ENDPOINT = os.getenv("GEMINI_API_ENDPOINT")
+YOUTUBE_API_ENDPOINT = os.getenv("YOUTUBE_API_ENDPOINT")
+
+# Configure Gemini API (the SDK itself is imported on first use, see clients.py)
+configure_gemini(GENAI_API_KEY, GEMINI_API_ENDPOINT)
+
+_youtube = None
+_youtube_lock = threading.Lock()
+
 
-# Configure Gemini API
-genai.configure(api_key=GENAI_API_KEY)
+# YouTube API client, built on first use
+def get_youtube():
+    global _youtube
+    if _youtube is None:
+        with _youtube_lock:
+            if _youtube is None:
+                from googleapiclient.discovery import build
+                if YOUTUBE_API_ENDPOINT:
+                    _youtube = build("youtube", "v3", developerKey=YOUTUBE_API_KEY,
+                                     client_options={"api_endpoint": YOUTUBE_API_ENDPOINT})
+                else:
+                    _youtube = build("youtube", "v3", developerKey=YOUTUBE_API_KEY)
+    return _youtube
 
-# Initialize YouTube API client
-youtube = build("youtube", "v3", developerKey=YOUTUBE_API_KEY)
+
+def missing_api_keys():
+    return [name for name, value in (("GENAI_API_KEY", GENAI_API_KEY), ("YOUTUBE_API_KEY", YOUTUBE_API_KEY))
+            if not value]
 
 # Paths for pre-trained model files - assume these are uploaded with your code
 MODEL_PATH = "sentiment_model.pkl"
 VECTORIZER_PATH = "vectorizer.pkl"
 
-# Load or train sentiment model and vectorizer
-def load_or_train_model():
-    if os.path.exists(MODEL_PATH) and os.path.exists(VECTORIZER_PATH):
-        print("✅ Loading existing sentiment model and vectorizer...")
-        model = joblib.load(MODEL_PATH)
-        vectorizer = joblib.load(VECTORIZER_PATH)
-    else:
-        print("⚠️ Model files not found! Training new model...")
+# Train sentiment model and vectorizer from the bundled dataset (used only when
+# neither versioned artifacts nor the pickles are available; see
+# train_sentiment.py for the standalone CLI)
+def train_model():
+    from train_sentiment import train
 
-        # Load dataset - must be included in your repo root
-        dataset_path = "chatbot_data.csv"
-        if not os.path.exists(dataset_path):
-            raise FileNotFoundError(f"Dataset file '{dataset_path}' not found!")
+    logger.warning("Model files not found, training a new model")
+    return train("chatbot_data.csv")
 
-        df = pd.read_csv(dataset_path)
 
-        # Calculate sentiment scores
-        df["sentiment"] = df["text"].apply(lambda x: TextBlob(str(x)).sentiment.polarity if isinstance(x, str) else 0)
+# Sentiment model, loaded lazily from versioned artifacts (see model_registry.py)
+model_registry = ModelRegistry(
+    artifact_dir=os.getenv("MODEL_ARTIFACT_DIR", "model_artifacts"),
+    legacy_model_path=MODEL_PATH,
+    legacy_vectorizer_path=VECTORIZER_PATH,
+    train=train_model
+)
 
-        # Prepare features and labels
-        vectorizer = TfidfVectorizer(max_features=500)
-        X = vectorizer.fit_transform(df["text"])
-        y = ["positive" if score > 0 else "negative" if score < 0 else "neutral" for score in df["sentiment"]]
 
-        model = LogisticRegression()
-        model.fit(X, y)
+# Load or train sentiment model and vectorizer
+def load_or_train_model():
+    return model_registry.get()
+
 
-        # Save model and vectorizer for next runs
-        joblib.dump(model, MODEL_PATH)
-        joblib.dump(vectorizer, VECTORIZER_PATH)
+# "numpy" scores with the pure-NumPy engine in fast_sentiment.py; "sklearn"
+# goes through vectorizer.transform / model.predict_proba as before
+SENTIMENT_ENGINE = os.getenv("SENTIMENT_ENGINE", "numpy")
 
-    return model, vectorizer
 
+# Start loading the model in the background so the first request doesn't pay
+# for it (only what SENTIMENT_ENGINE uses)
+if os.getenv("MODEL_WARMUP", "1") == "1":
+    model_registry.warm_up(scorer=SENTIMENT_ENGINE == "numpy")
 
-model, vectorizer = load_or_train_model()
+
+# NumPy scorer read straight from the .npy artifacts; scikit-learn and the
+# pickles are only touched to build them when they don't exist yet
+def get_scorer():
+    return model_registry.get_scorer()
 
 
 # Analyze sentiment label from text
 def analyze_sentiment(text):
+    if SENTIMENT_ENGINE == "numpy":
+        return get_scorer().predict_one(text)
+    model, vectorizer = model_registry.get()
     X = vectorizer.transform([text])
     return model.predict(X)[0]
 
 
+# Score many messages with one vectorized transform/predict_proba call; if
+# timings is a dict, the vectorize and predict durations are stored in it
+def score_sentiment_batch(texts, timings=None):
+    start = time.perf_counter()
+    if SENTIMENT_ENGINE == "numpy":
+        scorer = get_scorer()
+        X = scorer.transform(texts)
+        vectorized = time.perf_counter()
+        probabilities = scorer.predict_proba_features(X)
+        classes = scorer.classes
+    else:
+        model, vectorizer = model_registry.get()
+        X = vectorizer.transform(texts)
+        vectorized = time.perf_counter()
+        probabilities = model.predict_proba(X)
+        classes = [str(label) for label in model.classes_]
+    if timings is not None:
+        timings["vectorize"] = vectorized - start
+        timings["predict"] = time.perf_counter() - vectorized
+
+    results = []
+    for row in probabilities:
+        best = int(row.argmax())
+        results.append({
+            "label": classes[best],
+            "probabilities": {label: round(float(p), 4) for label, p in zip(classes, row)}
+        })
+    return results
+
+
+# Batcher scoring function: each result also carries its batch's timings
+def score_sentiment_batch_timed(texts):
+    timings = {}
+    results = score_sentiment_batch(texts, timings)
+    for result in results:
+        result["timings"] = timings
+    return results
+
+
+# Run one message through the micro-batcher, recording its queue wait and the
+# batch's vectorize/predict time on the request timer. Returns
+# {"label", "probabilities"}, which /chat passes back for the page to store.
+def classify_message(user_message, timer):
+    start = time.perf_counter()
+    result = sentiment_batcher.submit(user_message)
+    timings = result.get("timings", {})
+    for stage, seconds in timings.items():
+        timer.add(stage, seconds)
+    timer.add("sentiment_wait", max(0.0, time.perf_counter() - start - sum(timings.values())))
+    timer.sentiment = result["label"]
+    return {"label": result["label"], "probabilities": result["probabilities"]}
+
+
+# Dumps sampled stacks of /chat requests slower than PROFILE_SLOW_MS (0 = off)
+# to PROFILE_OUTPUT as collapsed stacks for flamegraph.pl or speedscope
+slow_request_profiler = SlowRequestProfiler(
+    threshold_ms=float(os.getenv("PROFILE_SLOW_MS", "0")),
+    interval_ms=float(os.getenv("PROFILE_INTERVAL_MS", "5")),
+    output_path=os.getenv("PROFILE_OUTPUT", "slow_requests.folded")
+)
+
+
+# Micro-batcher shared by concurrent /chat requests
+SENTIMENT_MAX_BATCH_SIZE = int(os.getenv("SENTIMENT_MAX_BATCH_SIZE", "32"))
+SENTIMENT_MAX_WAIT_MS = float(os.getenv("SENTIMENT_MAX_WAIT_MS", "5"))
+SENTIMENT_BATCH_LIMIT = 256
+
+sentiment_batcher = SentimentBatcher(
+    score_sentiment_batch_timed,
+    max_batch_size=SENTIMENT_MAX_BATCH_SIZE,
+    max_wait_ms=SENTIMENT_MAX_WAIT_MS
+)
+
+
+# Circuit breakers for the two upstream APIs (see circuit_breaker.py); while
+# one is open, requests get a fallback immediately instead of waiting out the
+# client timeout. Tunable per upstream with <NAME>_BREAKER_* env vars.
+def breaker_from_env(name, slow_call_ms):
+    prefix = f"{name.upper()}_BREAKER_"
+    return CircuitBreaker(
+        name,
+        window=int(os.getenv(prefix + "WINDOW", "20")),
+        min_calls=int(os.getenv(prefix + "MIN_CALLS", "5")),
+        failure_rate=float(os.getenv(prefix + "FAILURE_RATE", "0.5")),
+        slow_call_ms=float(os.getenv(prefix + "SLOW_CALL_MS", str(slow_call_ms))),
+        slow_call_rate=float(os.getenv(prefix + "SLOW_CALL_RATE", "0.8")),
+        open_seconds=float(os.getenv(prefix + "OPEN_SECONDS", "30")),
+        half_open_calls=int(os.getenv(prefix + "HALF_OPEN_CALLS", "2"))
+    )
+
+
+gemini_breaker = breaker_from_env("gemini", slow_call_ms=10000)
+youtube_breaker = breaker_from_env("youtube", slow_call_ms=3000)
+
+
+# Search YouTube and return up to max_results videos for a query
+def search_youtube_videos(query, max_results=1):
+    search_response = youtube_breaker.call(execute_youtube, get_youtube().search().list(
+        q=query,
+        part="snippet",
+        maxResults=max_results,
+        type="video"
+    ))
+
+    videos = []
+    for video in search_response.get("items", []):
+        video_id = video["id"]["videoId"]
+        videos.append({
+            "title": video["snippet"]["title"],
+            "url": f"https://www.youtube.com/watch?v={video_id}"
+        })
+    return videos
+
+
+# Recommendation cache; there are only a handful of distinct queries, so
+# most lookups never reach the YouTube API
+YOUTUBE_CACHE_PATH = os.getenv("YOUTUBE_CACHE_PATH", "")
+YOUTUBE_CACHE_TTL = float(os.getenv("YOUTUBE_CACHE_TTL", "21600"))
+YOUTUBE_CACHE_STALE_TTL = float(os.getenv("YOUTUBE_CACHE_STALE_TTL", "86400"))
+YOUTUBE_CACHE_POOL_SIZE = int(os.getenv("YOUTUBE_CACHE_POOL_SIZE", "5"))
+YOUTUBE_CACHE_MAX_ENTRIES = int(os.getenv("YOUTUBE_CACHE_MAX_ENTRIES", "128"))
+
+if YOUTUBE_CACHE_PATH:
+    recommendation_backend = SQLiteBackend(YOUTUBE_CACHE_PATH, max_entries=YOUTUBE_CACHE_MAX_ENTRIES)
+else:
+    recommendation_backend = MemoryBackend(max_entries=YOUTUBE_CACHE_MAX_ENTRIES)
+
+recommendation_cache = RecommendationCache(
+    search_youtube_videos,
+    backend=recommendation_backend,
+    ttl=YOUTUBE_CACHE_TTL,
+    stale_ttl=YOUTUBE_CACHE_STALE_TTL,
+    pool_size=YOUTUBE_CACHE_POOL_SIZE
+)
+
+
+# Video to suggest when YouTube can't be reached: a cached result for the
+# query if there is one (even stale), else a link to the search results page
+def fallback_video(query):
+    video = recommendation_cache.peek(query)
+    if video:
+        return video
+    return {"title": query.capitalize(), "url": f"https://www.youtube.com/results?search_query={quote_plus(query)}"}
+
+
 # Fetch YouTube video based on a query
 def fetch_youtube_link(query):
     try:
-        search_response = youtube.search().list(
-            q=query,
-            part="snippet",
-            maxResults=1,
-            type="video"
-        ).execute()
-
-        if search_response.get("items"):
-            video = search_response["items"][0]
-            video_id = video["id"]["videoId"]
-            video_title = video["snippet"]["title"]
-            video_url = f"https://www.youtube.com/watch?v={video_id}"
-            return {"title": video_title, "url": video_url}
+        video = recommendation_cache.get(query)
+        if video:
+            return video
         else:
             return {"title": "No video found", "url": ""}
     except Exception as e:
-        print(f"❌ YouTube API error: {e}")
-        return {"title": "Error fetching video", "url": ""}
+        report_error("youtube", "YouTube API error: %s", e)
+        return fallback_video(query)
+
+
+# Video search query for each sentiment label
+VIDEO_QUERIES = {
+    "negative": "calming music for stress relief",
+    "positive": "motivational videos for college students",
+}
+DEFAULT_VIDEO_QUERY = "meditation or breathing exercises"
+
 
+def pick_video_query(sentiment_label):
+    return VIDEO_QUERIES.get(sentiment_label, DEFAULT_VIDEO_QUERY)
 
-# Generate chatbot response using Gemini API
-def get_gemini_response(user_message, sentiment_label):
-    prompt = f"""
-    You are a mental health chatbot. The user said: "{user_message}".
+
+def build_prompt(user_message, sentiment_label, context=None):
+    history = render_context(context) if context else ""
+    if history:
+        history = f"\n    {history}\n"
+    return f"""
+    You are a mental health chatbot.{history} The user said: "{user_message}".
     The sentiment is detected as {sentiment_label}.
 
     Respond in a supportive and empathetic way. Keep messages short and chat-like.
@@ -110,51 +312,445 @@ def get_gemini_response(user_message, sentiment_label):
     Suggest a relevant YouTube video if the user asks.
     """
 
-    try:
-        model_gemini = genai.GenerativeModel("gemini-1.5-flash-latest")
-        response = model_gemini.generate_content(prompt)
-
-        # Pick video suggestion based on sentiment
-        if sentiment_label == "negative":
-            video = fetch_youtube_link("calming music for stress relief")
-        elif sentiment_label == "positive":
-            video = fetch_youtube_link("motivational videos for college students")
-        else:
-            video = fetch_youtube_link("meditation or breathing exercises")
 
-        return {
-            "message": getattr(response, "text", "I'm here for you. Stay strong! 😊"),
-            "video": video
-        }
+# Summarizer for turns leaving the context window: asks Gemini to fold them
+# into the running summary (CONTEXT_SUMMARIZER=llm)
+def summarize_with_llm(previous, turns, budget):
+    transcript = "\n".join(f"{'User' if role == 'user' else 'Bot'}: {message}" for role, message in turns)
+    response = gemini_generate(f"""
+    Update the summary of a conversation between a user and a supportive mental health chatbot.
+    Keep what matters for continuing the conversation: the user's situation, feelings and anything
+    they asked to be remembered. Use at most {budget * 3 // 4} words.
+
+    Current summary:
+    {previous or "(none)"}
+
+    New turns:
+    {transcript}
+    """)
+    return response.text.strip()
+
+
+# Multi-turn context from the chat's saved history (see context_window.py);
+# the default extractive summarizer adds no model calls
+CONTEXT_ENABLED = os.getenv("CONTEXT_ENABLED", "1") == "1"
+context_window = ContextWindow(
+    get_history_store(os.getenv("HISTORY_DB_PATH", "chat_history.db")),
+    summarize=summarize_with_llm if os.getenv("CONTEXT_SUMMARIZER", "extractive") == "llm" else None,
+    token_budget=int(os.getenv("CONTEXT_TOKEN_BUDGET", "1200")),
+    summary_budget=int(os.getenv("CONTEXT_SUMMARY_BUDGET", "300")),
+    max_turns=int(os.getenv("CONTEXT_MAX_TURNS", "60"))
+)
+
+
+# Context for the request, or None (the reply is then generated from the
+# message alone). The chat page sends the context it built from its own
+# history database; without one, the chat_id is looked up in this host's
+# database, which only has the chat when both share HISTORY_DB_PATH.
+def load_context(chat_id, user_message, supplied=None):
+    if not CONTEXT_ENABLED:
+        return None
+    if supplied is not None:
+        return context_window.accept(supplied, user_message)
+    if not chat_id:
+        return None
+    try:
+        return context_window.build(chat_id, user_message)
     except Exception as e:
-        print(f"❌ Gemini API error: {e}")
-        return {
-            "message": "I'm here for you. Stay strong! 😊",
-            "video": {"title": "Error fetching video", "url": ""}
-        }
+        report_error("context", "Context error for chat %s: %s", chat_id, e)
+        return None
+
+
+def has_history(context):
+    return bool(context and (context["turns"] or context["summary"]))
+
+
+# Call Gemini (shared model object, see clients.py) and return the reply text
+def generate_reply(prompt):
+    response = gemini_breaker.call(gemini_generate, prompt)
+    return getattr(response, "text", FALLBACK_MESSAGE)
+
+
+# Replies used when Gemini is unavailable, by sentiment label
+CANNED_REPLIES = {
+    "negative": [
+        "I'm sorry you're going through this. You don't have to carry it alone; I'm here to listen. 💙",
+        "That sounds really hard. Take a slow breath with me. Whatever you're feeling is valid.",
+        "I hear you. It's okay to not be okay right now. Would it help to talk about what's weighing on you?",
+    ],
+    "positive": [
+        "That's wonderful to hear! 😊 What's been going well for you?",
+        "I love that energy! Keep holding on to what's making you feel good.",
+    ],
+    "neutral": [
+        "I'm here for you. How are you feeling right now?",
+        "Thanks for sharing that with me. Tell me more whenever you're ready.",
+    ],
+}
+
+
+def canned_reply(sentiment_label):
+    return random.choice(CANNED_REPLIES.get(sentiment_label) or CANNED_REPLIES["neutral"])
+
+
+# Swap the generic fallbacks from gather_response for a sentiment-appropriate
+# reply and a cached video; returns (result, fell_back)
+def with_fallbacks(result, sentiment_label, video_query):
+    fell_back = result["message"] == FALLBACK_MESSAGE
+    if fell_back:
+        result = dict(result, message=canned_reply(sentiment_label))
+    if result["video"] == FALLBACK_VIDEO:
+        result = dict(result, video=fallback_video(video_query))
+    return result, fell_back
+
+
+# generate_reply that records its duration in timing["generate_ms"] (what a
+# response cache hit saves)
+def timed_generate_reply(timing):
+    def generate(prompt):
+        start = time.perf_counter()
+        try:
+            return generate_reply(prompt)
+        finally:
+            timing["generate_ms"] = (time.perf_counter() - start) * 1000
+    return generate
+
+
+# Weight of a term for near-duplicate matching: its idf in the sentiment
+# model's vocabulary, or the largest idf for words the model never saw
+def response_term_weight(term):
+    scorer = get_scorer()
+    index = scorer.vocabulary.get(term)
+    return float(scorer.idf[index]) if index is not None else scorer.max_idf
+
+
+def response_tokenize(text):
+    return get_scorer().tokenize(text)
+
+
+# Reply cache for repeated and near-duplicate messages (see response_cache.py)
+RESPONSE_CACHE_ENABLED = os.getenv("RESPONSE_CACHE_ENABLED", "1") == "1"
+response_cache = ResponseCache(
+    ttl=float(os.getenv("RESPONSE_CACHE_TTL", "3600")),
+    max_entries=int(os.getenv("RESPONSE_CACHE_MAX_ENTRIES", "512")),
+    similarity=float(os.getenv("RESPONSE_CACHE_SIMILARITY", "0.9")),
+    variants=int(os.getenv("RESPONSE_CACHE_VARIANTS", "3")),
+    min_variants=int(os.getenv("RESPONSE_CACHE_MIN_VARIANTS", "2")),
+    tokenize=response_tokenize,
+    weight=response_term_weight
+)
+
+
+# Replies that depend on earlier turns are neither served from nor added to
+# the cache
+def cached_reply(user_message, sentiment_label, context=None):
+    if not RESPONSE_CACHE_ENABLED or has_history(context):
+        return None
+    try:
+        return response_cache.get(user_message, sentiment_label)
+    except Exception as e:
+        report_error("response_cache", "Response cache error: %s", e)
+        return None
+
+
+def remember_reply(user_message, sentiment_label, reply, generate_ms, context=None):
+    if RESPONSE_CACHE_ENABLED and reply and reply != FALLBACK_MESSAGE and not has_history(context):
+        try:
+            response_cache.add(user_message, sentiment_label, reply, generate_ms)
+        except Exception as e:
+            report_error("response_cache", "Response cache error: %s", e)
+
+
+# Safety triage before sentiment scoring and the LLM: a message matching the
+# crisis lexicon gets the emergency contacts at once (see crisis_triage.py)
+crisis_triage = get_crisis_triage()
+
+# Triaged messages skip the model but still count in the user's mood history
+CRISIS_SENTIMENT = {"label": "negative", "probabilities": {"positive": 0.0, "neutral": 0.0, "negative": 1.0}}
+
+
+def crisis_reply(crisis):
+    return {
+        "response": render_crisis_reply(crisis),
+        "video": {"title": "", "url": ""},
+        "crisis": True,
+        "categories": crisis["categories"],
+        "contacts": crisis["contacts"],
+        "sentiment": CRISIS_SENTIMENT,
+    }
+
+
+# Runs the Gemini call and the YouTube lookup of /chat requests. Shared and
+# never joined per request, so a call that times out doesn't delay the reply.
+chat_executor = ThreadPoolExecutor(max_workers=ASYNC_IO_THREADS, thread_name_prefix="chat-io")
+
+
+# Generate chatbot response using Gemini API; the Gemini call and the
+# YouTube lookup run concurrently (see async_chat.gather_response_sync). Repeated
+# messages are answered from the response cache without calling Gemini.
+def get_gemini_response(user_message, sentiment_label, context=None, timer=None):
+    timer = timer or RequestTimer()
+    video_query = pick_video_query(sentiment_label)
+    with timer.span("response_cache"):
+        reply = cached_reply(user_message, sentiment_label, context)
+    if reply is not None:
+        timer.outcome = "cached"
+        return {"message": reply, "video": timer.wrap("youtube", fetch_youtube_link)(video_query)}
+
+    # Gemini is known to be down: answer now rather than after the timeout
+    if gemini_breaker.state() == OPEN:
+        timer.outcome = "breaker_open"
+        return {"message": canned_reply(sentiment_label), "video": timer.wrap("youtube", fetch_youtube_link)(video_query)}
+
+    timing = {}
+    result = gather_response_sync(
+        build_prompt(user_message, sentiment_label, context),
+        video_query,
+        timer.wrap("gemini", slow_request_profiler.wrap(timed_generate_reply(timing))),
+        timer.wrap("youtube", slow_request_profiler.wrap(fetch_youtube_link)),
+        chat_executor
+    )
+    remember_reply(user_message, sentiment_label, result["message"], timing.get("generate_ms", 0.0), context)
+    result, fell_back = with_fallbacks(result, sentiment_label, video_query)
+    if fell_back:
+        timer.outcome = "fallback"
+    return result
 
 
 @app.route("/chat", methods=["POST"])
 def chat():
+    timer = RequestTimer()
+    try:
+        with slow_request_profiler.profile("POST /chat"):
+            return handle_chat(timer)
+    finally:
+        observe_request("/chat", timer)
+
+
+def handle_chat(timer):
     try:
-        data = request.get_json()
+        with timer.span("parse"):
+            data = request.get_json()
         if not data or "message" not in data or not data["message"].strip():
+            timer.outcome = "bad_request"
             return jsonify({"error": "Message cannot be empty"}), 400
 
+        # Optional: the chat this message belongs to, and the multi-turn
+        # context the page built for it (see load_context)
+        chat_id = data.get("chat_id")
+        if chat_id is not None and not isinstance(chat_id, str):
+            timer.outcome = "bad_request"
+            return jsonify({"error": "chat_id must be a string"}), 400
+
         user_message = data["message"].strip()
 
-        sentiment_label = analyze_sentiment(user_message)
-        bot_response = get_gemini_response(user_message, sentiment_label)
+        with timer.span("triage"):
+            crisis = crisis_triage.check(user_message)
+        if crisis:
+            timer.outcome = "crisis"
+            return jsonify(crisis_reply(crisis))
+
+        sentiment = classify_message(user_message, timer)
+        with timer.span("context"):
+            context = load_context(chat_id, user_message, data.get("context"))
+        bot_response = get_gemini_response(user_message, sentiment["label"], context, timer)
+
+        with timer.span("serialize"):
+            return jsonify({
+                "response": bot_response["message"],
+                "video": bot_response["video"],
+                "sentiment": sentiment
+            })
+    except Exception as e:
+        timer.outcome = "error"
+        report_error("/chat", "Error in /chat endpoint: %s", e, exc_info=True)
+        return jsonify({"error": "Internal server error"}), 500
 
-        return jsonify({
-            "response": bot_response["message"],
-            "video": bot_response["video"]
-        })
+
+# Runs the video lookup alongside a streaming Gemini reply
+stream_executor = ThreadPoolExecutor(max_workers=ASYNC_IO_THREADS, thread_name_prefix="chat-stream")
+
+
+def sse_event(event, data):
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+
+# Server-sent events: "meta" (sentiment), one "token" per model chunk as it
+# arrives, then "done" with the full reply and the video suggestion
+@app.route("/chat/stream", methods=["POST"])
+def chat_stream():
+    timer = RequestTimer()
+    with timer.span("parse"):
+        data = request.get_json(silent=True)
+    if not isinstance(data, dict) or not isinstance(data.get("message"), str) or not data["message"].strip():
+        timer.outcome = "bad_request"
+        observe_request("/chat/stream", timer)
+        return jsonify({"error": "Message cannot be empty"}), 400
+    chat_id = data.get("chat_id")
+    if chat_id is not None and not isinstance(chat_id, str):
+        timer.outcome = "bad_request"
+        observe_request("/chat/stream", timer)
+        return jsonify({"error": "chat_id must be a string"}), 400
+
+    user_message = data["message"].strip()
+    with timer.span("triage"):
+        crisis = crisis_triage.check(user_message)
+    if crisis:
+        timer.outcome = "crisis"
+        observe_request("/chat/stream", timer)
+        reply = crisis_reply(crisis)
+        events = (sse_event("meta", {"crisis": True, "categories": reply["categories"],
+                                     "sentiment": CRISIS_SENTIMENT["label"],
+                                     "probabilities": CRISIS_SENTIMENT["probabilities"]})
+                  + sse_event("token", {"text": reply["response"]})
+                  + sse_event("done", reply))
+        return Response(events, mimetype="text/event-stream", headers={"Cache-Control": "no-cache"})
+
+    try:
+        sentiment = classify_message(user_message, timer)
+        sentiment_label = sentiment["label"]
+    except Exception as e:
+        report_error("/chat/stream", "Error in /chat/stream endpoint: %s", e, exc_info=True)
+        timer.outcome = "error"
+        observe_request("/chat/stream", timer)
+        return jsonify({"error": "Internal server error"}), 500
+
+    with timer.span("context"):
+        context = load_context(chat_id, user_message, data.get("context"))
+    prompt = build_prompt(user_message, sentiment_label, context)
+    video_future = stream_executor.submit(timer.wrap("youtube", fetch_youtube_link), pick_video_query(sentiment_label))
+    with timer.span("response_cache"):
+        reply = cached_reply(user_message, sentiment_label, context)
+
+    # The stream outlives the view function, so the request is observed when
+    # the last event has been produced
+    def events():
+        yield sse_event("meta", {"sentiment": sentiment_label, "probabilities": sentiment["probabilities"]})
+
+        parts = []
+        if reply is not None:
+            timer.outcome = "cached"
+            parts.append(reply)
+            yield sse_event("token", {"text": reply})
+        elif gemini_breaker.allow():
+            start, failed = time.perf_counter(), False
+            try:
+                for text in gemini_stream(prompt):
+                    if not parts:
+                        timer.add("gemini_first_token", time.perf_counter() - start)
+                    parts.append(text)
+                    yield sse_event("token", {"text": text})
+            except Exception as e:
+                report_error("gemini_stream", "Gemini stream error: %s", e)
+                failed = True
+            timer.add("gemini", time.perf_counter() - start)
+            gemini_breaker.record(bool(parts) and not failed, time.perf_counter() - start)
+            # A stream cut off midway still reaches this user, but a truncated
+            # reply must not be cached for others
+            if failed:
+                timer.outcome = "stream_error"
+            else:
+                remember_reply(user_message, sentiment_label, "".join(parts), (time.perf_counter() - start) * 1000,
+                               context)
+
+        if parts:
+            try:
+                video = video_future.result(timeout=YOUTUBE_TIMEOUT)
+            except Exception as e:
+                report_error("youtube", "YouTube API error: %r", e)
+                video = fallback_video(pick_video_query(sentiment_label))
+        else:
+            video_future.cancel()
+            timer.outcome = "fallback"
+            parts.append(canned_reply(sentiment_label))
+            video = fallback_video(pick_video_query(sentiment_label))
+            yield sse_event("token", {"text": parts[0]})
+
+        yield sse_event("done", {"response": "".join(parts), "video": video})
+        observe_request("/chat/stream", timer)
+
+    return Response(
+        stream_with_context(events()),
+        mimetype="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+
+@app.route("/sentiment/batch", methods=["POST"])
+def sentiment_batch():
+    data = request.get_json(silent=True)
+    messages = data.get("messages") if isinstance(data, dict) else None
+    if not isinstance(messages, list) or not messages:
+        return jsonify({"error": "messages must be a non-empty list"}), 400
+    if len(messages) > SENTIMENT_BATCH_LIMIT:
+        return jsonify({"error": f"At most {SENTIMENT_BATCH_LIMIT} messages per batch"}), 400
+    if not all(isinstance(m, str) for m in messages):
+        return jsonify({"error": "Every message must be a string"}), 400
+
+    try:
+        return jsonify({"results": score_sentiment_batch(messages)})
     except Exception as e:
-        print(f"❌ Error in /chat endpoint: {e}")
+        report_error("/sentiment/batch", "Error in /sentiment/batch endpoint: %s", e, exc_info=True)
         return jsonify({"error": "Internal server error"}), 500
 
 
+@app.route("/sentiment/stats", methods=["GET"])
+def sentiment_stats():
+    return jsonify(sentiment_batcher.stats())
+
+
+@app.route("/recommendations/stats", methods=["GET"])
+def recommendation_stats():
+    return jsonify(recommendation_cache.stats())
+
+
+@app.route("/responses/stats", methods=["GET"])
+def response_stats():
+    return jsonify(response_cache.stats())
+
+
+# Prometheus text format: chat latency histograms plus the cache and batcher
+# counters above as gauges
+metrics_registry.add_collector("sentiment_batcher", lambda: sentiment_batcher.stats())
+metrics_registry.add_collector("response_cache", lambda: response_cache.stats())
+metrics_registry.add_collector("recommendation_cache", lambda: recommendation_cache.stats())
+metrics_registry.add_collector("crisis_triage", crisis_triage.stats)
+metrics_registry.add_collector("circuit_gemini", gemini_breaker.stats, "Gemini circuit breaker (state: 0 closed, 1 half-open, 2 open)")
+metrics_registry.add_collector("circuit_youtube", youtube_breaker.stats, "YouTube circuit breaker (state: 0 closed, 1 half-open, 2 open)")
+
+
+@app.route("/breakers/stats", methods=["GET"])
+def breaker_stats():
+    return jsonify({"gemini": gemini_breaker.stats(), "youtube": youtube_breaker.stats()})
+
+
+@app.route("/metrics", methods=["GET"])
+def metrics():
+    return Response(metrics_registry.render(), mimetype="text/plain; version=0.0.4")
+
+
+# Readiness: 200 once the sentiment model is loaded and API keys are present
+@app.route("/ready", methods=["GET"])
+def ready():
+    status = model_registry.status()
+    status["missing_api_keys"] = missing_api_keys()
+    ok = status["ready"] and not status["missing_api_keys"]
+    return jsonify(status), 200 if ok else 503
+
+
+# Stop background threads and close pooled connections; serve.py calls this
+# when a worker has drained
+def shutdown():
+    sentiment_batcher.stop()
+    chat_executor.shutdown(wait=False, cancel_futures=True)
+    stream_executor.shutdown(wait=False, cancel_futures=True)
+    close_all()
+    # Final counts of this worker for the others' /metrics (see metrics.py)
+    metrics_registry.flush()
+
+
+# Development server; use serve.py for pre-forked workers with draining and
+# overload protection
 if __name__ == "__main__":
     # Run on port 5001 as you wanted
     app.run(host="0.0.0.0", port=5001, debug=True)
@@ -0,0 +1,60 @@
+import argparse
+import os
+import time
+
+from history_store import DB_PATH, HistoryStore
+from model_registry import ARTIFACT_DIR, ModelRegistry
+
+# Scores user messages saved before sentiment was stored with each message,
+# so they show up in the mood dashboard. Messages are read in id order in
+# batches; each batch is vectorized and scored with one predict_proba call
+# (the NumPy scorer, see fast_sentiment.py) and written back in one
+# transaction, which also updates the mood rollups through their triggers.
+# Safe to stop and rerun: only messages without a sentiment are picked up.
+#
+#   python backfill_sentiment.py --db chat_history.db --batch-size 2000
+
+BATCH_SIZE = int(os.getenv("BACKFILL_BATCH_SIZE", "2000"))
+
+
+def load_scorer(artifact_dir=ARTIFACT_DIR):
+    from fast_sentiment import FastSentimentScorer
+
+    registry = ModelRegistry(artifact_dir=artifact_dir, legacy_model_path="sentiment_model.pkl",
+                             legacy_vectorizer_path="vectorizer.pkl")
+    return FastSentimentScorer.from_sklearn(*registry.get())
+
+
+def backfill(store, scorer, batch_size=BATCH_SIZE, limit=None):
+    classes = [str(label) for label in scorer.classes]
+    scored, after_id = 0, 0
+    start = time.perf_counter()
+    while limit is None or scored < limit:
+        rows = store.unscored_messages(after_id, batch_size if limit is None else min(batch_size, limit - scored))
+        if not rows:
+            break
+        probabilities = scorer.predict_proba([message for _, message in rows])
+        best = probabilities.argmax(axis=1)
+        store.set_sentiments([
+            (id_, classes[best[i]], {label: round(float(p), 4) for label, p in zip(classes, probabilities[i])})
+            for i, (id_, _) in enumerate(rows)
+        ])
+        scored += len(rows)
+        after_id = rows[-1][0]
+        elapsed = time.perf_counter() - start
+        print(f"✅ Scored {scored} messages ({scored / elapsed:.0f}/s)")
+    return scored
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Store sentiment for chat history messages that have none.")
+    parser.add_argument("--db", default=DB_PATH)
+    parser.add_argument("--artifacts", default=ARTIFACT_DIR)
+    parser.add_argument("--batch-size", type=int, default=BATCH_SIZE)
+    parser.add_argument("--limit", type=int, help="stop after this many messages")
+    args = parser.parse_args()
+
+    store = HistoryStore(args.db)
+    total = backfill(store, load_scorer(args.artifacts), args.batch_size, args.limit)
+    print(f"✅ Backfill finished: {total} messages scored")
+    store.close()
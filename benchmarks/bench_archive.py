@@ -0,0 +1,135 @@
+import argparse
+import os
+import random
+import tempfile
+import time
+import tracemalloc
+
+from benchmarks.bench_history_search import load_texts
+from benchmarks.reporting import write_results
+from chat_archive import archive_chats, export_arrow, export_ndjson
+from history_store import HistoryStore
+from sentiment_batcher import percentile
+
+# Archiving old chats to Parquet (chat_archive.py): seeds a history database
+# with --rows messages spread over --users users and --months months of
+# chats, archives everything older than --keep-days, and reports
+#  - archive throughput, database size before and after (vacuumed) and the
+#    size of the Parquet files,
+#  - load_messages latency for a live chat, an archived chat read cold and
+#    the same chat read again (cached),
+#  - export rate and peak Python memory for one user's NDJSON and Arrow
+#    export, which stream batch by batch.
+# Every sampled archived chat is checked to read back exactly as before.
+#   python -m benchmarks.bench_archive --rows 1000000 --users 50 --months 24
+
+
+def seed(store, texts, rows, users, months, now, batch=50_000):
+    chats_per_user_month = max(1, rows // (users * months * 20))
+    seeded = 0
+    while seeded < rows:
+        count = min(batch, rows - seeded)
+        page = []
+        for i in range(seeded, seeded + count):
+            user = i % users
+            chat = (i // users) // 20
+            month = (chat // chats_per_user_month) % months
+            created_at = now - (month * 30 + 1) * 86400 - (chat % chats_per_user_month) * 3600 + (i // users) % 20
+            page.append((f"user{user}", f"chat-{user}-{chat}", "user" if i % 2 == 0 else "bot",
+                         texts[(i * 7919) % len(texts)], created_at))
+        store.save_messages(page)
+        seeded += count
+
+
+def db_size(path):
+    return sum(os.path.getsize(path + suffix) for suffix in ("", "-wal") if os.path.exists(path + suffix))
+
+
+def timed(func, repeat):
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        samples.append((time.perf_counter() - start) * 1000)
+    return samples
+
+
+def measure_export(export, store, user_id, archive_dir):
+    tracemalloc.start()
+    start = time.perf_counter()
+    size = sum(len(chunk) for chunk in export(store, user_id, archive_dir))
+    elapsed = time.perf_counter() - start
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return {"mb": round(size / 1e6, 2), "mb_per_s": round(size / 1e6 / elapsed, 1),
+            "peak_python_mb": round(peak / 1e6, 2)}
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark archiving old chats to Parquet.")
+    parser.add_argument("--data", default="chatbot_data.csv")
+    parser.add_argument("--rows", type=int, default=500_000)
+    parser.add_argument("--users", type=int, default=50)
+    parser.add_argument("--months", type=int, default=24)
+    parser.add_argument("--keep-days", type=float, default=180)
+    parser.add_argument("--samples", type=int, default=50)
+    parser.add_argument("--output", help="result JSON path (default: benchmarks/results/...)")
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp(prefix="archive-bench-")
+    path = os.path.join(workdir, "history.db")
+    archive_dir = os.path.join(workdir, "archive")
+    store = HistoryStore(path, archive_dir=archive_dir)
+    now = time.time()
+    seed(store, load_texts(args.data), args.rows, args.users, args.months, now)
+    store._connection().execute("PRAGMA wal_checkpoint(TRUNCATE)")
+    size_before = db_size(path)
+
+    cutoff = now - args.keep_days * 86400
+    sessions = store._connection().execute("SELECT chat_id, last_at FROM chat_sessions").fetchall()
+    old = [chat_id for chat_id, last_at in sessions if last_at < cutoff]
+    live = [chat_id for chat_id, last_at in sessions if last_at >= cutoff]
+    sample = random.sample(old, min(args.samples, len(old)))
+    expected = {chat_id: store.load_chat_history(chat_id) for chat_id in sample}
+
+    start = time.perf_counter()
+    totals = archive_chats(store, archive_dir, args.keep_days, now=now)
+    archive_s = time.perf_counter() - start
+    store.vacuum()
+    size_after = db_size(path)
+    mismatches = sum(store.load_chat_history(chat_id) != rows for chat_id, rows in expected.items())
+
+    # Cold reads: chats not read since archiving (the check above cached the sample)
+    unread = [chat_id for chat_id in old if chat_id not in expected][:args.samples]
+    cold = [timed(lambda: store.load_messages(chat_id, limit=50), 1)[0] for chat_id in unread]
+    cached = timed(lambda: store.load_messages(sample[0], limit=50), args.samples)
+    hot = timed(lambda: store.load_messages(live[0], limit=50), args.samples) if live else [0.0]
+
+    results = {
+        "archived": totals,
+        "archive_rows_per_s": round(totals["messages"] / archive_s),
+        "db_mb_before": round(size_before / 1e6, 1),
+        "db_mb_after": round(size_after / 1e6, 1),
+        "archive_mb": round(totals["bytes"] / 1e6, 1),
+        "readback_mismatches": mismatches,
+        "load_ms": {
+            "live_p50": round(percentile(hot, 50), 3),
+            "archived_cold_p50": round(percentile(cold, 50), 3) if cold else None,
+            "archived_cold_p99": round(percentile(cold, 99), 3) if cold else None,
+            "archived_cached_p50": round(percentile(cached, 50), 3),
+        },
+        "export": {
+            "ndjson": measure_export(export_ndjson, store, "user0", archive_dir),
+            "arrow": measure_export(export_arrow, store, "user0", archive_dir),
+        },
+    }
+    print(f"archived {totals['messages']} messages / {totals['chats']} chats into {totals['files']} files "
+          f"at {results['archive_rows_per_s']} rows/s")
+    print(f"database {results['db_mb_before']} MB -> {results['db_mb_after']} MB, archive {results['archive_mb']} MB, "
+          f"{mismatches} read-back mismatches")
+    print(f"load_messages ms: {results['load_ms']}")
+    print(f"export user0: {results['export']}")
+
+    params = {"rows": args.rows, "users": args.users, "months": args.months, "keep_days": args.keep_days}
+    print(f"Saved {write_results('archive', params, results, args.output)}")
+    print(f"database and archive left in {workdir}")
@@ -0,0 +1,115 @@
+import argparse
+import asyncio
+import json
+import sys
+import time
+import urllib.parse
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+
+from async_chat import FALLBACK_MESSAGE, gather_response, gather_response_sync
+from sentiment_batcher import percentile
+from stub_servers import GeminiStubHandler, YouTubeStubHandler, server_url, start_stub_server
+
+# Offline comparison of the sequential chat path (LLM, then YouTube) with the
+# concurrent one, using plain HTTP clients against the local stub servers.
+# Then checks that the synchronous path used by the Flask /chat route answers
+# with the fallback about --llm-timeout after a hung LLM call, rather than
+# when the call finally returns; exits non-zero if it doesn't.
+# Run from the repo root: python -m benchmarks.bench_async_chat
+
+
+def make_clients(gemini_url, youtube_url):
+    def generate(prompt):
+        body = json.dumps({"contents": [{"parts": [{"text": prompt}]}]}).encode()
+        req = urllib.request.Request(
+            f"{gemini_url}/v1beta/models/gemini-1.5-flash-latest:generateContent",
+            data=body, headers={"Content-Type": "application/json"}
+        )
+        with urllib.request.urlopen(req) as resp:
+            return json.load(resp)["candidates"][0]["content"]["parts"][0]["text"]
+
+    def fetch_video(query):
+        params = urllib.parse.urlencode({"q": query, "part": "snippet", "maxResults": 1, "type": "video"})
+        with urllib.request.urlopen(f"{youtube_url}/youtube/v3/search?{params}") as resp:
+            item = json.load(resp)["items"][0]
+        return {"title": item["snippet"]["title"], "url": f"https://www.youtube.com/watch?v={item['id']['videoId']}"}
+
+    return generate, fetch_video
+
+
+def run_sequential(generate, fetch_video, turns):
+    latencies = []
+    for _ in range(turns):
+        start = time.perf_counter()
+        generate("hello")
+        fetch_video("meditation or breathing exercises")
+        latencies.append((time.perf_counter() - start) * 1000)
+    return latencies
+
+
+async def run_concurrent(generate, fetch_video, turns, in_flight):
+    latencies = []
+    semaphore = asyncio.Semaphore(in_flight)
+
+    async def one_turn():
+        async with semaphore:
+            start = time.perf_counter()
+            await gather_response("hello", "meditation or breathing exercises", generate, fetch_video)
+            latencies.append((time.perf_counter() - start) * 1000)
+
+    await asyncio.gather(*(one_turn() for _ in range(turns)))
+    return latencies
+
+
+# Seconds until gather_response_sync replies when the LLM call hangs for `hang` seconds
+def check_timeout(fetch_video, llm_timeout, hang):
+    executor = ThreadPoolExecutor(max_workers=4)
+    start = time.perf_counter()
+    result = gather_response_sync("hello", "meditation or breathing exercises", lambda prompt: time.sleep(hang),
+                                  fetch_video, executor, llm_timeout=llm_timeout)
+    elapsed = time.perf_counter() - start
+    executor.shutdown(wait=False)
+    return elapsed, result["message"] == FALLBACK_MESSAGE
+
+
+def summarize(name, latencies, wall):
+    print(f"{name:<28} turns={len(latencies):<4} wall={wall:7.2f}s "
+          f"p50={percentile(latencies, 50):7.1f}ms p99={percentile(latencies, 99):7.1f}ms "
+          f"throughput={len(latencies) / wall:6.1f}/s")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Compare sequential and concurrent chat turns against stub servers.")
+    parser.add_argument("--turns", type=int, default=20)
+    parser.add_argument("--in-flight", type=int, default=20)
+    parser.add_argument("--gemini-latency-ms", type=float, default=200.0)
+    parser.add_argument("--youtube-latency-ms", type=float, default=120.0)
+    parser.add_argument("--llm-timeout", type=float, default=0.5)
+    parser.add_argument("--hang", type=float, default=3.0, help="seconds the hung LLM call takes")
+    args = parser.parse_args()
+
+    gemini = start_stub_server(GeminiStubHandler, latency_ms=args.gemini_latency_ms)
+    youtube = start_stub_server(YouTubeStubHandler, latency_ms=args.youtube_latency_ms)
+    generate, fetch_video = make_clients(server_url(gemini), server_url(youtube))
+
+    start = time.perf_counter()
+    summarize("sequential, 1 in flight", run_sequential(generate, fetch_video, args.turns), time.perf_counter() - start)
+
+    start = time.perf_counter()
+    latencies = asyncio.run(run_concurrent(generate, fetch_video, args.turns, 1))
+    summarize("concurrent, 1 in flight", latencies, time.perf_counter() - start)
+
+    start = time.perf_counter()
+    latencies = asyncio.run(run_concurrent(generate, fetch_video, args.turns, args.in_flight))
+    summarize(f"concurrent, {args.in_flight} in flight", latencies, time.perf_counter() - start)
+
+    elapsed, fell_back = check_timeout(fetch_video, args.llm_timeout, args.hang)
+    print(f"{'hung LLM call':<28} timeout={args.llm_timeout}s hang={args.hang}s replied after {elapsed:.2f}s "
+          f"(fallback: {fell_back})")
+
+    gemini.shutdown()
+    youtube.shutdown()
+    if not fell_back or elapsed > args.llm_timeout + 0.25:
+        print("❌ Timed-out LLM call delayed the reply")
+        sys.exit(1)
@@ -0,0 +1,68 @@
+import argparse
+import time
+
+import requests
+
+from clients import get_http_session
+from sentiment_batcher import percentile
+from stub_servers import ChatStubHandler, GeminiStubHandler, server_url, start_stub_server
+
+# Per-turn latency with and without client reuse against local mock servers.
+# Run from the repo root: python -m benchmarks.bench_client_reuse
+#
+# frontend -> backend: bare requests.post (new TCP connection each turn)
+#                      vs the pooled keep-alive session from clients.py
+# backend -> Gemini:   new GenerativeModel per turn vs the shared model,
+#                      over the REST transport pointed at the Gemini stub
+#                      (skipped if google-generativeai is not installed)
+
+
+def time_turns(turn, turns):
+    latencies = []
+    for _ in range(turns):
+        start = time.perf_counter()
+        turn()
+        latencies.append((time.perf_counter() - start) * 1000)
+    return latencies
+
+
+def report(name, latencies):
+    print(f"{name:<34} p50={percentile(latencies, 50):7.2f}ms p99={percentile(latencies, 99):7.2f}ms "
+          f"mean={sum(latencies) / len(latencies):7.2f}ms")
+
+
+def bench_backend_client(url, turns):
+    payload = {"message": "I feel a bit anxious today"}
+    session = get_http_session("bench-backend")
+    report("requests.post (no reuse)", time_turns(lambda: requests.post(url, json=payload, timeout=10), turns))
+    report("pooled keep-alive session", time_turns(lambda: session.post(url, json=payload, timeout=10), turns))
+
+
+def bench_gemini_client(endpoint, turns):
+    try:
+        import google.generativeai as genai
+    except ImportError:
+        print("google-generativeai not installed; skipping Gemini comparison")
+        return
+
+    from clients import gemini_generate
+
+    genai.configure(api_key="stub", transport="rest", client_options={"api_endpoint": endpoint})
+    report("new GenerativeModel per turn",
+           time_turns(lambda: genai.GenerativeModel("gemini-1.5-flash-latest").generate_content("hi"), turns))
+    report("shared GenerativeModel", time_turns(lambda: gemini_generate("hi"), turns))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Compare per-turn latency with and without client reuse.")
+    parser.add_argument("--turns", type=int, default=200)
+    args = parser.parse_args()
+
+    chat_stub = start_stub_server(ChatStubHandler)
+    gemini_stub = start_stub_server(GeminiStubHandler)
+
+    bench_backend_client(f"{server_url(chat_stub)}/chat", args.turns)
+    bench_gemini_client(server_url(gemini_stub), args.turns)
+
+    chat_stub.shutdown()
+    gemini_stub.shutdown()
@@ -0,0 +1,69 @@
+import argparse
+import os
+import random
+import tempfile
+import time
+
+from context_window import ContextWindow, estimate_tokens, extractive_summary, format_turn
+from history_store import HistoryStore
+from sentiment_batcher import percentile
+
+# Prompt context size and assembly time over one long conversation, with the
+# token-budgeted window versus sending the whole history. Each turn saves the
+# user message, builds the context (as /chat does) and saves a bot reply.
+# --summary-ms adds a fixed delay to every summarizer call, standing in for
+# CONTEXT_SUMMARIZER=llm.
+# Run from the repo root: python -m benchmarks.bench_context_window
+
+WORDS = ("feel", "today", "work", "sleep", "friends", "anxious", "better", "tired", "exam", "family",
+         "stress", "happy", "talk", "week", "worried", "calm", "walk", "music", "help", "again")
+
+
+def sentence(rng, low, high):
+    return " ".join(rng.choice(WORDS) for _ in range(rng.randint(low, high))).capitalize() + "."
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark multi-turn context assembly.")
+    parser.add_argument("--turns", type=int, default=500)
+    parser.add_argument("--budget", type=int, default=1200, help="context token budget")
+    parser.add_argument("--summary-ms", type=float, default=0.0, help="simulated summarizer latency")
+    parser.add_argument("--report-every", type=int, default=50)
+    args = parser.parse_args()
+
+    rng = random.Random(7)
+    workdir = tempfile.mkdtemp(prefix="context-bench-")
+    store = HistoryStore(os.path.join(workdir, "history.db"))
+    summaries = []
+
+    def summarize(previous, turns, budget):
+        summaries.append(len(turns))
+        if args.summary_ms:
+            time.sleep(args.summary_ms / 1000)
+        return extractive_summary(previous, turns, budget)
+
+    window = ContextWindow(store, summarize=summarize, token_budget=args.budget)
+    full_tokens = 0
+    build_ms, window_tokens = [], []
+
+    print(f"{'turn':>5} {'full tokens':>12} {'window tokens':>14} {'build p50 ms':>13} {'build max ms':>13} {'slides':>7}")
+    for turn in range(1, args.turns + 1):
+        message = sentence(rng, 4, 30)
+        store.save_message("bench", "chat", "user", message)
+
+        start = time.perf_counter()
+        context = window.build("chat", message)
+        build_ms.append((time.perf_counter() - start) * 1000)
+        window_tokens.append(context["tokens"] + estimate_tokens(message))
+
+        reply = sentence(rng, 10, 40)
+        store.save_message("bench", "chat", "bot", reply)
+        full_tokens += estimate_tokens(format_turn("user", message)) + estimate_tokens(format_turn("bot", reply)) + 2
+
+        if turn % args.report_every == 0:
+            recent = build_ms[-args.report_every:]
+            print(f"{turn:>5} {full_tokens:>12} {window_tokens[-1]:>14} {percentile(recent, 50):>13.2f} "
+                  f"{max(recent):>13.2f} {len(summaries):>7}")
+
+    print(f"max window tokens {max(window_tokens)} (budget {args.budget}); "
+          f"summarizer ran {len(summaries)} times for {args.turns} turns")
@@ -0,0 +1,99 @@
+import argparse
+import csv
+import re
+import time
+
+from benchmarks.reporting import compare, write_results
+from crisis_triage import CRISIS_LEXICON_PATH, CrisisTriage, PhraseMatcher, load_lexicon, normalize
+from sentiment_batcher import percentile
+
+# Matching throughput of the crisis triage over chatbot_data.csv: the
+# trie-compiled matcher (crisis_triage.py) next to a flat regex alternation
+# (one branch per phrase) and a loop of substring checks, on normalized
+# messages. --extra-phrases pads the lexicon with synthetic phrases to show
+# how each approach scales with lexicon size. Also checks that the matcher
+# and the flat regex flag the same messages, and times CrisisTriage.check()
+# as the backend calls it (normalize + match).
+# Run from the repo root: python -m benchmarks.bench_crisis_triage --extra-phrases 2000
+
+
+def load_messages(path):
+    with open(path, newline="", encoding="utf-8") as file:
+        return [row["text"] for row in csv.DictReader(file) if (row.get("text") or "").strip()]
+
+
+def regex_matcher(phrases):
+    alternation = "|".join(re.escape(normalize(phrase)) for phrase, _ in sorted(phrases, key=lambda p: -len(p[0])))
+    pattern = re.compile(rf"(?<!\w)(?:{alternation})(?!\w)")
+    return lambda text: pattern.search(text) is not None
+
+
+def substring_matcher(phrases):
+    terms = [normalize(phrase) for phrase, _ in phrases]
+    return lambda text: any(term in text for term in terms)
+
+
+def run(match, texts, rounds):
+    samples, flagged = [], 0
+    start = time.perf_counter()
+    for _ in range(rounds):
+        for text in texts:
+            t = time.perf_counter()
+            flagged += bool(match(text))
+            samples.append((time.perf_counter() - t) * 1e6)
+    wall = time.perf_counter() - start
+    size = sum(len(text) for text in texts) * rounds
+    return {
+        "messages_per_s": round(len(texts) * rounds / wall),
+        "mb_per_s": round(size / wall / 1e6, 2),
+        "p50_us": round(percentile(samples, 50), 2),
+        "p99_us": round(percentile(samples, 99), 2),
+        "flagged": flagged // rounds,
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark crisis phrase matching on chatbot_data.csv.")
+    parser.add_argument("--data", default="chatbot_data.csv")
+    parser.add_argument("--lexicon", default=CRISIS_LEXICON_PATH)
+    parser.add_argument("--rounds", type=int, default=5)
+    parser.add_argument("--extra-phrases", type=int, default=0, help="synthetic phrases added to the lexicon")
+    parser.add_argument("--output", help="result JSON path (default: benchmarks/results/...)")
+    parser.add_argument("--compare", help="earlier result JSON to compare with")
+    args = parser.parse_args()
+
+    messages = load_messages(args.data)
+    texts = [normalize(message) for message in messages]
+    lexicon, _ = load_lexicon(args.lexicon)
+    phrases = [(phrase, category) for category, items in lexicon["phrases"].items() for phrase in items]
+    phrases += [(f"synthetic{i} phrase{i % 97}", "synthetic") for i in range(args.extra_phrases)]
+    matcher = PhraseMatcher(phrases)
+    triage = CrisisTriage(args.lexicon, reload_seconds=3600)
+    triage._current = (lexicon, matcher)
+
+    results = {
+        "trie_regex": run(matcher.find, texts, args.rounds),
+        "flat_regex": run(regex_matcher(phrases), texts, args.rounds),
+        "substring_loop": run(substring_matcher(phrases), texts, args.rounds),
+        "triage_check": run(triage.check, messages, args.rounds),
+    }
+    regex = regex_matcher(phrases)
+    disagreements = [text for text in texts if bool(matcher.find(text)) != regex(text)]
+
+    print(f"{len(messages)} messages, {len(phrases)} phrases")
+    print(f"{'matcher':<16} {'msgs/s':>10} {'MB/s':>7} {'p50 us':>8} {'p99 us':>8} {'flagged':>8}")
+    for name, stats in results.items():
+        print(f"{name:<16} {stats['messages_per_s']:>10,} {stats['mb_per_s']:>7.2f} {stats['p50_us']:>8.2f} "
+              f"{stats['p99_us']:>8.2f} {stats['flagged']:>8}")
+    print("(substring_loop ignores word boundaries, so it can flag more)")
+    if disagreements:
+        print(f"❌ Trie and flat regex disagree on {len(disagreements)} messages, e.g. {disagreements[0]!r}")
+    else:
+        print("✅ Trie and flat regex flag the same messages")
+
+    results["disagreements"] = len(disagreements)
+    params = {"messages": len(messages), "phrases": len(phrases), "rounds": args.rounds,
+              "extra_phrases": args.extra_phrases}
+    print(f"Saved {write_results('crisis_triage', params, results, args.output)}")
+    if args.compare:
+        compare(args.compare, results)
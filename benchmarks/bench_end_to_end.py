@@ -0,0 +1,147 @@
+import argparse
+import csv
+import os
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+
+from benchmarks.reporting import compare, write_results
+from sentiment_batcher import percentile
+from stub_servers import GeminiStubHandler, YouTubeStubHandler, server_url, start_stub_server
+
+# End-to-end load test: runs backend.app in-process (werkzeug, threaded)
+# against the local Gemini and YouTube stubs and replays messages from
+# chatbot_data.csv at a fixed arrival rate. Latency is measured from each
+# request's scheduled send time, so queueing inside the client counts too.
+# Results are printed and saved as JSON (see benchmarks/reporting.py).
+# Run from the repo root:
+#   python -m benchmarks.bench_end_to_end --rps 20 --duration 30 --gemini-error-rate 0.02
+
+
+def load_messages(path, limit=None):
+    with open(path, newline="", encoding="utf-8") as file:
+        messages = [row["text"].strip() for row in csv.DictReader(file) if (row.get("text") or "").strip()]
+    return messages[:limit] if limit else messages
+
+
+# Point the backend at the stubs and at throwaway databases, then import it
+def start_backend(gemini_url, youtube_url, workdir, response_cache):
+    os.environ.update({
+        "GENAI_API_KEY": os.environ.get("GENAI_API_KEY", "bench"),
+        "YOUTUBE_API_KEY": os.environ.get("YOUTUBE_API_KEY", "bench"),
+        "GEMINI_API_ENDPOINT": gemini_url,
+        "YOUTUBE_API_ENDPOINT": youtube_url + "/",
+        "HISTORY_DB_PATH": os.path.join(workdir, "history.db"),
+        "RESPONSE_CACHE_ENABLED": "1" if response_cache else "0",
+    })
+    from werkzeug.serving import make_server
+    import backend
+
+    backend.model_registry.get()
+    server = make_server("127.0.0.1", 0, backend.app, threaded=True)
+    threading.Thread(target=server.serve_forever, name="backend", daemon=True).start()
+    return server, backend
+
+
+def replay(url, messages, rps, duration, clients, timeout):
+    local = threading.local()
+    records = []
+    lock = threading.Lock()
+
+    def send(message, scheduled):
+        session = getattr(local, "session", None)
+        if session is None:
+            session = local.session = requests.Session()
+        try:
+            response = session.post(url, json={"message": message}, timeout=timeout)
+            status = response.status_code
+        except requests.RequestException as e:
+            status = type(e).__name__
+        latency = (time.perf_counter() - scheduled) * 1000
+        with lock:
+            records.append((status, latency))
+
+    total = int(rps * duration)
+    pool = ThreadPoolExecutor(max_workers=clients, thread_name_prefix="load-client")
+    start = time.perf_counter()
+    for i in range(total):
+        scheduled = start + i / rps
+        delay = scheduled - time.perf_counter()
+        if delay > 0:
+            time.sleep(delay)
+        pool.submit(send, messages[i % len(messages)], scheduled)
+    pool.shutdown(wait=True)
+    return records, time.perf_counter() - start
+
+
+def summarize(records, wall):
+    latencies = [latency for status, latency in records]
+    ok = [latency for status, latency in records if status == 200]
+    statuses = {}
+    for status, _ in records:
+        statuses[str(status)] = statuses.get(str(status), 0) + 1
+    return {
+        "requests": len(records),
+        "wall_seconds": round(wall, 3),
+        "throughput_rps": round(len(ok) / wall, 2) if wall else 0.0,
+        "error_rate": round(1 - len(ok) / len(records), 4) if records else 0.0,
+        "status_counts": statuses,
+        "latency_ms": {
+            "p50": round(percentile(latencies, 50), 1),
+            "p90": round(percentile(latencies, 90), 1),
+            "p99": round(percentile(latencies, 99), 1),
+            "max": round(max(latencies), 1) if latencies else 0.0,
+            "mean": round(sum(latencies) / len(latencies), 1) if latencies else 0.0,
+        },
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Load-test backend.app against local Gemini/YouTube stubs.")
+    parser.add_argument("--data", default="chatbot_data.csv")
+    parser.add_argument("--rps", type=float, default=10.0, help="target arrival rate")
+    parser.add_argument("--duration", type=float, default=20.0, help="seconds of arrivals")
+    parser.add_argument("--clients", type=int, default=64, help="max requests in flight")
+    parser.add_argument("--timeout", type=float, default=30.0)
+    parser.add_argument("--gemini-latency-ms", type=float, default=600.0)
+    parser.add_argument("--youtube-latency-ms", type=float, default=150.0)
+    parser.add_argument("--latency-sigma", type=float, default=0.4, help="log-normal spread of stub latencies")
+    parser.add_argument("--gemini-error-rate", type=float, default=0.0)
+    parser.add_argument("--youtube-error-rate", type=float, default=0.0)
+    parser.add_argument("--no-response-cache", action="store_true")
+    parser.add_argument("--output", help="result JSON path (default: benchmarks/results/...)")
+    parser.add_argument("--compare", help="earlier result JSON to compare with")
+    args = parser.parse_args()
+
+    gemini = start_stub_server(GeminiStubHandler, latency_ms=args.gemini_latency_ms,
+                               latency_sigma=args.latency_sigma, error_rate=args.gemini_error_rate)
+    youtube = start_stub_server(YouTubeStubHandler, latency_ms=args.youtube_latency_ms,
+                                latency_sigma=args.latency_sigma, error_rate=args.youtube_error_rate)
+    workdir = tempfile.mkdtemp(prefix="e2e-bench-")
+    server, backend = start_backend(server_url(gemini), server_url(youtube), workdir, not args.no_response_cache)
+    chat_url = f"http://127.0.0.1:{server.server_port}/chat"
+
+    messages = load_messages(args.data)
+    records, wall = replay(chat_url, messages, args.rps, args.duration, args.clients, args.timeout)
+    results = summarize(records, wall)
+    results["response_cache"] = backend.response_cache.stats()
+    results["sentiment_batcher"] = backend.sentiment_batcher.stats()
+
+    latency = results["latency_ms"]
+    print(f"{results['requests']} requests in {results['wall_seconds']}s: {results['throughput_rps']} ok/s, "
+          f"error rate {results['error_rate']:.2%}, statuses {results['status_counts']}")
+    print(f"latency p50={latency['p50']}ms p90={latency['p90']}ms p99={latency['p99']}ms max={latency['max']}ms")
+
+    params = {key: value for key, value in vars(args).items() if key not in ("output", "compare")}
+    print(f"Saved {write_results('end_to_end', params, results, args.output)}")
+    if args.compare:
+        compare(args.compare, results)
+
+    server.shutdown()
+    gemini.shutdown()
+    youtube.shutdown()
+    sys.exit(0)
@@ -0,0 +1,83 @@
+import argparse
+import sys
+import time
+
+import joblib
+import numpy as np
+import pandas as pd
+
+from fast_sentiment import FastSentimentScorer
+from sentiment_batcher import percentile
+
+# Compares the pure-NumPy scorer with the scikit-learn path on the messages in
+# chatbot_data.csv: --check asserts identical labels and matching
+# probabilities (exit status 1 on mismatch), otherwise per-message latency and
+# batch throughput are printed for both. The parity itself is asserted by
+# tests/test_fast_sentiment.py.
+# Run from the repo root: python -m benchmarks.bench_fast_sentiment
+
+
+def load_texts(path, limit):
+    texts = pd.read_csv(path)["text"].dropna().astype(str).tolist()
+    return texts[:limit] if limit else texts
+
+
+def check(model, vectorizer, scorer, texts):
+    expected_labels = [str(label) for label in model.predict(vectorizer.transform(texts))]
+    expected_proba = model.predict_proba(vectorizer.transform(texts))
+    single_labels = [scorer.predict_one(text) for text in texts]
+    batch_proba = scorer.predict_proba(texts)
+
+    mismatches = [i for i, (a, b) in enumerate(zip(expected_labels, single_labels)) if a != b]
+    max_error = float(np.abs(expected_proba - batch_proba).max()) if texts else 0.0
+    print(f"{len(texts)} messages, {len(mismatches)} label mismatches, max probability error {max_error:.2e}")
+    for i in mismatches[:5]:
+        print(f"  {texts[i]!r}: sklearn={expected_labels[i]} numpy={single_labels[i]}")
+    return not mismatches and max_error < 1e-9
+
+
+def time_per_message(func, texts):
+    latencies = []
+    for text in texts:
+        start = time.perf_counter()
+        func(text)
+        latencies.append((time.perf_counter() - start) * 1e6)
+    return latencies
+
+
+def time_batches(func, texts, batch_size):
+    start = time.perf_counter()
+    for i in range(0, len(texts), batch_size):
+        func(texts[i:i + batch_size])
+    return len(texts) / (time.perf_counter() - start)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark the NumPy sentiment scorer against scikit-learn.")
+    parser.add_argument("--data", default="chatbot_data.csv")
+    parser.add_argument("--model", default="sentiment_model.pkl")
+    parser.add_argument("--vectorizer", default="vectorizer.pkl")
+    parser.add_argument("--limit", type=int, default=0, help="use only the first N messages")
+    parser.add_argument("--batch-size", type=int, default=32)
+    parser.add_argument("--check", action="store_true", help="only verify parity with scikit-learn")
+    args = parser.parse_args()
+
+    model, vectorizer = joblib.load(args.model), joblib.load(args.vectorizer)
+    scorer = FastSentimentScorer.from_sklearn(model, vectorizer)
+    texts = load_texts(args.data, args.limit)
+
+    if args.check:
+        sys.exit(0 if check(model, vectorizer, scorer, texts) else 1)
+
+    def sklearn_one(text):
+        return model.predict(vectorizer.transform([text]))[0]
+
+    def sklearn_batch(batch):
+        return model.predict_proba(vectorizer.transform(batch))
+
+    print(f"{'engine':<8} {'p50 us':>8} {'p99 us':>8} {'batch msg/s':>12}")
+    for name, one, batch in (("sklearn", sklearn_one, sklearn_batch),
+                             ("numpy", scorer.predict_one, scorer.predict_proba)):
+        latencies = time_per_message(one, texts)
+        rate = time_batches(batch, texts, args.batch_size)
+        print(f"{name:<8} {percentile(latencies, 50):>8.1f} {percentile(latencies, 99):>8.1f} {rate:>12.0f}")
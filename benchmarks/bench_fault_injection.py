@@ -0,0 +1,98 @@
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+import requests
+
+from benchmarks.bench_end_to_end import load_messages, start_backend
+from sentiment_batcher import percentile
+from stub_servers import GeminiStubHandler, YouTubeStubHandler, server_url, start_stub_server
+
+# Fault-injection check for the Gemini/YouTube circuit breakers. Runs
+# backend.app against the local stubs and sends /chat requests one at a time
+# through four phases:
+#   healthy   stubs answer normally; the breaker stays closed
+#   outage    the Gemini stub fails every call; the first few requests pay
+#             for the failed call, then the breaker opens and the canned
+#             fallback is served without calling Gemini at all
+#   open      still failing; every reply should come from the fallback tier
+#   recovery  the stub heals; after the open period the half-open probes
+#             succeed and the breaker closes again
+# Prints latency per phase and exits non-zero if the breaker misbehaves.
+# Run from the repo root: python -m benchmarks.bench_fault_injection
+
+
+def send(url, messages, count, offset):
+    latencies, replies = [], []
+    for i in range(count):
+        start = time.perf_counter()
+        response = requests.post(url, json={"message": messages[(offset + i) % len(messages)]}, timeout=60)
+        latencies.append((time.perf_counter() - start) * 1000)
+        replies.append(response.json().get("response", "") if response.status_code == 200 else None)
+    return latencies, replies
+
+
+def report(phase, latencies, state):
+    print(f"{phase:<10} {len(latencies):>5} {percentile(latencies, 50):>9.1f} {percentile(latencies, 99):>9.1f} "
+          f"{max(latencies):>9.1f}  {state}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Check the circuit breakers against failing upstream stubs.")
+    parser.add_argument("--requests", type=int, default=40, help="requests per phase")
+    parser.add_argument("--gemini-latency-ms", type=float, default=300.0)
+    parser.add_argument("--open-seconds", type=float, default=3.0)
+    args = parser.parse_args()
+
+    os.environ.setdefault("GEMINI_BREAKER_OPEN_SECONDS", str(args.open_seconds))
+    os.environ.setdefault("GEMINI_BREAKER_MIN_CALLS", "5")
+    gemini = start_stub_server(GeminiStubHandler, latency_ms=args.gemini_latency_ms)
+    youtube = start_stub_server(YouTubeStubHandler, latency_ms=50)
+    workdir = tempfile.mkdtemp(prefix="fault-bench-")
+    server, backend = start_backend(server_url(gemini), server_url(youtube), workdir, response_cache=False)
+    url = f"http://127.0.0.1:{server.server_port}/chat"
+    messages = load_messages("chatbot_data.csv")
+    canned = {reply for replies in backend.CANNED_REPLIES.values() for reply in replies}
+    failures = []
+
+    print(f"{'phase':<10} {'n':>5} {'p50 ms':>9} {'p99 ms':>9} {'max ms':>9}  breaker")
+    latencies, replies = send(url, messages, args.requests, 0)
+    report("healthy", latencies, backend.gemini_breaker.state())
+    if backend.gemini_breaker.state() != "closed" or any(reply in canned for reply in replies):
+        failures.append("breaker opened or fell back while Gemini was healthy")
+    healthy_p50 = percentile(latencies, 50)
+
+    gemini.RequestHandlerClass.error_rate = 1.0
+    latencies, replies = send(url, messages, args.requests, args.requests)
+    report("outage", latencies, backend.gemini_breaker.state())
+    if backend.gemini_breaker.state() != "open":
+        failures.append("breaker did not open during the outage")
+    if None in replies:
+        failures.append("a request failed instead of falling back")
+
+    latencies, replies = send(url, messages, args.requests, 2 * args.requests)
+    report("open", latencies, backend.gemini_breaker.state())
+    if not all(reply in canned for reply in replies):
+        failures.append("open breaker let a request through to Gemini")
+    if percentile(latencies, 50) >= healthy_p50:
+        failures.append("fallback replies were not faster than healthy Gemini calls")
+
+    gemini.RequestHandlerClass.error_rate = 0.0
+    time.sleep(args.open_seconds)
+    latencies, replies = send(url, messages, args.requests, 3 * args.requests)
+    report("recovery", latencies, backend.gemini_breaker.state())
+    if backend.gemini_breaker.state() != "closed" or replies[-1] in canned:
+        failures.append("breaker did not close after Gemini recovered")
+
+    print(f"gemini breaker: {backend.gemini_breaker.stats()}")
+    print(f"youtube breaker: {backend.youtube_breaker.stats()}")
+    server.shutdown()
+    gemini.shutdown()
+    youtube.shutdown()
+    for failure in failures:
+        print(f"❌ {failure}")
+    if not failures:
+        print("✅ Circuit breaker behaved as expected")
+    sys.exit(1 if failures else 0)
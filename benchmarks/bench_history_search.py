@@ -0,0 +1,101 @@
+import argparse
+import csv
+import os
+import random
+import tempfile
+import time
+
+from benchmarks.reporting import write_results
+from history_store import HistoryStore
+from sentiment_batcher import percentile
+
+# Full-text search latency (HistoryStore.search_messages) as the message
+# table grows to millions of rows, next to a LIKE scan of the same user's
+# messages. Messages are sampled from chatbot_data.csv and spread over
+# --users users, so each user's share (and the LIKE scan) grows with the
+# table. Also reports the insert rate with the FTS triggers and the index
+# size. Run from the repo root:
+#   python -m benchmarks.bench_history_search --rows 2000000 --users 100
+
+QUERIES = ["anxious", "feel", "sleep tonight", "exa"]
+
+
+def load_texts(path):
+    with open(path, newline="", encoding="utf-8") as file:
+        return [row["text"].strip() for row in csv.DictReader(file) if (row.get("text") or "").strip()]
+
+
+def make_rows(start, count, texts, users, now):
+    return [
+        (f"user{i % users}", f"chat-{i % users}-{i // (users * 50)}", "user" if (i // users) % 2 == 0 else "bot",
+         texts[(i * 7919) % len(texts)], now - 10 ** 7 + i)
+        for i in range(start, start + count)
+    ]
+
+
+def like_search(conn, user_id, query, limit=20):
+    clauses = " AND ".join("message LIKE ?" for _ in query.split())
+    return conn.execute(
+        f"SELECT id, chat_id, message FROM messages WHERE user_id = ? AND {clauses} ORDER BY id DESC LIMIT ?",
+        [user_id] + [f"%{word}%" for word in query.split()] + [limit]
+    ).fetchall()
+
+
+def timed(func, repeat):
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        samples.append((time.perf_counter() - start) * 1000)
+    return percentile(samples, 50), percentile(samples, 99)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark full-text search over chat history as it grows.")
+    parser.add_argument("--data", default="chatbot_data.csv")
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--users", type=int, default=100)
+    parser.add_argument("--checkpoints", type=int, default=4)
+    parser.add_argument("--batch", type=int, default=50_000)
+    parser.add_argument("--repeat", type=int, default=20)
+    parser.add_argument("--output", help="result JSON path (default: benchmarks/results/...)")
+    args = parser.parse_args()
+
+    texts = load_texts(args.data)
+    workdir = tempfile.mkdtemp(prefix="search-bench-")
+    path = os.path.join(workdir, "history.db")
+    store = HistoryStore(path)
+    conn = store._connection()
+    now = time.time()
+    step = args.rows // args.checkpoints
+    seeded = 0
+    results = {}
+
+    print(f"{'rows':>10} {'insert/s':>9} {'MB':>7} {'query':<14} {'fts p50':>8} {'fts p99':>8} {'like p50':>9} "
+          f"{'like p99':>9} {'hits':>5}")
+    for checkpoint in range(1, args.checkpoints + 1):
+        start = time.perf_counter()
+        while seeded < step * checkpoint:
+            count = min(args.batch, step * checkpoint - seeded)
+            store.save_messages(make_rows(seeded, count, texts, args.users, now))
+            seeded += count
+        insert_rate = step / (time.perf_counter() - start)
+        size_mb = sum(os.path.getsize(os.path.join(workdir, name)) for name in os.listdir(workdir)) / 1e6
+
+        checkpoint_results = {"insert_per_s": round(insert_rate), "size_mb": round(size_mb, 1), "queries": {}}
+        for query in QUERIES:
+            user = f"user{random.randrange(args.users)}"
+            fts = timed(lambda: store.search_messages(user, query), args.repeat)
+            like = timed(lambda: like_search(conn, user, query), max(1, args.repeat // 4))
+            hits = len(store.search_messages(user, query))
+            checkpoint_results["queries"][query] = {
+                "fts_p50_ms": round(fts[0], 3), "fts_p99_ms": round(fts[1], 3),
+                "like_p50_ms": round(like[0], 3), "like_p99_ms": round(like[1], 3), "hits": hits,
+            }
+            print(f"{seeded:>10} {insert_rate:>9.0f} {size_mb:>7.1f} {query:<14} {fts[0]:>8.2f} {fts[1]:>8.2f} "
+                  f"{like[0]:>9.2f} {like[1]:>9.2f} {hits:>5}")
+        results[str(seeded)] = checkpoint_results
+
+    params = {"rows": args.rows, "users": args.users, "repeat": args.repeat}
+    print(f"Saved {write_results('history_search', params, results, args.output)}")
+    print(f"database left in {workdir}")
@@ -0,0 +1,94 @@
+import argparse
+import os
+import random
+import sqlite3
+import tempfile
+import time
+
+from history_store import HistoryStore
+
+# Seeds a throwaway database with millions of messages and times the sidebar
+# and transcript queries as it grows, next to the same queries on the old
+# unindexed `conversations` table. Run from the repo root:
+#   python -m benchmarks.bench_history_store --rows 2000000
+
+USERS = 1000
+MESSAGES_PER_CHAT = 50
+
+
+def timed(func, repeat=20):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        func()
+    return (time.perf_counter() - start) / repeat * 1000
+
+
+def make_rows(start, count, now):
+    rows = []
+    for i in range(start, start + count):
+        user = i % USERS
+        chat = i // (USERS * MESSAGES_PER_CHAT)
+        rows.append((f"user{user}", f"chat-{user}-{chat}", "user" if (i // USERS) % 2 == 0 else "bot",
+                     f"message number {i} with some text", now - (10 ** 7) + i))
+    return rows
+
+
+def seed_legacy(conn, rows):
+    conn.executemany(
+        "INSERT INTO conversations (chat_id, role, message, timestamp) VALUES (?, ?, ?, datetime(?, 'unixepoch'))",
+        [(chat_id, role, message, ts) for _, chat_id, role, message, ts in rows]
+    )
+    conn.commit()
+
+
+def legacy_sidebar(conn):
+    conn.execute("SELECT chat_id, MIN(timestamp) FROM conversations GROUP BY chat_id ORDER BY MIN(timestamp) DESC").fetchall()
+
+
+def legacy_history(conn, chat_id):
+    conn.execute("SELECT role, message, timestamp FROM conversations WHERE chat_id = ? ORDER BY timestamp", (chat_id,)).fetchall()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark chat history queries as the table grows.")
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--checkpoints", type=int, default=4)
+    parser.add_argument("--batch", type=int, default=50_000)
+    parser.add_argument("--no-legacy", action="store_true", help="skip the unindexed legacy table")
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp(prefix="history-bench-")
+    store = HistoryStore(os.path.join(workdir, "history.db"))
+    legacy = None
+    if not args.no_legacy:
+        legacy = sqlite3.connect(os.path.join(workdir, "legacy.db"))
+        legacy.execute("CREATE TABLE conversations (chat_id TEXT, role TEXT, message TEXT, timestamp DATETIME)")
+
+    now = time.time()
+    step = args.rows // args.checkpoints
+    seeded = 0
+    print(f"{'rows':>10} {'seed/s':>10} {'sidebar ms':>11} {'summary ms':>11} {'history ms':>11} {'title ms':>9} "
+          f"{'legacy sidebar':>15} {'legacy history':>15}")
+    for checkpoint in range(1, args.checkpoints + 1):
+        target = step * checkpoint
+        start = time.perf_counter()
+        while seeded < target:
+            rows = make_rows(seeded, min(args.batch, target - seeded), now)
+            store.save_messages(rows)
+            if legacy is not None:
+                seed_legacy(legacy, rows)
+            seeded += len(rows)
+        seed_rate = step / (time.perf_counter() - start)
+
+        user = random.randrange(USERS)
+        chat_id = f"chat-{user}-0"
+        sidebar = timed(lambda: store.get_chat_sessions(f"user{user}"))
+        summary = timed(lambda: store.get_sidebar_summary(f"user{user}"))
+        history = timed(lambda: store.load_chat_history(chat_id))
+        title = timed(lambda: store.get_chat_title(chat_id))
+        line = f"{seeded:>10} {seed_rate:>10.0f} {sidebar:>11.3f} {summary:>11.3f} {history:>11.3f} {title:>9.3f}"
+        if legacy is not None:
+            line += f" {timed(lambda: legacy_sidebar(legacy), 3):>15.1f} {timed(lambda: legacy_history(legacy, chat_id), 3):>15.1f}"
+        print(line)
+
+    print(f"databases left in {workdir}")
@@ -0,0 +1,71 @@
+import argparse
+import os
+import tempfile
+import threading
+import time
+
+import credentials
+from credentials import BoundedVerifier, CredentialService, LoginThrottle, VerificationCache, hash_password
+from sentiment_batcher import percentile
+from user_store import UserStore
+
+# Login throughput at different scrypt cost settings, with the verification
+# cache disabled (every login runs the KDF) and enabled (repeat logins).
+# Run from the repo root: python -m benchmarks.bench_login_throughput
+
+
+def run_logins(service, users, clients, logins_per_client):
+    latencies = []
+    lock = threading.Lock()
+
+    def client(c):
+        local = []
+        for i in range(logins_per_client):
+            username = users[(c + i) % len(users)]
+            start = time.perf_counter()
+            ok, message = service.login(username, "correct horse", client_ip=f"10.0.0.{c}")
+            if not ok:
+                raise AssertionError(message)
+            local.append((time.perf_counter() - start) * 1000)
+        with lock:
+            latencies.extend(local)
+
+    threads = [threading.Thread(target=client, args=(c,)) for c in range(clients)]
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return len(latencies) / (time.perf_counter() - start), latencies
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark login throughput at different KDF costs.")
+    parser.add_argument("--costs", default="12,13,14,15", help="comma-separated log2(N) values for scrypt")
+    parser.add_argument("--clients", type=int, default=8)
+    parser.add_argument("--logins", type=int, default=10, help="logins per client")
+    parser.add_argument("--workers", type=int, default=2, help="verification pool size")
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp(prefix="login-bench-")
+    print(f"{'N':>7} {'hash ms':>8} {'cache':>6} {'logins/s':>9} {'p50 ms':>8} {'p99 ms':>8}")
+    for log_n in (int(c) for c in args.costs.split(",")):
+        n = 2 ** log_n
+        # Current cost setting, so the stored hashes below are not rehashed on login
+        credentials.SCRYPT_N = n
+        store = UserStore(os.path.join(workdir, f"users-{log_n}.db"), legacy_json_path=None)
+        users = [f"user{i}" for i in range(args.clients * 2)]
+        for username in users:
+            store.create_user(username, hash_password("correct horse", n=n))
+
+        start = time.perf_counter()
+        hash_password("correct horse", n=n)
+        hash_ms = (time.perf_counter() - start) * 1000
+
+        for cached in (False, True):
+            cache = VerificationCache(ttl=600 if cached else 0)
+            service = CredentialService(store, verifier=BoundedVerifier(workers=args.workers, max_pending=1000),
+                                        throttle=LoginThrottle(), cache=cache)
+            rate, latencies = run_logins(service, users, args.clients, args.logins)
+            print(f"{n:>7} {hash_ms:>8.1f} {'on' if cached else 'off':>6} {rate:>9.1f} "
+                  f"{percentile(latencies, 50):>8.2f} {percentile(latencies, 99):>8.2f}")
@@ -0,0 +1,110 @@
+import argparse
+import os
+import tempfile
+import time
+
+from benchmarks.reporting import compare, write_results
+from sentiment_batcher import percentile
+
+# Microbenchmarks for the hot functions behind each page:
+#   sentiment  backend.analyze_sentiment with each SENTIMENT_ENGINE
+#   history    the HistoryStore calls pages/frontend.py makes per rerun
+#              (save_message, transcript page, sidebar page, chat title)
+#   auth       the credential check auth.authenticate delegates to,
+#              with the verification cache off and on
+# The Streamlit pages themselves run on import, so their helpers are timed
+# through the modules they call. Results are saved as JSON for --compare.
+# Run from the repo root: python -m benchmarks.bench_micro
+
+
+def measure(func, repeat):
+    func()
+    samples = []
+    for i in range(repeat):
+        start = time.perf_counter()
+        func()
+        samples.append((time.perf_counter() - start) * 1e6)
+    return {
+        "mean_us": round(sum(samples) / len(samples), 2),
+        "p50_us": round(percentile(samples, 50), 2),
+        "p99_us": round(percentile(samples, 99), 2),
+    }
+
+
+def bench_sentiment(repeat):
+    os.environ.setdefault("GENAI_API_KEY", "bench")
+    os.environ.setdefault("YOUTUBE_API_KEY", "bench")
+    os.environ["MODEL_WARMUP"] = "0"
+    import backend
+
+    backend.model_registry.get()
+    message = "I have been feeling really anxious about my exams and I can't sleep"
+    results = {}
+    for engine in ("sklearn", "numpy"):
+        backend.SENTIMENT_ENGINE = engine
+        results[f"analyze_sentiment[{engine}]"] = measure(lambda: backend.analyze_sentiment(message), repeat)
+    return results
+
+
+def bench_history(repeat, workdir, chats=200, messages_per_chat=50):
+    from history_store import HistoryStore
+
+    store = HistoryStore(os.path.join(workdir, "history.db"))
+    now = time.time()
+    store.save_messages([
+        ("bench", f"chat-{c}", "user" if m % 2 == 0 else "bot", f"message {m} of chat {c}", now - 10 ** 6 + c * 100 + m)
+        for c in range(chats) for m in range(messages_per_chat)
+    ])
+    counter = iter(range(10 ** 9))
+    return {
+        "save_message": measure(lambda: store.save_message("bench", "chat-new", "user", f"hi {next(counter)}"), repeat),
+        "load_messages": measure(lambda: store.load_messages("chat-7", limit=50), repeat),
+        "get_sidebar_summary": measure(lambda: store.get_sidebar_summary("bench", limit=50), repeat),
+        "get_chat_title": measure(lambda: store.get_chat_title("chat-7"), repeat),
+    }
+
+
+def bench_auth(repeat, workdir):
+    from credentials import CredentialService, LoginThrottle, VerificationCache, hash_password
+    from user_store import UserStore
+
+    store = UserStore(os.path.join(workdir, "users.db"), legacy_json_path=None)
+    store.create_user("bench", hash_password("correct horse"))
+    results = {}
+    for cached in (False, True):
+        service = CredentialService(store, throttle=LoginThrottle(), cache=VerificationCache(ttl=600 if cached else 0))
+        # Each login hashes with scrypt when the cache is off, so fewer rounds
+        rounds = repeat if cached else max(5, repeat // 100)
+        results[f"login[cache={'on' if cached else 'off'}]"] = measure(
+            lambda: service.login("bench", "correct horse", "127.0.0.1"), rounds
+        )
+    return results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Microbenchmarks for sentiment, history and login.")
+    parser.add_argument("--only", choices=("sentiment", "history", "auth"), action="append",
+                        help="run only these groups (repeatable)")
+    parser.add_argument("--repeat", type=int, default=1000)
+    parser.add_argument("--output", help="result JSON path (default: benchmarks/results/...)")
+    parser.add_argument("--compare", help="earlier result JSON to compare with")
+    args = parser.parse_args()
+
+    groups = args.only or ["sentiment", "history", "auth"]
+    workdir = tempfile.mkdtemp(prefix="micro-bench-")
+    results = {}
+    if "sentiment" in groups:
+        results["sentiment"] = bench_sentiment(args.repeat)
+    if "history" in groups:
+        results["history"] = bench_history(args.repeat, workdir)
+    if "auth" in groups:
+        results["auth"] = bench_auth(args.repeat, workdir)
+
+    print(f"{'benchmark':<40} {'mean us':>10} {'p50 us':>10} {'p99 us':>10}")
+    for group, entries in results.items():
+        for name, stats in entries.items():
+            print(f"{group + '.' + name:<40} {stats['mean_us']:>10.1f} {stats['p50_us']:>10.1f} {stats['p99_us']:>10.1f}")
+
+    print(f"Saved {write_results('micro', {'groups': groups, 'repeat': args.repeat}, results, args.output)}")
+    if args.compare:
+        compare(args.compare, results)
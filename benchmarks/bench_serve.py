@@ -0,0 +1,143 @@
+import argparse
+import os
+import signal
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+import requests
+
+from benchmarks.bench_end_to_end import load_messages
+from stub_servers import GeminiStubHandler, YouTubeStubHandler, server_url, start_stub_server
+
+# Memory per worker and throughput scaling of serve.py. For each worker count
+# it starts serve.py against the local stubs, reads each worker's RSS, PSS
+# (RSS with shared pages split between the processes sharing them) and USS
+# (private pages) from /proc, then drives a closed loop of clients against
+# a CPU-bound endpoint (/sentiment/batch) and the full /chat path.
+# Linux only. Run from the repo root:
+#   python -m benchmarks.bench_serve --workers 1,2,4
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def children(pid):
+    try:
+        with open(f"/proc/{pid}/task/{pid}/children") as file:
+            return [int(child) for child in file.read().split()]
+    except OSError:
+        return []
+
+
+def memory_kb(pid):
+    fields = {}
+    with open(f"/proc/{pid}/smaps_rollup") as file:
+        for line in file:
+            parts = line.split()
+            if len(parts) >= 2 and parts[1].isdigit():
+                fields[parts[0].rstrip(":")] = int(parts[1])
+    return {
+        "rss": fields.get("Rss", 0),
+        "pss": fields.get("Pss", 0),
+        "uss": fields.get("Private_Clean", 0) + fields.get("Private_Dirty", 0),
+    }
+
+
+def wait_ready(url, timeout=120):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            if requests.get(url, timeout=1).status_code == 200:
+                return
+        except requests.RequestException:
+            pass
+        time.sleep(0.2)
+    raise RuntimeError(f"{url} not ready after {timeout}s")
+
+
+def closed_loop(url, payloads, clients, duration):
+    done, errors = [0], [0]
+    lock = threading.Lock()
+    deadline = time.monotonic() + duration
+
+    def client(c):
+        session = requests.Session()
+        i = c
+        while time.monotonic() < deadline:
+            try:
+                ok = session.post(url, json=payloads[i % len(payloads)], timeout=30).status_code == 200
+            except requests.RequestException:
+                ok = False
+            with lock:
+                if ok:
+                    done[0] += 1
+                else:
+                    errors[0] += 1
+            i += clients
+
+    threads = [threading.Thread(target=client, args=(c,)) for c in range(clients)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return done[0] / duration, errors[0]
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark serve.py memory per worker and throughput scaling.")
+    parser.add_argument("--workers", default="1,2,4", help="comma-separated worker counts")
+    parser.add_argument("--threads", type=int, default=16)
+    parser.add_argument("--clients", type=int, default=32)
+    parser.add_argument("--duration", type=float, default=10.0)
+    parser.add_argument("--gemini-latency-ms", type=float, default=200.0)
+    parser.add_argument("--youtube-latency-ms", type=float, default=50.0)
+    args = parser.parse_args()
+
+    gemini = start_stub_server(GeminiStubHandler, latency_ms=args.gemini_latency_ms)
+    youtube = start_stub_server(YouTubeStubHandler, latency_ms=args.youtube_latency_ms)
+    workdir = tempfile.mkdtemp(prefix="serve-bench-")
+    env = dict(os.environ)
+    env.update({
+        "GENAI_API_KEY": env.get("GENAI_API_KEY", "bench"),
+        "YOUTUBE_API_KEY": env.get("YOUTUBE_API_KEY", "bench"),
+        "GEMINI_API_ENDPOINT": server_url(gemini),
+        "YOUTUBE_API_ENDPOINT": server_url(youtube) + "/",
+        "HISTORY_DB_PATH": os.path.join(workdir, "history.db"),
+        "RESPONSE_CACHE_ENABLED": "0",
+    })
+
+    messages = load_messages("chatbot_data.csv")
+    batch_payloads = [{"messages": messages[i:i + 16]} for i in range(0, 1600, 16)]
+    chat_payloads = [{"message": message} for message in messages[:1000]]
+
+    print(f"{'workers':>7} {'rss MB':>8} {'pss MB':>8} {'uss MB':>8} {'batch req/s':>12} {'chat req/s':>11} {'errors':>7}")
+    for workers in (int(w) for w in args.workers.split(",")):
+        port = free_port()
+        process = subprocess.Popen(
+            [sys.executable, "serve.py", "--host", "127.0.0.1", "--port", str(port),
+             "--workers", str(workers), "--threads", str(args.threads), "--drain-timeout", "5"],
+            env=env, stdout=subprocess.DEVNULL
+        )
+        try:
+            base = f"http://127.0.0.1:{port}"
+            wait_ready(f"{base}/ready")
+            pids = children(process.pid)
+            memory = [memory_kb(pid) for pid in pids]
+            batch_rate, batch_errors = closed_loop(f"{base}/sentiment/batch", batch_payloads, args.clients, args.duration)
+            chat_rate, chat_errors = closed_loop(f"{base}/chat", chat_payloads, args.clients, args.duration)
+            average = {key: sum(m[key] for m in memory) / len(memory) / 1024 for key in ("rss", "pss", "uss")}
+            print(f"{workers:>7} {average['rss']:>8.1f} {average['pss']:>8.1f} {average['uss']:>8.1f} "
+                  f"{batch_rate:>12.1f} {chat_rate:>11.1f} {batch_errors + chat_errors:>7}")
+        finally:
+            process.send_signal(signal.SIGTERM)
+            process.wait(timeout=30)
+
+    gemini.shutdown()
+    youtube.shutdown()
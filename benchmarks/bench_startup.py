@@ -0,0 +1,73 @@
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+
+# Cold-start timings, each measured in a fresh interpreter:
+#   import backend           module import with warm-up disabled
+#   import backend -> ready  import plus loading the NumPy scorer
+#   load pickles             joblib.load of the two legacy pickles
+#   load artifacts           rebuild sklearn objects from versioned artifacts
+#   load scorer              NumPy scorer from the artifacts (no sklearn)
+# Run from the repo root: python -m benchmarks.bench_startup
+
+PROBES = {
+    "import backend": """
+import time; t = time.perf_counter()
+import backend
+result = time.perf_counter() - t
+""",
+    "import backend -> ready": """
+import time; t = time.perf_counter()
+import backend
+backend.get_scorer()
+result = time.perf_counter() - t
+""",
+    "load pickles": """
+import time; t = time.perf_counter()
+import joblib
+joblib.load("sentiment_model.pkl"); joblib.load("vectorizer.pkl")
+result = time.perf_counter() - t
+""",
+    "load artifacts": """
+import time, os; t = time.perf_counter()
+import model_registry
+model_registry.load_artifacts(os.environ["MODEL_ARTIFACT_DIR"])
+result = time.perf_counter() - t
+""",
+    "load scorer": """
+import time, os; t = time.perf_counter()
+from fast_sentiment import FastSentimentScorer
+FastSentimentScorer.from_artifacts(os.environ["MODEL_ARTIFACT_DIR"])
+result = time.perf_counter() - t
+""",
+}
+
+
+def run_probe(code, env):
+    output = subprocess.run(
+        [sys.executable, "-c", code + "\nimport json; print('RESULT', json.dumps(result))"],
+        env=env, capture_output=True, text=True, check=True
+    ).stdout
+    return json.loads(output.rsplit("RESULT", 1)[1])
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Measure backend cold-start time.")
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    artifact_dir = tempfile.mkdtemp(prefix="artifacts-bench-")
+    subprocess.run([sys.executable, "model_registry.py", "--out", artifact_dir], check=True, capture_output=True)
+
+    env = dict(os.environ)
+    env.setdefault("GENAI_API_KEY", "bench")
+    env.setdefault("YOUTUBE_API_KEY", "bench")
+    env["MODEL_WARMUP"] = "0"
+    env["MODEL_ARTIFACT_DIR"] = artifact_dir
+
+    for name, code in PROBES.items():
+        timings = sorted(run_probe(code, env) for _ in range(args.repeat))
+        print(f"{name:<26} median={timings[len(timings) // 2] * 1000:8.1f}ms min={timings[0] * 1000:8.1f}ms")
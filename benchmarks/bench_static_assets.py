@@ -0,0 +1,66 @@
+import argparse
+import gzip
+import os
+
+from benchmarks.reporting import write_results
+from static_assets import (AVATAR, AVATAR_SOURCE, BUBBLE_COUNT, STYLESHEET, asset_path, bubbles_markup,
+                           image_markup, read_asset, stylesheet_markup)
+
+# Bytes the chat page costs per rerun, with the assets inline (the old page)
+# and served from static/. Counted per rerun:
+#   sent  markup the server sends to the browser for the page chrome
+#         (stylesheet, floating bubbles, avatar element)
+#   read  bytes the script reads from disk (st.image re-reads the GIF)
+# and on the first page load, the asset downloads the browser makes. With
+# static serving the assets have versioned URLs, so later loads hit the
+# browser cache. Run from the repo root: python -m benchmarks.bench_static_assets
+
+# The old page's bubbles, each with its own inline style
+LEGACY_BUBBLES = [(30, 5, 10), (50, 15, 12), (40, 25, 14), (60, 35, 16), (70, 45, 18),
+                  (20, 55, 8), (30, 65, 10), (40, 75, 12), (50, 85, 14), (60, 95, 16),
+                  (25, 10, 9), (35, 20, 11), (45, 30, 13), (55, 40, 15), (65, 50, 17)]
+
+
+def legacy_bubbles_markup():
+    bubbles = "".join(
+        f'<div class="bubble" style="width:{size}px; height:{size}px; left:{left}%; animation-duration:{duration}s;"></div>'
+        for size, left, duration in LEGACY_BUBBLES
+    )
+    return f'<div class="bubble-container">{bubbles}</div>'
+
+
+def measure_inline():
+    # st.image sends a media URL; the GIF itself is fetched once per page load
+    avatar_bytes = os.path.getsize(AVATAR_SOURCE)
+    markup = stylesheet_markup(inline=True) + legacy_bubbles_markup() + f'<img src="/media/{"0" * 56}.gif">'
+    return {"sent_per_rerun": len(markup.encode()), "read_per_rerun": avatar_bytes, "first_load": avatar_bytes}
+
+
+def measure_static():
+    markup = stylesheet_markup() + bubbles_markup(BUBBLE_COUNT) + image_markup(AVATAR, alt="Calm Chatbot",
+                                                                                css_class="chat-avatar")
+    first_load = len(read_asset(STYLESHEET)) + len(read_asset(AVATAR))
+    return {
+        "sent_per_rerun": len(markup.encode()),
+        "read_per_rerun": 0,
+        "first_load": first_load,
+        "first_load_gzip": len(gzip.compress(read_asset(STYLESHEET))) + len(read_asset(AVATAR)),
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Bytes per rerun with inline and static page assets.")
+    parser.add_argument("--reruns", type=int, default=20, help="reruns in a simulated session")
+    parser.add_argument("--output", help="result JSON path (default: benchmarks/results/...)")
+    args = parser.parse_args()
+
+    if not os.path.isfile(asset_path(AVATAR)):
+        raise SystemExit(f"❌ {asset_path(AVATAR)} is missing; build it with: python static_assets.py")
+
+    results = {"inline": measure_inline(), "static": measure_static()}
+    print(f"{'mode':<8} {'sent/rerun':>11} {'read/rerun':>11} {'first load':>11} {f'{args.reruns} reruns':>11}")
+    for mode, stats in results.items():
+        stats["session_bytes"] = stats["first_load"] + stats["sent_per_rerun"] * args.reruns
+        print(f"{mode:<8} {stats['sent_per_rerun']:>11,} {stats['read_per_rerun']:>11,} {stats['first_load']:>11,} "
+              f"{stats['session_bytes']:>11,}")
+    print(f"Saved {write_results('static_assets', {'reruns': args.reruns}, results, args.output)}")
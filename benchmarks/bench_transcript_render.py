@@ -0,0 +1,55 @@
+import argparse
+import os
+import tempfile
+import time
+from datetime import datetime
+
+from history_store import HistoryStore
+from transcript_cache import TranscriptCache, bubble_html
+
+# Per-rerun cost of preparing a transcript as it grows: reloading and
+# re-formatting every message (the old behaviour) vs the keyset-paginated,
+# incrementally refreshed TranscriptCache. Each rerun appends one new turn.
+# Run from the repo root: python -m benchmarks.bench_transcript_render
+
+
+def full_reload(store, chat_id):
+    html = []
+    for role, msg, timestamp in store.load_chat_history(chat_id):
+        time_label = datetime.strptime(timestamp, "%Y-%m-%d %H:%M:%S").strftime("%H:%M")
+        html.append(bubble_html(role, msg, time_label))
+    return "".join(html)
+
+
+def rerun_ms(func, store, chat_id, reruns):
+    total = 0.0
+    for i in range(reruns):
+        store.save_message("bench", chat_id, "user" if i % 2 == 0 else "bot", f"new turn {i}")
+        start = time.perf_counter()
+        func()
+        total += time.perf_counter() - start
+    return total / reruns * 1000
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark transcript rerun time against transcript length.")
+    parser.add_argument("--lengths", default="100,1000,5000,20000")
+    parser.add_argument("--reruns", type=int, default=20)
+    args = parser.parse_args()
+
+    store = HistoryStore(os.path.join(tempfile.mkdtemp(prefix="transcript-bench-"), "history.db"))
+    print(f"{'messages':>9} {'full reload ms':>15} {'cached ms':>10}")
+    for length in (int(n) for n in args.lengths.split(",")):
+        chat_id = f"chat-{length}"
+        now = time.time()
+        store.save_messages([
+            ("bench", chat_id, "user" if i % 2 == 0 else "bot", f"message {i} " + "text " * 20, now - length + i)
+            for i in range(length)
+        ])
+
+        full = rerun_ms(lambda: full_reload(store, chat_id), store, chat_id, args.reruns)
+
+        cache = TranscriptCache(chat_id)
+        cache.refresh(store)
+        cached = rerun_ms(lambda: (cache.refresh(store), cache.html()), store, chat_id, args.reruns)
+        print(f"{length:>9} {full:>15.3f} {cached:>10.3f}")
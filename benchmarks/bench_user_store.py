@@ -0,0 +1,99 @@
+import argparse
+import hashlib
+import json
+import os
+import tempfile
+import threading
+import time
+
+from sentiment_batcher import percentile
+from user_store import UserStore
+
+# Concurrent signup/login load test for the user store. Every worker thread
+# registers its own users and logs each one in right away; at the end every
+# account must exist with the right hash. --compare-json runs the same load
+# against the old read-modify-write users.json approach to show lost signups.
+# Run from the repo root: python -m benchmarks.bench_user_store
+
+
+def hash_password(password):
+    return hashlib.sha256(password.encode()).hexdigest()
+
+
+def run_store(store, workers, per_worker):
+    latencies, errors = [], []
+    lock = threading.Lock()
+
+    def worker(w):
+        local = []
+        for i in range(per_worker):
+            username, password = f"user-{w}-{i}", f"pw-{w}-{i}"
+            start = time.perf_counter()
+            try:
+                if not store.create_user(username, hash_password(password)):
+                    raise AssertionError(f"{username} already existed")
+                if store.get_password_hash(username) != hash_password(password):
+                    raise AssertionError(f"{username} failed to log in")
+            except Exception as e:
+                with lock:
+                    errors.append(repr(e))
+            local.append((time.perf_counter() - start) * 1000)
+        with lock:
+            latencies.extend(local)
+
+    threads = [threading.Thread(target=worker, args=(w,)) for w in range(workers)]
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return time.perf_counter() - start, latencies, errors
+
+
+def run_json(path, workers, per_worker):
+    def load():
+        try:
+            with open(path) as file:
+                return json.load(file)
+        except (OSError, ValueError):
+            return {}
+
+    def worker(w):
+        for i in range(per_worker):
+            users = load()
+            users[f"user-{w}-{i}"] = hash_password(f"pw-{w}-{i}")
+            with open(path, "w") as file:
+                json.dump(users, file)
+
+    threads = [threading.Thread(target=worker, args=(w,)) for w in range(workers)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return len(load())
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Concurrent signup/login load test for the user store.")
+    parser.add_argument("--workers", type=int, default=16)
+    parser.add_argument("--per-worker", type=int, default=250)
+    parser.add_argument("--compare-json", action="store_true")
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp(prefix="user-store-bench-")
+    store = UserStore(os.path.join(workdir, "users.db"), legacy_json_path=None)
+    expected = args.workers * args.per_worker
+
+    wall, latencies, errors = run_store(store, args.workers, args.per_worker)
+    stored = store.count_users()
+    print(f"sqlite store: {expected} signups+logins in {wall:.2f}s ({expected / wall:.0f}/s), "
+          f"p50={percentile(latencies, 50):.2f}ms p99={percentile(latencies, 99):.2f}ms, "
+          f"stored={stored}, errors={len(errors)}")
+    for error in errors[:5]:
+        print("  ", error)
+    if stored != expected or errors:
+        raise SystemExit("❌ data loss or failed logins under concurrency")
+
+    if args.compare_json:
+        kept = run_json(os.path.join(workdir, "users.json"), args.workers, min(args.per_worker, 50))
+        print(f"users.json:   {args.workers * min(args.per_worker, 50)} signups, {kept} accounts survived")
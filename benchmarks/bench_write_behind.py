@@ -0,0 +1,74 @@
+import argparse
+import os
+import tempfile
+import threading
+import time
+
+from benchmarks.reporting import compare, write_results
+from history_store import HistoryStore
+from sentiment_batcher import percentile
+from write_behind import WriteBehindStore
+
+# Chat message persistence: messages/sec and save_message latency with one
+# commit per row (HistoryStore.save_message) against the write-behind queue
+# (write_behind.py), for a few concurrent writer threads standing in for
+# Streamlit sessions. The write-behind rate counts until every row is
+# committed, not just queued. Run from the repo root:
+#   python -m benchmarks.bench_write_behind --messages 20000 --writers 1,4,16
+
+
+def run(store, messages, writers, flush=None):
+    latencies = [[] for _ in range(writers)]
+
+    def writer(w):
+        for i in range(w, messages, writers):
+            start = time.perf_counter()
+            store.save_message(f"user{w}", f"chat-{w}-{i // 50}", "user" if i % 2 == 0 else "bot",
+                               f"message {i} from writer {w}")
+            latencies[w].append((time.perf_counter() - start) * 1e6)
+
+    threads = [threading.Thread(target=writer, args=(w,)) for w in range(writers)]
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    if flush:
+        flush()
+    wall = time.perf_counter() - start
+    samples = [sample for per_writer in latencies for sample in per_writer]
+    return {
+        "messages_per_s": round(messages / wall, 1),
+        "save_p50_us": round(percentile(samples, 50), 1),
+        "save_p99_us": round(percentile(samples, 99), 1),
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark per-row commits against the write-behind queue.")
+    parser.add_argument("--messages", type=int, default=20000)
+    parser.add_argument("--writers", default="1,4,16", help="comma-separated writer thread counts")
+    parser.add_argument("--output", help="result JSON path (default: benchmarks/results/...)")
+    parser.add_argument("--compare", help="earlier result JSON to compare with")
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp(prefix="write-behind-bench-")
+    results = {}
+    print(f"{'mode':<14} {'writers':>7} {'msgs/s':>10} {'save p50 us':>12} {'save p99 us':>12} {'batches':>8}")
+    for writers in (int(w) for w in args.writers.split(",")):
+        store = HistoryStore(os.path.join(workdir, f"direct-{writers}.db"))
+        direct = run(store, args.messages, writers)
+        queued = WriteBehindStore(HistoryStore(os.path.join(workdir, f"queued-{writers}.db")))
+        behind = run(queued, args.messages, writers, flush=queued.flush)
+        behind["batches"] = queued.stats()["batches"]
+        queued.close()
+        results[f"per_row_commit[{writers}]"] = direct
+        results[f"write_behind[{writers}]"] = behind
+        for mode, stats in (("per-row commit", direct), ("write-behind", behind)):
+            print(f"{mode:<14} {writers:>7} {stats['messages_per_s']:>10.0f} {stats['save_p50_us']:>12.1f} "
+                  f"{stats['save_p99_us']:>12.1f} {stats.get('batches', args.messages):>8}")
+
+    params = {"messages": args.messages, "writers": args.writers}
+    print(f"Saved {write_results('write_behind', params, results, args.output)}")
+    if args.compare:
+        compare(args.compare, results)
@@ -0,0 +1,77 @@
+import json
+import os
+import platform
+import subprocess
+import time
+
+# JSON result files for the benchmarks that support --output/--compare. Each
+# file records the commit it was measured on, so two runs can be diffed:
+#   python -m benchmarks.bench_end_to_end --output before.json
+#   (change something)
+#   python -m benchmarks.bench_end_to_end --compare before.json
+
+RESULTS_DIR = os.path.join("benchmarks", "results")
+
+
+def git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                              check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def default_output(name):
+    return os.path.join(RESULTS_DIR, f"{name}-{git_commit() or 'nogit'}-{time.strftime('%Y%m%d-%H%M%S')}.json")
+
+
+def write_results(name, params, results, path=None):
+    path = path or default_output(name)
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    document = {
+        "benchmark": name,
+        "commit": git_commit(),
+        "created_at": time.time(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "params": params,
+        "results": results,
+    }
+    with open(path, "w") as file:
+        json.dump(document, file, indent=2, sort_keys=True)
+    return path
+
+
+# {"a.b.c": number} for every numeric leaf
+def _flatten(value, prefix=""):
+    if isinstance(value, dict):
+        flat = {}
+        for key, item in value.items():
+            flat.update(_flatten(item, f"{prefix}.{key}" if prefix else str(key)))
+        return flat
+    if isinstance(value, (int, float)) and not isinstance(value, bool):
+        return {prefix: value}
+    return {}
+
+
+def compare(baseline_path, results):
+    with open(baseline_path) as file:
+        baseline = json.load(file)
+    old, new = _flatten(baseline["results"]), _flatten(results)
+    print(f"Compared with {baseline_path} (commit {baseline.get('commit')})")
+    print(f"{'metric':<48} {'baseline':>12} {'current':>12} {'change':>9}")
+    for key in sorted(set(old) | set(new)):
+        before, after = old.get(key), new.get(key)
+        if before is None or after is None:
+            change = "new" if before is None else "gone"
+        elif before == 0:
+            change = "" if after == 0 else "n/a"
+        else:
+            change = f"{(after - before) / abs(before) * 100:+.1f}%"
+        print(f"{key:<48} {_cell(before):>12} {_cell(after):>12} {change:>9}")
+
+
+def _cell(value):
+    if value is None:
+        return "-"
+    return f"{value:.4g}" if isinstance(value, float) else str(value)
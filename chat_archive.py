@@ -0,0 +1,254 @@
+import argparse
+import functools
+import itertools
+import json
+import os
+import time
+
+# Cold storage for old chats. archive_chats moves every chat whose last
+# message is older than HISTORY_ARCHIVE_AFTER_DAYS out of the messages table
+# into zstd-compressed Parquet files, partitioned by user and by the month the
+# chat started:
+#
+#   chat_archive/user=<hex user id>/month=2025-03/part-<ms>-<pid>-<n>.parquet
+#
+# Rows in a file are sorted by chat and id, so reading one chat only touches
+# the row groups whose chat_id statistics can contain it. The archived_chats
+# table (see history_store.py) records which file(s) hold each chat; the
+# history store reads them lazily when a chat is opened, so callers see
+# archived and live messages alike. Archived messages leave the full-text
+# index, while chat_sessions, summaries and mood rollups keep them.
+#
+# pyarrow is only imported when an archive is written or read.
+#
+#   python chat_archive.py --older-than-days 180 --vacuum
+#
+# Exports read the same database and archive, so they run next to the store
+# the Streamlit page writes to: the page offers the logged-in user their own
+# history, and an operator can export any user from the command line:
+#
+#   python chat_archive.py --export alice --format arrow --output alice.arrows
+#
+# Archived messages leave the full-text index, so history search doesn't find
+# them; the page says so when a user has archived chats.
+
+ARCHIVE_DIR = os.getenv("HISTORY_ARCHIVE_DIR", "chat_archive")
+ARCHIVE_AFTER_DAYS = float(os.getenv("HISTORY_ARCHIVE_AFTER_DAYS", "180"))
+ARCHIVE_COMPRESSION = os.getenv("HISTORY_ARCHIVE_COMPRESSION", "zstd")
+# Chats per Parquet file, and rows per row group inside it
+ARCHIVE_CHATS_PER_FILE = int(os.getenv("HISTORY_ARCHIVE_CHATS_PER_FILE", "2000"))
+ARCHIVE_ROW_GROUP_SIZE = int(os.getenv("HISTORY_ARCHIVE_ROW_GROUP_SIZE", "8192"))
+# Archived chats kept decoded in memory, so Streamlit reruns don't reread files
+ARCHIVE_CACHE_CHATS = int(os.getenv("HISTORY_ARCHIVE_CACHE_CHATS", "64"))
+EXPORT_BATCH_SIZE = int(os.getenv("HISTORY_EXPORT_BATCH_SIZE", "5000"))
+
+_file_numbers = itertools.count()
+
+# Column order of archive files, of HistoryStore.load_archive_rows and of exports
+COLUMNS = ("id", "user_id", "chat_id", "role", "message", "created_at", "sentiment", "sentiment_scores", "mood")
+
+
+def archive_schema():
+    import pyarrow as pa
+
+    return pa.schema([
+        ("id", pa.int64()), ("user_id", pa.string()), ("chat_id", pa.string()), ("role", pa.string()),
+        ("message", pa.string()), ("created_at", pa.float64()), ("sentiment", pa.string()),
+        ("sentiment_scores", pa.string()), ("mood", pa.float64()),
+    ])
+
+
+# Partition directory of a user's chats started in `month` ("YYYY-MM"),
+# relative to the archive directory. The user id is hex-encoded so any
+# username is a safe directory name.
+def partition_path(user_id, month):
+    return os.path.join(f"user={(user_id or '').encode('utf-8').hex() or '_'}", f"month={month}")
+
+
+# Month a chat started in, local time like the rest of the history
+def chat_month(first_at):
+    return time.strftime("%Y-%m", time.localtime(first_at))
+
+
+def _batch(rows, schema):
+    import pyarrow as pa
+
+    return pa.RecordBatch.from_arrays(
+        [pa.array([row[i] for row in rows], type=field.type) for i, field in enumerate(schema)], schema=schema
+    )
+
+
+# Write rows (tuples in COLUMNS order) to a new file in the partition and
+# return its path relative to archive_dir. The file only appears under its
+# final name once complete.
+def write_archive_file(archive_dir, partition, rows):
+    import pyarrow.parquet as pq
+
+    directory = os.path.join(archive_dir, partition)
+    os.makedirs(directory, exist_ok=True)
+    name = f"part-{int(time.time() * 1000)}-{os.getpid()}-{next(_file_numbers)}.parquet"
+    path = os.path.join(directory, name)
+    rows = sorted(rows, key=lambda row: (row[2], row[0]))
+    schema = archive_schema()
+    with pq.ParquetWriter(path + ".tmp", schema, compression=ARCHIVE_COMPRESSION) as writer:
+        for start in range(0, len(rows), ARCHIVE_ROW_GROUP_SIZE):
+            writer.write_batch(_batch(rows[start:start + ARCHIVE_ROW_GROUP_SIZE], schema))
+    os.replace(path + ".tmp", path)
+    return os.path.join(partition, name)
+
+
+# One chat's archived messages in a file as ((id, role, message, created_at), ...)
+@functools.lru_cache(maxsize=ARCHIVE_CACHE_CHATS)
+def _read_chat_file(path, chat_id):
+    import pyarrow.parquet as pq
+
+    table = pq.read_table(path, columns=["id", "role", "message", "created_at"],
+                          filters=[("chat_id", "==", chat_id)])
+    return tuple(zip(*(table.column(name).to_pylist() for name in ("id", "role", "message", "created_at"))))
+
+
+# A chat's archived messages from its files (oldest file first) as
+# [(id, role, message, created_at)], oldest first. A missing or unreadable
+# file is reported and skipped rather than failing the whole chat.
+def read_chat(archive_dir, paths, chat_id):
+    rows = []
+    for path in paths:
+        try:
+            rows.extend(_read_chat_file(os.path.join(archive_dir, path), chat_id))
+        except Exception as e:
+            print(f"❌ Failed to read archived chat {chat_id} from {path}: {e}")
+    return rows
+
+
+# Move chats idle since before `older_than_days` ago from the database into
+# archive files; returns {"chats", "messages", "files", "bytes"}. Each file
+# is written before the rows it holds are deleted, so a crash in between
+# leaves an unreferenced file, never lost messages.
+def archive_chats(store, archive_dir=ARCHIVE_DIR, older_than_days=ARCHIVE_AFTER_DAYS, now=None, max_chats=None):
+    cutoff = (time.time() if now is None else now) - older_than_days * 86400
+    chats = store.get_archivable_chats(cutoff, limit=max_chats)
+    partitions = {}
+    for chat_id, user_id, first_at in chats:
+        partitions.setdefault((user_id, chat_month(first_at)), []).append(chat_id)
+
+    totals = {"chats": 0, "messages": 0, "files": 0, "bytes": 0}
+    for (user_id, month), chat_ids in sorted(partitions.items()):
+        for start in range(0, len(chat_ids), ARCHIVE_CHATS_PER_FILE):
+            group = chat_ids[start:start + ARCHIVE_CHATS_PER_FILE]
+            rows = store.load_archive_rows(group)
+            if not rows:
+                continue
+            path = write_archive_file(archive_dir, partition_path(user_id, month), rows)
+            through = {}
+            for row in rows:
+                through[row[2]] = max(through.get(row[2], 0), row[0])
+            store.record_archive(path, user_id, month, list(through.items()))
+            totals["chats"] += len(through)
+            totals["messages"] += len(rows)
+            totals["files"] += 1
+            totals["bytes"] += os.path.getsize(os.path.join(archive_dir, path))
+    return totals
+
+
+# A user's whole history as pyarrow RecordBatches of at most batch_size rows:
+# archived files month by month, then live messages chat by chat. Only one
+# batch is held in memory at a time.
+def export_batches(store, user_id, archive_dir=ARCHIVE_DIR, batch_size=EXPORT_BATCH_SIZE):
+    import pyarrow.parquet as pq
+
+    schema = archive_schema()
+    for path in store.get_archive_files(user_id):
+        with pq.ParquetFile(os.path.join(archive_dir, path)) as file:
+            for batch in file.iter_batches(batch_size=batch_size, columns=list(COLUMNS)):
+                yield batch
+    after = None
+    while True:
+        rows = store.load_user_messages(user_id, after=after, limit=batch_size)
+        if not rows:
+            return
+        yield _batch(rows, schema)
+        after = (rows[-1][2], rows[-1][0])
+
+
+# Export as newline-delimited JSON, one message per line
+def export_ndjson(store, user_id, archive_dir=ARCHIVE_DIR, batch_size=EXPORT_BATCH_SIZE):
+    for batch in export_batches(store, user_id, archive_dir, batch_size):
+        lines = []
+        for row in batch.to_pylist():
+            row["sentiment_scores"] = json.loads(row["sentiment_scores"]) if row["sentiment_scores"] else None
+            lines.append(json.dumps(row, ensure_ascii=False))
+        yield ("\n".join(lines) + "\n").encode("utf-8")
+
+
+# Collects what the Arrow IPC writer produces so it can be yielded chunk by chunk
+class _Chunks:
+    def __init__(self):
+        self.parts = []
+        self.closed = False
+
+    def write(self, data):
+        self.parts.append(bytes(data))
+        return len(data)
+
+    def flush(self):
+        pass
+
+    def close(self):
+        self.closed = True
+
+    def take(self):
+        data = b"".join(self.parts)
+        self.parts = []
+        return data
+
+
+# Export as an Arrow IPC stream (columnar, readable with pyarrow.ipc.open_stream)
+def export_arrow(store, user_id, archive_dir=ARCHIVE_DIR, batch_size=EXPORT_BATCH_SIZE):
+    import pyarrow as pa
+
+    chunks = _Chunks()
+    with pa.ipc.new_stream(pa.PythonFile(chunks, mode="w"), archive_schema()) as writer:
+        for batch in export_batches(store, user_id, archive_dir, batch_size):
+            writer.write_batch(batch)
+            yield chunks.take()
+    yield chunks.take()
+
+
+EXPORT_FORMATS = {
+    "ndjson": (export_ndjson, "application/x-ndjson"),
+    "arrow": (export_arrow, "application/vnd.apache.arrow.stream"),
+}
+
+
+if __name__ == "__main__":
+    from history_store import DB_PATH, HistoryStore
+
+    parser = argparse.ArgumentParser(description="Move old chats from the history database to Parquet archives.")
+    parser.add_argument("--db", default=DB_PATH)
+    parser.add_argument("--archive-dir", default=ARCHIVE_DIR)
+    parser.add_argument("--older-than-days", type=float, default=ARCHIVE_AFTER_DAYS)
+    parser.add_argument("--max-chats", type=int, help="archive at most this many chats in this run")
+    parser.add_argument("--vacuum", action="store_true", help="compact the database file afterwards")
+    parser.add_argument("--export", metavar="USER", help="export this user's history instead of archiving")
+    parser.add_argument("--format", choices=sorted(EXPORT_FORMATS), default="ndjson")
+    parser.add_argument("--output", help="export file (default: chat-history-<user>.jsonl or .arrows)")
+    args = parser.parse_args()
+
+    store = HistoryStore(args.db, archive_dir=args.archive_dir)
+    if args.export:
+        output = args.output or f"chat-history-{args.export}.{'jsonl' if args.format == 'ndjson' else 'arrows'}"
+        export, _ = EXPORT_FORMATS[args.format]
+        with open(output, "wb") as file:
+            for chunk in export(store, args.export, args.archive_dir):
+                file.write(chunk)
+        print(f"✅ Exported {args.export}'s history to {output} ({os.path.getsize(output) / 1e6:.1f} MB)")
+        store.close()
+        raise SystemExit(0)
+    start = time.perf_counter()
+    totals = archive_chats(store, args.archive_dir, args.older_than_days, max_chats=args.max_chats)
+    print(f"✅ Archived {totals['messages']} messages from {totals['chats']} chats into {totals['files']} files "
+          f"({totals['bytes'] / 1e6:.1f} MB) in {time.perf_counter() - start:.1f}s")
+    if args.vacuum and totals["messages"]:
+        store.vacuum()
+        print(f"✅ Compacted {args.db} to {os.path.getsize(args.db) / 1e6:.1f} MB")
+    store.close()
@@ -1,39 +1,31 @@
 import sqlite3
 
-# Connect to the database (creates the file if it doesn't exist)
-conn = sqlite3.connect("chat_history.db")
-cursor = conn.cursor()
-
-# Create a table for storing chat messages with a timestamp
-cursor.execute("""
-CREATE TABLE IF NOT EXISTS conversations (
-    chat_id TEXT,
-    role TEXT,
-    message TEXT,
-    timestamp DATETIME DEFAULT CURRENT_TIMESTAMP
-)
-""")
+from history_store import DB_PATH, HistoryStore
 
-# Add a timestamp column if it doesn't already exist
-try:
-    cursor.execute("""
-    ALTER TABLE conversations ADD COLUMN timestamp DATETIME DEFAULT CURRENT_TIMESTAMP
-    """)
-    conn.commit()
-    print("Timestamp column added successfully!")
-except sqlite3.OperationalError:
-    # Ignore the error if the column already exists
-    print("Timestamp column already exists.")
+# Create (or migrate) the chat history database. Opening the store applies any
+# pending schema migrations, including copying rows out of the old
+# `conversations` table into the indexed `messages` table.
+store = HistoryStore(DB_PATH)
+conn = sqlite3.connect(DB_PATH)
+cursor = conn.cursor()
 
-# Verify the schema of the conversations table
-cursor.execute("PRAGMA table_info(conversations)")
+# Verify the schema of the messages table
+cursor.execute("PRAGMA table_info(messages)")
 columns = cursor.fetchall()
 print("Table schema:")
 for column in columns:
     print(column)
 
-# Commit and close connection
-conn.commit()
+cursor.execute("PRAGMA index_list(messages)")
+print("Indexes:")
+for index in cursor.fetchall():
+    print(index)
+
+cursor.execute("PRAGMA journal_mode")
+print("Journal mode:", cursor.fetchone()[0])
+
+# Close connections
 conn.close()
+store.close()
 
-print("Database and table created successfully!")
\ No newline at end of file
+print("Database and table created successfully!")
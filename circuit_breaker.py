@@ -0,0 +1,129 @@
+import threading
+import time
+from collections import deque
+
+# Circuit breaker for an upstream API. It watches the last `window` calls and
+# opens when, over at least `min_calls` of them, the share of failures reaches
+# `failure_rate` or the share slower than `slow_call_ms` reaches
+# `slow_call_rate`. While open, calls fail immediately with CircuitOpen so the
+# caller can serve its fallback instead of waiting for a timeout. After
+# `open_seconds` the breaker lets up to `half_open_calls` probe calls through:
+# if they all succeed it closes, and any failure opens it again.
+
+CLOSED, HALF_OPEN, OPEN = "closed", "half_open", "open"
+STATE_VALUES = {CLOSED: 0, HALF_OPEN: 1, OPEN: 2}
+
+
+class CircuitOpen(Exception):
+    pass
+
+
+class CircuitBreaker:
+    def __init__(self, name, window=20, min_calls=5, failure_rate=0.5, slow_call_ms=10000, slow_call_rate=0.8,
+                 open_seconds=30, half_open_calls=2):
+        self.name = name
+        self.window = window
+        self.min_calls = min_calls
+        self.failure_rate = failure_rate
+        self.slow_call = slow_call_ms / 1000.0
+        self.slow_call_rate = slow_call_rate
+        self.open_seconds = open_seconds
+        self.half_open_calls = half_open_calls
+        self._lock = threading.Lock()
+        self._calls = deque(maxlen=window)
+        self._state = CLOSED
+        self._opened_at = 0.0
+        self._half_open_at = 0.0
+        self._probes = 0
+        self._probe_successes = 0
+        self._counters = {"calls": 0, "failures": 0, "slow_calls": 0, "rejected": 0, "opened": 0}
+
+    def _open(self, now):
+        self._state = OPEN
+        self._opened_at = now
+        self._probes = 0
+        self._probe_successes = 0
+        self._counters["opened"] += 1
+        print(f"⚠️ Circuit {self.name} opened")
+
+    def state(self):
+        with self._lock:
+            if self._state == OPEN and time.monotonic() - self._opened_at >= self.open_seconds:
+                return HALF_OPEN
+            return self._state
+
+    # True if a call may go ahead; every allowed call must be followed by
+    # record(). While half-open only a few probe calls are let through.
+    def allow(self):
+        now = time.monotonic()
+        with self._lock:
+            if self._state == OPEN and now - self._opened_at >= self.open_seconds:
+                self._state = HALF_OPEN
+                self._half_open_at = now
+            if self._state == HALF_OPEN:
+                # Probes that never reported back (e.g. abandoned after a
+                # timeout) must not keep the breaker half-open forever
+                if self._probes >= self.half_open_calls and now - self._half_open_at >= self.open_seconds:
+                    self._probes = self._probe_successes
+                    self._half_open_at = now
+                if self._probes >= self.half_open_calls:
+                    self._counters["rejected"] += 1
+                    return False
+                self._probes += 1
+                return True
+            if self._state == OPEN:
+                self._counters["rejected"] += 1
+                return False
+            return True
+
+    def record(self, ok, seconds):
+        now = time.monotonic()
+        slow = seconds >= self.slow_call
+        with self._lock:
+            self._counters["calls"] += 1
+            self._counters["failures"] += not ok
+            self._counters["slow_calls"] += slow
+            if self._state == HALF_OPEN:
+                if not ok or slow:
+                    self._open(now)
+                else:
+                    self._probe_successes += 1
+                    if self._probe_successes >= self.half_open_calls:
+                        self._state = CLOSED
+                        self._calls.clear()
+                        print(f"✅ Circuit {self.name} closed")
+                return
+            if self._state == OPEN:
+                return
+
+            self._calls.append((ok, slow))
+            if len(self._calls) >= self.min_calls:
+                failures = sum(1 for call_ok, _ in self._calls if not call_ok)
+                slow_calls = sum(1 for _, call_slow in self._calls if call_slow)
+                if (failures / len(self._calls) >= self.failure_rate
+                        or slow_calls / len(self._calls) >= self.slow_call_rate):
+                    self._open(now)
+
+    def call(self, func, *args, **kwargs):
+        if not self.allow():
+            raise CircuitOpen(f"{self.name} circuit is open")
+        start = time.perf_counter()
+        try:
+            result = func(*args, **kwargs)
+        except Exception:
+            self.record(False, time.perf_counter() - start)
+            raise
+        self.record(True, time.perf_counter() - start)
+        return result
+
+    def stats(self):
+        state = self.state()
+        with self._lock:
+            counters = dict(self._counters)
+            recent = list(self._calls)
+        counters["state"] = STATE_VALUES[state]
+        counters["state_name"] = state
+        counters["window_failure_rate"] = (
+            round(sum(1 for ok, _ in recent if not ok) / len(recent), 4) if recent else 0.0
+        )
+        return counters
@@ -0,0 +1,189 @@
+import os
+import random
+import threading
+import time
+
+# Shared outbound-client layer: long-lived Gemini model objects, pooled
+# keep-alive HTTP sessions and retry with jittered backoff. SDK imports are
+# deferred so the frontend can use the HTTP session without the Google SDKs.
+
+POOL_SIZE = int(os.getenv("OUTBOUND_POOL_SIZE", "20"))
+TIMEOUT = float(os.getenv("OUTBOUND_TIMEOUT", "30"))
+RETRIES = int(os.getenv("OUTBOUND_RETRIES", "2"))
+BACKOFF_BASE = float(os.getenv("OUTBOUND_BACKOFF_BASE", "0.25"))
+BACKOFF_MAX = float(os.getenv("OUTBOUND_BACKOFF_MAX", "4"))
+
+GEMINI_MODEL_NAME = os.getenv("GEMINI_MODEL_NAME", "gemini-1.5-flash-latest")
+GEMINI_TIMEOUT = float(os.getenv("GEMINI_TIMEOUT", str(TIMEOUT)))
+YOUTUBE_TIMEOUT = float(os.getenv("YOUTUBE_HTTP_TIMEOUT", "10"))
+
+RETRYABLE_STATUS = (429, 502, 503, 504)
+
+_lock = threading.Lock()
+_gemini_config = {}
+_gemini_configured = False
+_models = {}
+_sessions = {}
+_thread_local = threading.local()
+
+
+# Full-jitter exponential backoff delay for the given attempt (0-based)
+def backoff_delay(attempt, base=BACKOFF_BASE, cap=BACKOFF_MAX):
+    return random.uniform(0, min(cap, base * (2 ** attempt)))
+
+
+# Call func, retrying up to `retries` times when should_retry(exc) is true
+def retry_call(func, *args, retries=RETRIES, should_retry=None, **kwargs):
+    attempt = 0
+    while True:
+        try:
+            return func(*args, **kwargs)
+        except Exception as e:
+            if attempt >= retries or (should_retry is not None and not should_retry(e)):
+                raise
+            time.sleep(backoff_delay(attempt))
+            attempt += 1
+
+
+# Transient Gemini errors worth retrying (rate limits, timeouts, 5xx)
+def is_transient_gemini_error(exc):
+    try:
+        from google.api_core import exceptions as api_exceptions
+    except ImportError:
+        return False
+    return isinstance(exc, (
+        api_exceptions.TooManyRequests,
+        api_exceptions.ServiceUnavailable,
+        api_exceptions.DeadlineExceeded,
+        api_exceptions.InternalServerError,
+    ))
+
+
+# Record Gemini settings; the SDK is imported and configured on first use.
+# An endpoint (e.g. a local stub server) switches to the REST transport.
+def configure_gemini(api_key, endpoint=None):
+    global _gemini_configured
+    with _lock:
+        _gemini_config.clear()
+        _gemini_config.update(api_key=api_key, endpoint=endpoint)
+        _gemini_configured = False
+        _models.clear()
+
+
+def _ensure_gemini_configured(genai):
+    global _gemini_configured
+    if _gemini_configured or not _gemini_config:
+        return
+    if _gemini_config.get("endpoint"):
+        genai.configure(api_key=_gemini_config["api_key"], transport="rest",
+                        client_options={"api_endpoint": _gemini_config["endpoint"]})
+    else:
+        genai.configure(api_key=_gemini_config["api_key"])
+    _gemini_configured = True
+
+
+# Long-lived GenerativeModel, built once per model name
+def get_gemini_model(name=GEMINI_MODEL_NAME):
+    model = _models.get(name)
+    if model is None:
+        import google.generativeai as genai
+        with _lock:
+            _ensure_gemini_configured(genai)
+            model = _models.get(name)
+            if model is None:
+                model = genai.GenerativeModel(name)
+                _models[name] = model
+    return model
+
+
+def gemini_generate(prompt, model_name=GEMINI_MODEL_NAME, timeout=GEMINI_TIMEOUT, **kwargs):
+    model = get_gemini_model(model_name)
+    return retry_call(
+        model.generate_content, prompt,
+        should_retry=is_transient_gemini_error,
+        request_options={"timeout": timeout},
+        **kwargs
+    )
+
+
+# Stream the reply as text chunks; only the initial request is retried,
+# never a stream that has already produced tokens
+def gemini_stream(prompt, model_name=GEMINI_MODEL_NAME, timeout=GEMINI_TIMEOUT, **kwargs):
+    model = get_gemini_model(model_name)
+    response = retry_call(
+        model.generate_content, prompt,
+        should_retry=is_transient_gemini_error,
+        stream=True,
+        request_options={"timeout": timeout},
+        **kwargs
+    )
+    for chunk in response:
+        try:
+            text = chunk.text
+        except ValueError:
+            # Chunk without text parts (e.g. safety block or final metadata)
+            continue
+        if text:
+            yield text
+
+
+# httplib2.Http is not thread-safe, so each thread keeps its own keep-alive
+# connection for YouTube API calls
+def youtube_http():
+    http = getattr(_thread_local, "youtube_http", None)
+    if http is None:
+        import httplib2
+        http = httplib2.Http(timeout=YOUTUBE_TIMEOUT)
+        _thread_local.youtube_http = http
+    return http
+
+
+# Execute a googleapiclient request on the pooled connection; the client
+# library retries 429/5xx itself with randomized exponential backoff
+def execute_youtube(request, retries=RETRIES):
+    return request.execute(http=youtube_http(), num_retries=retries)
+
+
+# Pooled keep-alive requests.Session per base name (e.g. "backend"). Failed
+# connections are retried for any method (nothing was sent); 429/5xx replies
+# only for idempotent methods, so a POST /chat is never run twice and a
+# backend shedding load with 503 isn't hit again straight away.
+def get_http_session(name="default", pool_size=POOL_SIZE, retries=RETRIES):
+    session = _sessions.get(name)
+    if session is not None:
+        return session
+
+    import requests
+    from requests.adapters import HTTPAdapter
+    from urllib3.util.retry import Retry
+
+    with _lock:
+        session = _sessions.get(name)
+        if session is None:
+            retry = Retry(
+                total=retries,
+                connect=retries,
+                read=0,
+                status=retries,
+                backoff_factor=BACKOFF_BASE,
+                backoff_max=BACKOFF_MAX,
+                backoff_jitter=BACKOFF_BASE,
+                status_forcelist=RETRYABLE_STATUS,
+                allowed_methods=Retry.DEFAULT_ALLOWED_METHODS,
+                respect_retry_after_header=True,
+                raise_on_status=False,
+            )
+            adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size, max_retries=retry)
+            session = requests.Session()
+            session.mount("http://", adapter)
+            session.mount("https://", adapter)
+            _sessions[name] = session
+    return session
+
+
+def close_all():
+    with _lock:
+        for session in _sessions.values():
+            session.close()
+        _sessions.clear()
+        _models.clear()
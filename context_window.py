@@ -0,0 +1,156 @@
+import math
+
+# Conversation context for multi-turn prompts. The recent turns of a chat go
+# into the prompt verbatim, up to a token budget; older turns are folded into
+# a rolling summary stored in chat_summaries (history_store.py). The budget
+# covers the summary, the turns and the current message. The window slides in
+# steps: once the unsummarized turns exceed the budget, the oldest
+# ones are summarized until only half the budget remains, so the summarizer
+# runs every few turns rather than on every request. At most `max_turns`
+# recent messages are read per request, so prompt size and assembly time stay
+# bounded however long the chat gets; turns older than those that the summary
+# doesn't cover yet are folded into it first, once, a page at a time.
+#
+# The chat page builds the context from its own history database and sends
+# it with the request (see ContextWindow.accept); the backend only reads its
+# own database when a request carries none.
+
+TOKEN_BUDGET = 1200
+SUMMARY_BUDGET = 300
+MAX_TURNS = 60
+
+
+# Rough token count (about four characters per token for English text)
+def estimate_tokens(text):
+    return math.ceil(len(text) / 4) if text else 0
+
+
+def format_turn(role, message):
+    return f"{'User' if role == 'user' else 'Bot'}: {message}"
+
+
+# Summarizer that needs no model call: keeps the previous summary plus one
+# line per user message, dropping the oldest lines beyond the budget
+def extractive_summary(previous, turns, budget):
+    lines = previous.splitlines() if previous else []
+    lines += [f"- {' '.join(message.split())[:200]}" for role, message in turns if role == "user"]
+    kept, used = [], 0
+    for line in reversed(lines):
+        cost = estimate_tokens(line) + 1
+        if used + cost > budget:
+            break
+        kept.append(line)
+        used += cost
+    return "\n".join(reversed(kept))
+
+
+def render_context(context):
+    sections = []
+    if context["summary"]:
+        sections.append(f"Summary of the earlier conversation:\n{context['summary']}")
+    if context["turns"]:
+        sections.append("Recent conversation:\n" + "\n".join(format_turn(role, message)
+                                                            for role, message in context["turns"]))
+    return "\n\n".join(sections)
+
+
+class ContextWindow:
+    def __init__(self, store, summarize=None, token_budget=TOKEN_BUDGET, summary_budget=SUMMARY_BUDGET,
+                 max_turns=MAX_TURNS):
+        self.store = store
+        self.summarize = summarize or extractive_summary
+        self.token_budget = token_budget
+        self.summary_budget = summary_budget
+        self.max_turns = max_turns
+
+    def _fold(self, summary, evicted):
+        turns = [(role, message) for _, role, message, _ in evicted]
+        try:
+            summary = self.summarize(summary, turns, self.summary_budget)
+        except Exception as e:
+            print(f"❌ Context summary failed, using extractive summary: {e}")
+            summary = extractive_summary(summary, turns, self.summary_budget)
+        # Hold any summarizer to the budget
+        return summary[:self.summary_budget * 4]
+
+    # {"summary", "turns": [(role, message)], "tokens", "slid"} for a chat,
+    # excluding current_message itself if it is already the last saved turn
+    def build(self, chat_id, current_message=""):
+        rows = self.store.load_messages(chat_id, limit=self.max_turns)
+        cached = self.store.get_chat_summary(chat_id)
+        through_id, summary = cached if cached else (0, "")
+        slid = False
+        if len(rows) == self.max_turns and rows[0][0] > through_id:
+            summary, caught_up = self._catch_up(chat_id, summary, through_id, rows[0][0])
+            slid = caught_up != through_id
+            through_id = caught_up
+
+        # The frontend saves the user's message before asking for the reply
+        if rows and rows[-1][1] == "user" and rows[-1][2] == current_message:
+            rows = rows[:-1]
+        window = [row for row in rows if row[0] > through_id]
+        costs = [estimate_tokens(format_turn(role, message)) + 1 for _, role, message, _ in window]
+        # Room for turns once the message and the summary's share are reserved
+        budget = self.token_budget - self.summary_budget - estimate_tokens(current_message)
+
+        if window and sum(costs) > budget:
+            keep, used = len(window), 0
+            while keep > 0 and used + costs[keep - 1] <= budget // 2:
+                keep -= 1
+                used += costs[keep]
+            evicted, window, costs = window[:keep], window[keep:], costs[keep:]
+            summary = self._fold(summary, evicted)
+            self.store.set_chat_summary(chat_id, evicted[-1][0], summary)
+            slid = True
+
+        return {
+            "summary": summary,
+            "turns": [(role, message) for _, role, message, _ in window],
+            "tokens": sum(costs) + estimate_tokens(summary),
+            "slid": slid,
+        }
+
+    # Fold the messages between the summary (through_id) and the oldest row
+    # read for the window (before_id) into the summary, max_turns at a time.
+    # Returns (summary, id it now runs through).
+    def _catch_up(self, chat_id, summary, through_id, before_id):
+        # Usually nothing is missing: one indexed lookup of the previous message
+        previous = self.store.load_messages(chat_id, limit=1, before_id=before_id)
+        if not previous or previous[0][0] <= through_id:
+            return summary, through_id
+        gap = []
+        while True:
+            page = self.store.load_messages(chat_id, limit=self.max_turns, before_id=before_id)
+            newer = [row for row in page if row[0] > through_id]
+            gap[:0] = newer
+            if len(newer) < len(page) or len(page) < self.max_turns:
+                break
+            before_id = page[0][0]
+        if not gap:
+            return summary, through_id
+        for start in range(0, len(gap), self.max_turns):
+            summary = self._fold(summary, gap[start:start + self.max_turns])
+        self.store.set_chat_summary(chat_id, gap[-1][0], summary)
+        return summary, gap[-1][0]
+
+    # A context the client built ({"summary": str, "turns": [[role, message],
+    # ...]}) held to this window's limits: the summary is cut to its budget
+    # and the oldest turns are dropped until the rest fit. None if malformed.
+    def accept(self, raw, current_message=""):
+        if not isinstance(raw, dict):
+            return None
+        summary, turns = raw.get("summary") or "", raw.get("turns") or []
+        if not isinstance(summary, str) or not isinstance(turns, list):
+            return None
+        if not all(isinstance(turn, (list, tuple)) and len(turn) == 2 and all(isinstance(part, str) for part in turn)
+                   for turn in turns):
+            return None
+        summary = summary[:self.summary_budget * 4]
+        turns = [(role, message) for role, message in turns[-self.max_turns:]]
+        costs = [estimate_tokens(format_turn(role, message)) + 1 for role, message in turns]
+        budget = self.token_budget - self.summary_budget - estimate_tokens(current_message)
+        keep, used = len(turns), 0
+        while keep > 0 and used + costs[keep - 1] <= budget:
+            keep -= 1
+            used += costs[keep]
+        return {"summary": summary, "turns": turns[keep:], "tokens": used + estimate_tokens(summary), "slid": False}
@@ -0,0 +1,249 @@
+import base64
+import hashlib
+import hmac
+import os
+import re
+import threading
+import time
+from collections import OrderedDict, deque
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeout
+
+# Password hashing and login checks. New hashes use salted scrypt (memory
+# hard) with a configurable cost; legacy unsalted SHA-256 hashes and plaintext
+# entries from users.json still verify and are rehashed on the next
+# successful login. Recent successful checks are remembered for a few
+# minutes so repeat logins skip the KDF. Verification runs on a small bounded thread pool so a
+# burst of logins cannot take every core, and repeated failures are throttled
+# per username and per client IP.
+
+SCRYPT_N = int(os.getenv("AUTH_SCRYPT_N", str(2 ** 14)))
+SCRYPT_R = int(os.getenv("AUTH_SCRYPT_R", "8"))
+SCRYPT_P = int(os.getenv("AUTH_SCRYPT_P", "1"))
+SALT_BYTES = 16
+KEY_BYTES = 32
+
+VERIFY_WORKERS = int(os.getenv("AUTH_VERIFY_WORKERS", "2"))
+VERIFY_MAX_PENDING = int(os.getenv("AUTH_VERIFY_MAX_PENDING", "32"))
+VERIFY_TIMEOUT = float(os.getenv("AUTH_VERIFY_TIMEOUT", "10"))
+
+VERIFY_CACHE_TTL = float(os.getenv("AUTH_VERIFY_CACHE_TTL", "300"))
+VERIFY_CACHE_SIZE = int(os.getenv("AUTH_VERIFY_CACHE_SIZE", "1024"))
+
+MAX_FAILED_ATTEMPTS = int(os.getenv("AUTH_MAX_FAILED_ATTEMPTS", "5"))
+MAX_FAILED_ATTEMPTS_PER_IP = int(os.getenv("AUTH_MAX_FAILED_ATTEMPTS_PER_IP", "20"))
+THROTTLE_WINDOW = float(os.getenv("AUTH_THROTTLE_WINDOW", "300"))
+
+_LEGACY_SHA256 = re.compile(r"^[0-9a-f]{64}$")
+
+
+def _b64(data):
+    return base64.b64encode(data).decode("ascii")
+
+
+def _scrypt(password, salt, n, r, p):
+    # scrypt needs 128 * r * n bytes; leave headroom over OpenSSL's default cap
+    return hashlib.scrypt(password.encode(), salt=salt, n=n, r=r, p=p,
+                          maxmem=256 * r * n + 1024 * 1024, dklen=KEY_BYTES)
+
+
+# "scrypt$n$r$p$salt$hash" with base64 salt and hash; cost defaults to the
+# module settings at call time
+def hash_password(password, n=None, r=None, p=None):
+    n, r, p = n or SCRYPT_N, r or SCRYPT_R, p or SCRYPT_P
+    salt = os.urandom(SALT_BYTES)
+    return f"scrypt${n}${r}${p}${_b64(salt)}${_b64(_scrypt(password, salt, n, r, p))}"
+
+
+# Returns (matches, needs_rehash); needs_rehash is true for legacy entries
+# and for scrypt hashes made with a different cost than (n, r, p)
+def verify_password(stored, password, n=None, r=None, p=None):
+    n, r, p = n or SCRYPT_N, r or SCRYPT_R, p or SCRYPT_P
+    if stored.startswith("scrypt$"):
+        try:
+            _, stored_n, stored_r, stored_p, salt, expected = stored.split("$")
+            stored_n, stored_r, stored_p = int(stored_n), int(stored_r), int(stored_p)
+            derived = _scrypt(password, base64.b64decode(salt), stored_n, stored_r, stored_p)
+        except ValueError:
+            return False, False
+        matches = hmac.compare_digest(_b64(derived), expected)
+        return matches, matches and (stored_n, stored_r, stored_p) != (n, r, p)
+
+    # Legacy entries: unsalted SHA-256 hex, or plaintext from early users.json
+    if _LEGACY_SHA256.match(stored):
+        matches = hmac.compare_digest(stored, hashlib.sha256(password.encode()).hexdigest())
+    else:
+        matches = hmac.compare_digest(stored.encode(), password.encode())
+    return matches, matches
+
+
+# Sliding-window count of failed attempts per key
+class LoginThrottle:
+    def __init__(self, window=THROTTLE_WINDOW):
+        self.window = window
+        self._failures = {}
+        self._lock = threading.Lock()
+
+    def _recent(self, key, now):
+        failures = self._failures.get(key)
+        if failures is None:
+            return None
+        while failures and failures[0] <= now - self.window:
+            failures.popleft()
+        if not failures:
+            del self._failures[key]
+            return None
+        return failures
+
+    # Seconds until another attempt is allowed, or 0
+    def retry_after(self, key, limit):
+        now = time.monotonic()
+        with self._lock:
+            failures = self._recent(key, now)
+            if failures is None or len(failures) < limit:
+                return 0
+            return max(0.0, failures[-limit] + self.window - now)
+
+    def record_failure(self, key):
+        now = time.monotonic()
+        with self._lock:
+            failures = self._recent(key, now)
+            if failures is None:
+                failures = self._failures[key] = deque()
+            failures.append(now)
+
+    def reset(self, key):
+        with self._lock:
+            self._failures.pop(key, None)
+
+
+# Remembers recent successful verifications so the KDF is not re-run for
+# the same user and password within the TTL. Entries are keyed by an HMAC of
+# (stored hash, password) under a per-process random key, so neither the
+# password nor a reusable hash of it is kept in memory.
+class VerificationCache:
+    def __init__(self, ttl=VERIFY_CACHE_TTL, max_entries=VERIFY_CACHE_SIZE):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._key = os.urandom(32)
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _digest(self, stored, password):
+        return hmac.new(self._key, stored.encode() + b"\0" + password.encode(), hashlib.sha256).digest()
+
+    def hit(self, username, stored, password):
+        digest = self._digest(stored, password)
+        with self._lock:
+            entry = self._entries.get(username)
+            if entry is None:
+                return False
+            if entry[1] < time.monotonic():
+                del self._entries[username]
+                return False
+            return hmac.compare_digest(entry[0], digest)
+
+    def add(self, username, stored, password):
+        digest = self._digest(stored, password)
+        with self._lock:
+            self._entries[username] = (digest, time.monotonic() + self.ttl)
+            self._entries.move_to_end(username)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def discard(self, username):
+        with self._lock:
+            self._entries.pop(username, None)
+
+
+class VerifierBusy(Exception):
+    pass
+
+
+# Runs password checks on a bounded pool: at most `workers` hashes at once and
+# at most `max_pending` queued; beyond that, or when a check doesn't finish
+# within the timeout, callers get VerifierBusy instead of waiting behind an
+# unbounded queue
+class BoundedVerifier:
+    def __init__(self, workers=VERIFY_WORKERS, max_pending=VERIFY_MAX_PENDING):
+        self._pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="password-verify")
+        self._slots = threading.BoundedSemaphore(workers + max_pending)
+
+    def submit(self, func, *args):
+        if not self._slots.acquire(blocking=False):
+            raise VerifierBusy("Too many logins in progress")
+        future = self._pool.submit(func, *args)
+        future.add_done_callback(lambda _: self._slots.release())
+        return future
+
+    def run(self, func, *args, timeout=VERIFY_TIMEOUT):
+        try:
+            return self.submit(func, *args).result(timeout=timeout)
+        except FutureTimeout:
+            raise VerifierBusy("Password check timed out") from None
+
+
+class CredentialService:
+    def __init__(self, store, verifier=None, throttle=None, cache=None):
+        self.store = store
+        self.verifier = verifier or BoundedVerifier()
+        self.throttle = throttle or LoginThrottle()
+        self.cache = cache if cache is not None else VerificationCache()
+
+    # Returns (ok, message); message explains a failure to the user
+    # Without a client address only the per-username limit applies (one
+    # shared "unknown" bucket would let anyone lock everybody out)
+    def login(self, username, password, client_ip=""):
+        user_key, ip_key = ("user", username), ("ip", client_ip) if client_ip else None
+        wait = self.throttle.retry_after(user_key, MAX_FAILED_ATTEMPTS)
+        if ip_key:
+            wait = max(wait, self.throttle.retry_after(ip_key, MAX_FAILED_ATTEMPTS_PER_IP))
+        if wait:
+            return False, f"Too many failed attempts. Try again in {int(wait) + 1} seconds."
+
+        stored = self.store.get_password_hash(username)
+        if stored is not None and self.cache.hit(username, stored, password):
+            return True, ""
+        try:
+            if stored is None:
+                # Hash anyway so unknown usernames take as long as wrong passwords
+                self.verifier.run(hash_password, password)
+                matches, needs_rehash = False, False
+            else:
+                matches, needs_rehash = self.verifier.run(verify_password, stored, password)
+        except VerifierBusy:
+            return False, "The server is busy. Please try again in a moment."
+
+        if not matches:
+            self.throttle.record_failure(user_key)
+            if ip_key:
+                self.throttle.record_failure(ip_key)
+            return False, "Invalid username or password."
+
+        self.throttle.reset(user_key)
+        # Upgrading the hash can wait for a quieter login; this one succeeded
+        if needs_rehash:
+            try:
+                stored = self.verifier.run(hash_password, password)
+                self.store.set_password_hash(username, stored)
+            except VerifierBusy:
+                pass
+        self.cache.add(username, stored, password)
+        return True, ""
+
+    def register(self, username, password):
+        return self.store.create_user(username, self.verifier.run(hash_password, password))
+
+
+_service = None
+_service_lock = threading.Lock()
+
+
+# Process-wide service (throttle state and the verify pool must outlive
+# Streamlit reruns, which re-execute auth.py)
+def get_credential_service():
+    global _service
+    with _service_lock:
+        if _service is None:
+            from user_store import get_user_store
+            _service = CredentialService(get_user_store())
+        return _service
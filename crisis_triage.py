@@ -0,0 +1,155 @@
+import json
+import os
+import re
+import threading
+import time
+
+# Safety triage run on every chat message before sentiment scoring and the
+# LLM call. Phrases from a crisis lexicon (crisis_lexicon.json: phrases by
+# category, the emergency contacts and the reply to show) are compiled into
+# one trie-shaped regex, so a single pass over the message checks every
+# phrase. A phrase only counts when it stands as whole words ("suicide"
+# matches, "suicidesquad" doesn't).
+#
+# The lexicon is hot-reloaded: CrisisTriage.check() looks at the file's mtime
+# at most every CRISIS_RELOAD_SECONDS and swaps in a freshly compiled matcher
+# when it has changed. A lexicon that fails to load keeps the previous one.
+
+CRISIS_LEXICON_PATH = os.getenv("CRISIS_LEXICON_PATH", "crisis_lexicon.json")
+CRISIS_RELOAD_SECONDS = float(os.getenv("CRISIS_RELOAD_SECONDS", "5"))
+
+# Curly quotes are folded so "don’t" matches "don't"
+_TRANSLATE = str.maketrans({"’": "'", "‘": "'", "“": '"', "”": '"'})
+
+
+def normalize(text):
+    return " ".join(text.lower().translate(_TRANSLATE).split())
+
+
+# Multi-pattern matcher: the phrases are merged into a character trie and the
+# trie is compiled into a single regular expression ("kill (?:myself|someone)"
+# rather than one alternative per phrase). At each position the regex engine
+# follows one trie path, like an Aho-Corasick automaton, so the cost per
+# message barely grows with the lexicon, and the scan runs in C.
+class PhraseMatcher:
+    def __init__(self, phrases):
+        self.categories = {}
+        trie = {}
+        for phrase, category in phrases:
+            phrase = normalize(phrase)
+            if not phrase:
+                continue
+            self.categories.setdefault(phrase, category)
+            node = trie
+            for char in phrase:
+                node = node.setdefault(char, {})
+            node[""] = {}
+        self.size = len(self.categories)
+        pattern = self._compile(trie)
+        self._pattern = re.compile(rf"(?<!\w)(?:{pattern})(?!\w)") if pattern else None
+
+    # Regex for a trie node; "" marks the end of a phrase. Longer branches
+    # come first and the engine backtracks to shorter ones, so a phrase that
+    # isn't followed by a word boundary doesn't hide a shorter one that is.
+    def _compile(self, node):
+        branches = [re.escape(char) + self._compile(child) for char, child in sorted(node.items()) if char]
+        if not branches:
+            return ""
+        body = branches[0] if len(branches) == 1 else "(?:" + "|".join(branches) + ")"
+        return f"(?:{body})?" if "" in node else body
+
+    # [(start, end, category)] of whole-word phrase occurrences in normalized text
+    def find(self, text):
+        if self._pattern is None:
+            return []
+        return [(match.start(), match.end(), self.categories[match.group()]) for match in self._pattern.finditer(text)]
+
+
+def load_lexicon(path=CRISIS_LEXICON_PATH):
+    with open(path, encoding="utf-8") as file:
+        lexicon = json.load(file)
+    phrases = [(phrase, category) for category, items in lexicon["phrases"].items() for phrase in items]
+    return lexicon, PhraseMatcher(phrases)
+
+
+class CrisisTriage:
+    def __init__(self, path=CRISIS_LEXICON_PATH, reload_seconds=CRISIS_RELOAD_SECONDS):
+        self.path = path
+        self.reload_seconds = reload_seconds
+        self._lock = threading.Lock()
+        self._counters = {"checked": 0, "matched": 0, "reloads": 0, "reload_errors": 0}
+        self._mtime = os.path.getmtime(path)
+        self._checked_at = time.monotonic()
+        self._current = load_lexicon(path)
+
+    def _maybe_reload(self):
+        now = time.monotonic()
+        if now - self._checked_at < self.reload_seconds:
+            return
+        with self._lock:
+            if now - self._checked_at < self.reload_seconds:
+                return
+            self._checked_at = now
+            try:
+                mtime = os.path.getmtime(self.path)
+                if mtime == self._mtime:
+                    return
+                lexicon, matcher = load_lexicon(self.path)
+            except Exception as e:
+                self._counters["reload_errors"] += 1
+                print(f"❌ Keeping the previous crisis lexicon; failed to reload {self.path}: {e}")
+                return
+            # One assignment so readers never see a lexicon with the wrong matcher
+            self._current = (lexicon, matcher)
+            self._mtime = mtime
+            self._counters["reloads"] += 1
+            print(f"✅ Reloaded crisis lexicon ({matcher.size} phrases)")
+
+    # None, or the crisis response for a message that matches the lexicon:
+    # {"crisis": True, "categories": [...], "message": ..., "contacts": [...]}
+    def check(self, message):
+        self._maybe_reload()
+        lexicon, matcher = self._current
+        matches = matcher.find(normalize(message))
+        with self._lock:
+            self._counters["checked"] += 1
+            self._counters["matched"] += bool(matches)
+        if not matches:
+            return None
+        return {
+            "crisis": True,
+            "categories": sorted({category for _, _, category in matches}),
+            "message": lexicon["message"],
+            "contacts": lexicon["contacts"],
+        }
+
+    def contacts(self):
+        self._maybe_reload()
+        return self._current[0]["contacts"]
+
+    def stats(self):
+        with self._lock:
+            return dict(self._counters)
+
+
+# Plain-text reply listing the contacts, for clients that only show the
+# message (no blank lines, which would end the frontend's HTML bubble)
+def render_crisis_reply(result):
+    lines = [result["message"]]
+    lines += [f"{contact['name']}: {contact['phone']}" for contact in result["contacts"]]
+    return "\n".join(lines)
+
+
+_triages = {}
+_triages_lock = threading.Lock()
+
+
+# Shared triage per lexicon path (Streamlit reruns re-execute the page but
+# imported modules, and so these, persist)
+def get_crisis_triage(path=CRISIS_LEXICON_PATH):
+    with _triages_lock:
+        triage = _triages.get(path)
+        if triage is None:
+            triage = CrisisTriage(path)
+            _triages[path] = triage
+        return triage
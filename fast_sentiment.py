@@ -0,0 +1,173 @@
+import re
+import unicodedata
+from collections import Counter
+
+import numpy as np
+
+# Pure-NumPy sentiment scorer. Reproduces TfidfVectorizer (word analyzer) and
+# LogisticRegression.predict_proba from the exported vocabulary, idf weights
+# and coefficients, without sklearn's per-call input validation and sparse
+# matrix construction. A single message is a tokenize, a gather over the few
+# matching coefficient columns and an argmax; batches use one dense matmul.
+# Parity with sklearn is checked by benchmarks/bench_fast_sentiment.py.
+
+
+def _strip_accents_unicode(s):
+    try:
+        s.encode("ASCII", errors="strict")
+        return s
+    except UnicodeEncodeError:
+        normalized = unicodedata.normalize("NFKD", s)
+        return "".join(c for c in normalized if not unicodedata.combining(c))
+
+
+def _strip_accents_ascii(s):
+    return unicodedata.normalize("NFKD", s).encode("ASCII", "ignore").decode("ASCII")
+
+
+class FastSentimentScorer:
+    def __init__(self, vocabulary, idf, coef, intercept, classes, vectorizer_params, model_params):
+        if vectorizer_params.get("analyzer", "word") != "word":
+            raise NotImplementedError("Only the 'word' analyzer is supported")
+
+        self.vocabulary = dict(vocabulary)
+        self.classes = [str(label) for label in classes]
+        self.n_features = len(self.vocabulary)
+
+        self.lowercase = vectorizer_params.get("lowercase", True)
+        self.strip_accents = {
+            None: None,
+            "unicode": _strip_accents_unicode,
+            "ascii": _strip_accents_ascii,
+        }[vectorizer_params.get("strip_accents")]
+        pattern = re.compile(vectorizer_params.get("token_pattern") or r"(?u)\b\w\w+\b")
+        if pattern.groups > 1:
+            raise ValueError("token_pattern should have at most one capturing group")
+        self.findall = pattern.findall
+        stop_words = vectorizer_params.get("stop_words")
+        if stop_words == "english":
+            from sklearn.feature_extraction.text import ENGLISH_STOP_WORDS
+            stop_words = ENGLISH_STOP_WORDS
+        self.stop_words = frozenset(stop_words) if stop_words else None
+        self.ngram_range = tuple(vectorizer_params.get("ngram_range", (1, 1)))
+        self.binary = vectorizer_params.get("binary", False)
+        self.sublinear_tf = vectorizer_params.get("sublinear_tf", False)
+        self.norm = vectorizer_params.get("norm", "l2")
+
+        use_idf = vectorizer_params.get("use_idf", True)
+        self.idf = np.asarray(idf, dtype=np.float64) if use_idf else np.ones(self.n_features)
+        self.max_idf = float(self.idf.max()) if self.n_features else 1.0
+        self.coef = np.ascontiguousarray(coef, dtype=np.float64)
+        self.coef_t = np.ascontiguousarray(self.coef.T)
+        self.intercept = np.asarray(intercept, dtype=np.float64)
+
+        multi_class = model_params.get("multi_class", "auto")
+        solver = model_params.get("solver", "lbfgs")
+        self.ovr = multi_class in ("ovr", "warn") or (
+            multi_class in ("auto", "deprecated") and (len(self.classes) <= 2 or solver == "liblinear")
+        )
+
+    @classmethod
+    def from_sklearn(cls, model, vectorizer):
+        return cls(
+            vectorizer.vocabulary_, vectorizer.idf_, model.coef_, model.intercept_, model.classes_,
+            vectorizer.get_params(), model.get_params()
+        )
+
+    @classmethod
+    def from_artifacts(cls, artifact_dir):
+        from model_registry import read_artifacts
+        metadata, vocabulary, arrays = read_artifacts(artifact_dir)
+        return cls(vocabulary, arrays["idf"], arrays["coef"], arrays["intercept"], metadata["classes"],
+                   metadata["vectorizer"], metadata["model"])
+
+    # Same token stream as TfidfVectorizer's word analyzer
+    def tokenize(self, text):
+        if self.lowercase:
+            text = text.lower()
+        if self.strip_accents is not None:
+            text = self.strip_accents(text)
+        tokens = self.findall(text)
+        if self.stop_words is not None:
+            tokens = [w for w in tokens if w not in self.stop_words]
+
+        min_n, max_n = self.ngram_range
+        if max_n != 1:
+            original_tokens = tokens
+            if min_n == 1:
+                tokens = list(original_tokens)
+                min_n += 1
+            else:
+                tokens = []
+            for n in range(min_n, min(max_n + 1, len(original_tokens) + 1)):
+                for i in range(len(original_tokens) - n + 1):
+                    tokens.append(" ".join(original_tokens[i:i + n]))
+        return tokens
+
+    # Sparse tf-idf row as (feature indices, weights)
+    def _features(self, text):
+        vocabulary = self.vocabulary
+        counts = Counter(vocabulary[t] for t in self.tokenize(text) if t in vocabulary)
+        if not counts:
+            return np.empty(0, dtype=np.intp), np.empty(0)
+        indices = np.fromiter(counts.keys(), dtype=np.intp, count=len(counts))
+        values = np.fromiter(counts.values(), dtype=np.float64, count=len(counts))
+        if self.binary:
+            values[:] = 1.0
+        if self.sublinear_tf:
+            values = np.log(values) + 1.0
+        values *= self.idf[indices]
+        if self.norm == "l2":
+            values /= np.sqrt(np.dot(values, values))
+        elif self.norm == "l1":
+            values /= np.abs(values).sum()
+        return indices, values
+
+    # Dense tf-idf matrix, one row per text
+    def transform(self, texts):
+        X = np.zeros((len(texts), self.n_features))
+        for row, text in enumerate(texts):
+            indices, values = self._features(text)
+            X[row, indices] = values
+        return X
+
+    def _proba(self, decision):
+        if self.ovr:
+            if decision.shape[1] == 1:
+                p = 1.0 / (1.0 + np.exp(-decision[:, 0]))
+                return np.column_stack([1.0 - p, p])
+            prob = 1.0 / (1.0 + np.exp(-decision))
+            return prob / prob.sum(axis=1, keepdims=True)
+        if decision.shape[1] == 1:
+            decision = np.column_stack([-decision[:, 0], decision[:, 0]])
+        decision = decision - decision.max(axis=1, keepdims=True)
+        exp = np.exp(decision)
+        return exp / exp.sum(axis=1, keepdims=True)
+
+    def predict_proba_features(self, X):
+        return self._proba(X @ self.coef_t + self.intercept)
+
+    def predict_proba(self, texts):
+        return self.predict_proba_features(self.transform(texts))
+
+    # Label for one message: gathers only the coefficient columns it touches
+    def predict_one(self, text):
+        indices, values = self._features(text)
+        decision = self.coef[:, indices] @ values + self.intercept
+        if decision.shape[0] == 1:
+            return self.classes[1] if decision[0] > 0 else self.classes[0]
+        return self.classes[int(decision.argmax())]
+
+    def predict(self, texts):
+        return [self.classes[i] for i in self.predict_proba(texts).argmax(axis=1)]
+
+    # Same result shape as backend.score_sentiment_batch
+    def score_batch(self, texts):
+        probabilities = self.predict_proba(texts)
+        results = []
+        for row in probabilities:
+            results.append({
+                "label": self.classes[int(row.argmax())],
+                "probabilities": {label: round(float(p), 4) for label, p in zip(self.classes, row)}
+            })
+        return results
@@ -0,0 +1,665 @@
+import json
+import os
+import sqlite3
+import threading
+import time
+
+from chat_archive import ARCHIVE_DIR, COLUMNS, read_chat
+
+# Chat history storage. Messages live in one indexed table with a monotonic
+# integer id, the owning user, and a numeric UTC timestamp. The database runs
+# in WAL mode and each thread gets its own connection, so Streamlit sessions
+# never share a cursor. Old chats can be moved out to Parquet archives (see
+# chat_archive.py); reads of a chat include its archived messages.
+
+DB_PATH = "chat_history.db"
+SCHEMA_VERSION = 6
+
+# Timestamps are stored as unix epoch seconds and shown in local time, in the
+# same "%Y-%m-%d %H:%M:%S" format the frontend has always used
+LOCAL_TIMESTAMP = "strftime('%Y-%m-%d %H:%M:%S', {column}, 'unixepoch', 'localtime')"
+
+# Longest snippet returned by search_messages, in tokens
+SNIPPET_TOKENS = 12
+
+
+# FTS5 query for free text typed into a search box: every word must appear
+# (quoted, so operators and punctuation are taken literally) and the last
+# one may be a prefix, so results show up while typing. None if there are
+# no words.
+def fts_query(text):
+    words = ["".join(char for char in word if char.isalnum() or char in "'-_") for word in text.split()]
+    words = [word.replace('"', '""') for word in words if any(char.isalnum() for char in word)]
+    if not words:
+        return None
+    terms = [f'"{word}"' for word in words]
+    terms[-1] += "*"
+    return " ".join(terms)
+
+
+# Sentiment labels counted in the mood rollups; any other label only adds to total
+MOOD_LABELS = ("positive", "neutral", "negative")
+
+
+# Mood in [-1, 1] for one message's class probabilities
+def mood_score(probabilities):
+    return float(probabilities.get("positive", 0.0)) - float(probabilities.get("negative", 0.0))
+
+
+# Trigger statement adding (sign 1) or removing (sign -1) one scored message
+# (row NEW or OLD) to its user's bucket in a mood rollup table
+def _mood_rollup(table, bucket_column, bucket, row, sign):
+    bucket = bucket.format(row=row)
+    counts = ", ".join(f"{sign} * ({row}.sentiment = '{label}')" for label in MOOD_LABELS)
+    updates = ", ".join(f"{label} = {table}.{label} + excluded.{label}" for label in MOOD_LABELS)
+    return f"""
+            INSERT INTO {table} (user_id, {bucket_column}, total, {", ".join(MOOD_LABELS)}, mood_sum)
+            VALUES ({row}.user_id, {bucket}, {sign}, {counts}, {sign} * COALESCE({row}.mood, 0))
+            ON CONFLICT (user_id, {bucket_column}) DO UPDATE SET
+                total = {table}.total + excluded.total, {updates},
+                mood_sum = {table}.mood_sum + excluded.mood_sum;"""
+
+
+# Local calendar day, and the Monday starting the local week, of a message
+_DAY = "date({row}.created_at, 'unixepoch', 'localtime')"
+_WEEK = "date({row}.created_at, 'unixepoch', 'localtime', 'weekday 0', '-6 days')"
+
+
+def _mood_rollups(row, sign):
+    return _mood_rollup("mood_daily", "day", _DAY, row, sign) + _mood_rollup("mood_weekly", "week", _WEEK, row, sign)
+
+
+_MIGRATIONS = {
+    1: [
+        """CREATE TABLE IF NOT EXISTS messages (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            user_id TEXT NOT NULL DEFAULT '',
+            chat_id TEXT NOT NULL,
+            role TEXT NOT NULL,
+            message TEXT NOT NULL,
+            created_at REAL NOT NULL
+        )""",
+        "CREATE INDEX IF NOT EXISTS idx_messages_chat ON messages (chat_id, id)",
+        "CREATE INDEX IF NOT EXISTS idx_messages_user_chat ON messages (user_id, chat_id, id)",
+    ],
+    # Materialized per-chat summary for the sidebar, maintained by a trigger
+    # so every write path keeps it current. The title is the first user
+    # message (NULL until there is one).
+    2: [
+        """CREATE TABLE IF NOT EXISTS chat_sessions (
+            chat_id TEXT PRIMARY KEY,
+            user_id TEXT NOT NULL DEFAULT '',
+            title TEXT,
+            first_at REAL NOT NULL,
+            last_at REAL NOT NULL,
+            message_count INTEGER NOT NULL DEFAULT 0
+        )""",
+        "CREATE INDEX IF NOT EXISTS idx_chat_sessions_user ON chat_sessions (user_id, first_at, chat_id)",
+        """INSERT OR REPLACE INTO chat_sessions (chat_id, user_id, title, first_at, last_at, message_count)
+        SELECT chats.chat_id, chats.user_id,
+               (SELECT substr(message, 1, 30) FROM messages
+                WHERE chat_id = chats.chat_id AND role = 'user' ORDER BY id LIMIT 1),
+               chats.first_at, chats.last_at, chats.message_count
+        FROM (
+            SELECT chat_id, MAX(user_id) AS user_id, MIN(created_at) AS first_at,
+                   MAX(created_at) AS last_at, COUNT(*) AS message_count
+            FROM messages
+            GROUP BY chat_id
+        ) AS chats""",
+        """CREATE TRIGGER IF NOT EXISTS trg_messages_session AFTER INSERT ON messages
+        BEGIN
+            INSERT INTO chat_sessions (chat_id, user_id, title, first_at, last_at, message_count)
+            VALUES (NEW.chat_id, NEW.user_id,
+                    CASE WHEN NEW.role = 'user' THEN substr(NEW.message, 1, 30) END,
+                    NEW.created_at, NEW.created_at, 1)
+            ON CONFLICT (chat_id) DO UPDATE SET
+                title = COALESCE(chat_sessions.title, excluded.title),
+                first_at = MIN(chat_sessions.first_at, excluded.first_at),
+                last_at = MAX(chat_sessions.last_at, excluded.last_at),
+                message_count = chat_sessions.message_count + 1;
+        END""",
+    ],
+    # Rolling summary of the turns that have slid out of a chat's prompt
+    # context window (see context_window.py); through_id is the last message
+    # the summary covers
+    3: [
+        """CREATE TABLE IF NOT EXISTS chat_summaries (
+            chat_id TEXT PRIMARY KEY,
+            through_id INTEGER NOT NULL,
+            summary TEXT NOT NULL,
+            updated_at REAL NOT NULL
+        )""",
+    ],
+    # Full-text index over message text (porter-stemmed), kept in sync by
+    # triggers. It reads message text back from the messages table through a
+    # view, which also supplies user_key: the owner's id as one hex token, so
+    # a search can be narrowed to one user inside the index itself.
+    4: [
+        """CREATE VIEW IF NOT EXISTS messages_fts_source AS
+        SELECT id, message, 'u' || hex(user_id) AS user_key FROM messages""",
+        """CREATE VIRTUAL TABLE IF NOT EXISTS messages_fts USING fts5(
+            message, user_key,
+            content = 'messages_fts_source', content_rowid = 'id',
+            tokenize = 'porter unicode61 remove_diacritics 2'
+        )""",
+        """CREATE TRIGGER IF NOT EXISTS trg_messages_fts_insert AFTER INSERT ON messages
+        BEGIN
+            INSERT INTO messages_fts (rowid, message, user_key)
+            VALUES (NEW.id, NEW.message, 'u' || hex(NEW.user_id));
+        END""",
+        """CREATE TRIGGER IF NOT EXISTS trg_messages_fts_delete AFTER DELETE ON messages
+        BEGIN
+            INSERT INTO messages_fts (messages_fts, rowid, message, user_key)
+            VALUES ('delete', OLD.id, OLD.message, 'u' || hex(OLD.user_id));
+        END""",
+        """CREATE TRIGGER IF NOT EXISTS trg_messages_fts_update AFTER UPDATE OF message, user_id ON messages
+        BEGIN
+            INSERT INTO messages_fts (messages_fts, rowid, message, user_key)
+            VALUES ('delete', OLD.id, OLD.message, 'u' || hex(OLD.user_id));
+            INSERT INTO messages_fts (rowid, message, user_key)
+            VALUES (NEW.id, NEW.message, 'u' || hex(NEW.user_id));
+        END""",
+        "INSERT INTO messages_fts (messages_fts) VALUES ('rebuild')",
+    ],
+    # Sentiment of each user message (label, class probabilities as JSON and
+    # the mood score), plus per-user daily and weekly rollups maintained by
+    # triggers as messages are scored, so the mood dashboard never rescans
+    # messages. Rollups keep counting messages removed from this table.
+    5: [
+        "ALTER TABLE messages ADD COLUMN sentiment TEXT",
+        "ALTER TABLE messages ADD COLUMN sentiment_scores TEXT",
+        "ALTER TABLE messages ADD COLUMN mood REAL",
+        *(f"""CREATE TABLE IF NOT EXISTS {table} (
+            user_id TEXT NOT NULL,
+            {bucket} TEXT NOT NULL,
+            total INTEGER NOT NULL DEFAULT 0,
+            positive INTEGER NOT NULL DEFAULT 0,
+            neutral INTEGER NOT NULL DEFAULT 0,
+            negative INTEGER NOT NULL DEFAULT 0,
+            mood_sum REAL NOT NULL DEFAULT 0,
+            PRIMARY KEY (user_id, {bucket})
+        ) WITHOUT ROWID""" for table, bucket in (("mood_daily", "day"), ("mood_weekly", "week"))),
+        f"""CREATE TRIGGER IF NOT EXISTS trg_messages_mood_insert AFTER INSERT ON messages
+        WHEN NEW.sentiment IS NOT NULL
+        BEGIN{_mood_rollups("NEW", 1)}
+        END""",
+        f"""CREATE TRIGGER IF NOT EXISTS trg_messages_mood_unscore AFTER UPDATE OF sentiment, mood ON messages
+        WHEN OLD.sentiment IS NOT NULL
+        BEGIN{_mood_rollups("OLD", -1)}
+        END""",
+        f"""CREATE TRIGGER IF NOT EXISTS trg_messages_mood_rescore AFTER UPDATE OF sentiment, mood ON messages
+        WHEN NEW.sentiment IS NOT NULL
+        BEGIN{_mood_rollups("NEW", 1)}
+        END""",
+    ],
+    # Archive files holding a chat's older messages (path relative to the
+    # archive directory), up to and including message through_id. A chat
+    # continued after archiving can be archived again into another file.
+    6: [
+        """CREATE TABLE IF NOT EXISTS archived_chats (
+            chat_id TEXT NOT NULL,
+            path TEXT NOT NULL,
+            user_id TEXT NOT NULL,
+            month TEXT NOT NULL,
+            through_id INTEGER NOT NULL,
+            archived_at REAL NOT NULL,
+            PRIMARY KEY (chat_id, path)
+        ) WITHOUT ROWID""",
+        "CREATE INDEX IF NOT EXISTS idx_archived_chats_user ON archived_chats (user_id, month, path)",
+    ],
+}
+
+
+def _table_exists(conn, name):
+    row = conn.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = ?", (name,)).fetchone()
+    return row is not None
+
+
+# Owner of the rows copied from the legacy table, which recorded no user.
+# User-facing reads never query this id; an operator assigns the chats to
+# their users with claim_legacy_chats (python history_store.py --help).
+LEGACY_USER = ""
+
+
+# Copy rows from the original unindexed `conversations` table, which had no
+# user column and stored local-time text timestamps, then keep it around as
+# conversations_legacy so nothing writes to it by accident
+def _migrate_legacy_conversations(conn):
+    if not _table_exists(conn, "conversations"):
+        return 0
+    columns = [row[1] for row in conn.execute("PRAGMA table_info(conversations)")]
+    timestamp = "COALESCE(CAST(strftime('%s', timestamp, 'utc') AS REAL), 0)" if "timestamp" in columns else "0"
+    cursor = conn.execute(f"""
+        INSERT INTO messages (user_id, chat_id, role, message, created_at)
+        SELECT '', COALESCE(chat_id, ''), COALESCE(role, ''), COALESCE(message, ''), {timestamp}
+        FROM conversations
+        ORDER BY rowid
+    """)
+    conn.execute("ALTER TABLE conversations RENAME TO conversations_legacy")
+    return cursor.rowcount
+
+
+def migrate(conn):
+    version = conn.execute("PRAGMA user_version").fetchone()[0]
+    if version >= SCHEMA_VERSION:
+        return version
+
+    # DDL does not open an implicit transaction, so begin one explicitly to
+    # make each upgrade all-or-nothing
+    conn.execute("BEGIN IMMEDIATE")
+    try:
+        # Re-check under the write lock in case another process migrated first
+        version = conn.execute("PRAGMA user_version").fetchone()[0]
+        for target in range(version + 1, SCHEMA_VERSION + 1):
+            for statement in _MIGRATIONS[target]:
+                conn.execute(statement)
+            if target == 1:
+                migrated = _migrate_legacy_conversations(conn)
+                if migrated:
+                    print(f"✅ Migrated {migrated} messages from the legacy conversations table")
+        conn.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    return SCHEMA_VERSION
+
+
+# Unix epoch seconds as a local "%Y-%m-%d %H:%M:%S" timestamp, like LOCAL_TIMESTAMP
+def local_timestamp(created_at):
+    return time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(created_at))
+
+
+class HistoryStore:
+    def __init__(self, path=DB_PATH, archive_dir=ARCHIVE_DIR):
+        self.path = path
+        self.archive_dir = archive_dir
+        self._local = threading.local()
+        self._migrate_lock = threading.Lock()
+        self._migrated = False
+        self._connection()
+        # A forked worker must not use the parent's connections; drop them
+        # (without closing, which would disturb the parent) and reconnect lazily
+        if hasattr(os, "register_at_fork"):
+            os.register_at_fork(after_in_child=self._reset_after_fork)
+
+    def _reset_after_fork(self):
+        self._local = threading.local()
+        self._migrate_lock = threading.Lock()
+
+    def _connect(self):
+        conn = sqlite3.connect(self.path, timeout=30)
+        conn.execute("PRAGMA journal_mode = WAL")
+        conn.execute("PRAGMA synchronous = NORMAL")
+        conn.execute("PRAGMA busy_timeout = 30000")
+        return conn
+
+    # One connection per thread; created lazily and reused for the thread's lifetime
+    def _connection(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = self._connect()
+            with self._migrate_lock:
+                if not self._migrated:
+                    migrate(conn)
+                    self._migrated = True
+            self._local.conn = conn
+        return conn
+
+    def close(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is not None:
+            conn.close()
+            self._local.conn = None
+
+    def save_message(self, user_id, chat_id, role, message, created_at=None):
+        conn = self._connection()
+        with conn:
+            cursor = conn.execute(
+                "INSERT INTO messages (user_id, chat_id, role, message, created_at) VALUES (?, ?, ?, ?, ?)",
+                (user_id or "", chat_id, role, message, time.time() if created_at is None else created_at)
+            )
+        return cursor.lastrowid
+
+    # Insert many (user_id, chat_id, role, message[, created_at]) rows in one
+    # transaction; returns their ids. The transaction holds the write lock, so
+    # AUTOINCREMENT gives the rows consecutive ids ending at last_insert_rowid.
+    def save_messages(self, rows):
+        now = time.time()
+        params = [
+            (row[0] or "", row[1], row[2], row[3], row[4] if len(row) > 4 and row[4] is not None else now)
+            for row in rows
+        ]
+        conn = self._connection()
+        with conn:
+            conn.executemany(
+                "INSERT INTO messages (user_id, chat_id, role, message, created_at) VALUES (?, ?, ?, ?, ?)",
+                params
+            )
+            last_id = conn.execute("SELECT last_insert_rowid()").fetchone()[0]
+        return list(range(last_id - len(params) + 1, last_id + 1)) if params else []
+
+    # [(role, message, timestamp)] for one chat, oldest first
+    def load_chat_history(self, chat_id):
+        rows = self._connection().execute(f"""
+            SELECT role, message, {LOCAL_TIMESTAMP.format(column="created_at")}
+            FROM messages
+            WHERE chat_id = ?
+            ORDER BY id
+        """, (chat_id,)).fetchall()
+        archived = self._load_archived(chat_id)
+        if archived:
+            rows = [(role, message, local_timestamp(created_at)) for _, role, message, created_at in archived] + rows
+        return rows
+
+    # Keyset-paginated page of a chat as [(id, role, message, created_at)],
+    # oldest first: the last `limit` messages before `before_id`, or every
+    # message after `after_id` (used to append new turns incrementally)
+    def load_messages(self, chat_id, limit=50, before_id=None, after_id=None):
+        conn = self._connection()
+        if after_id is not None:
+            rows = conn.execute(
+                "SELECT id, role, message, created_at FROM messages WHERE chat_id = ? AND id > ? ORDER BY id",
+                (chat_id, after_id)
+            ).fetchall()
+            return self._load_archived(chat_id, after_id) + rows
+        if before_id is not None:
+            rows = conn.execute(
+                "SELECT id, role, message, created_at FROM messages WHERE chat_id = ? AND id < ? ORDER BY id DESC LIMIT ?",
+                (chat_id, before_id, limit)
+            ).fetchall()
+        else:
+            rows = conn.execute(
+                "SELECT id, role, message, created_at FROM messages WHERE chat_id = ? ORDER BY id DESC LIMIT ?",
+                (chat_id, limit)
+            ).fetchall()
+        rows.reverse()
+        # Archived messages are all older than the chat's live ones, so they
+        # are only needed when the live rows don't fill the page
+        if len(rows) < limit:
+            archived = self._load_archived(chat_id)
+            if before_id is not None:
+                archived = [row for row in archived if row[0] < before_id]
+            rows = archived[max(0, len(archived) - (limit - len(rows))):] + rows
+        return rows
+
+    # [(id, role, message, created_at)] archived for a chat after message
+    # after_id, oldest first; only files that can hold such messages are read
+    def _load_archived(self, chat_id, after_id=0):
+        paths = [path for path, in self._connection().execute(
+            "SELECT path FROM archived_chats WHERE chat_id = ? AND through_id > ? ORDER BY through_id",
+            (chat_id, after_id)
+        )]
+        if not paths:
+            return []
+        return [row for row in read_chat(self.archive_dir, paths, chat_id) if row[0] > after_id]
+
+    # (through_id, summary) for a chat's context summary, or None
+    def get_chat_summary(self, chat_id):
+        return self._connection().execute(
+            "SELECT through_id, summary FROM chat_summaries WHERE chat_id = ?", (chat_id,)
+        ).fetchone()
+
+    def set_chat_summary(self, chat_id, through_id, summary):
+        conn = self._connection()
+        with conn:
+            conn.execute("""
+                INSERT INTO chat_summaries (chat_id, through_id, summary, updated_at) VALUES (?, ?, ?, ?)
+                ON CONFLICT (chat_id) DO UPDATE SET
+                    through_id = excluded.through_id, summary = excluded.summary, updated_at = excluded.updated_at
+                WHERE excluded.through_id > chat_summaries.through_id
+            """, (chat_id, through_id, summary, time.time()))
+
+    # A user's messages matching free-text `query`, best match first, as
+    # [{"id", "chat_id", "role", "title", "snippet", "created_at", "timestamp"}].
+    # Matched terms in the snippet are wrapped in `highlight` (start, end).
+    def search_messages(self, user_id, query, limit=20, highlight=("<mark>", "</mark>")):
+        # Never for LEGACY_USER (unclaimed legacy rows)
+        match = fts_query(query)
+        if match is None or not user_id:
+            return []
+        # user_key narrows the search inside the index; the user_id check on
+        # messages keeps it exact
+        user_key = "u" + user_id.encode("utf-8").hex().upper()
+        rows = self._connection().execute(f"""
+            SELECT m.id, m.chat_id, m.role, COALESCE(s.title, 'New Chat'),
+                   snippet(messages_fts, 0, ?, ?, '…', {SNIPPET_TOKENS}),
+                   m.created_at, {LOCAL_TIMESTAMP.format(column="m.created_at")}
+            FROM messages_fts
+            JOIN messages AS m ON m.id = messages_fts.rowid
+            LEFT JOIN chat_sessions AS s ON s.chat_id = m.chat_id
+            WHERE messages_fts MATCH ? AND m.user_id = ?
+            ORDER BY bm25(messages_fts, 1.0, 0.0), m.id DESC
+            LIMIT ?
+        """, (highlight[0], highlight[1], f"user_key:{user_key} AND message:({match})", user_id, limit)).fetchall()
+        return [
+            {"id": id_, "chat_id": chat_id, "role": role, "title": title, "snippet": snippet,
+             "created_at": created_at, "timestamp": timestamp}
+            for id_, chat_id, role, title, snippet, created_at, timestamp in rows
+        ]
+
+    # Attach the backend's sentiment result ({"label", "probabilities"}) to a
+    # message by id (as returned by save_message)
+    def set_sentiment(self, message_id, sentiment):
+        return self.set_sentiments([(message_id, sentiment["label"], sentiment.get("probabilities") or {})])
+
+    # Store sentiment for many messages in one transaction: [(id, label, probabilities)]
+    def set_sentiments(self, rows):
+        conn = self._connection()
+        with conn:
+            conn.executemany(
+                "UPDATE messages SET sentiment = ?, sentiment_scores = ?, mood = ? WHERE id = ?",
+                [(label, json.dumps(probabilities), mood_score(probabilities), id_) for id_, label, probabilities in rows]
+            )
+        return len(rows)
+
+    # Next page of user messages that have no sentiment yet, as [(id, message)]
+    def unscored_messages(self, after_id=0, limit=1000):
+        return self._connection().execute(
+            "SELECT id, message FROM messages WHERE id > ? AND role = 'user' AND sentiment IS NULL ORDER BY id LIMIT ?",
+            (after_id, limit)
+        ).fetchall()
+
+    # A user's mood rollups by "day" or "week" (bucket start dates, local
+    # time), oldest first, optionally from `since` ("YYYY-MM-DD") on, as
+    # [{"period", "total", "positive", "neutral", "negative", "mood"}] where
+    # mood is the average mood score of the bucket
+    def get_mood_rollups(self, user_id, period="day", since=None):
+        table, column = {"day": ("mood_daily", "day"), "week": ("mood_weekly", "week")}[period]
+        if not user_id:
+            return []
+        rows = self._connection().execute(f"""
+            SELECT {column}, total, positive, neutral, negative, mood_sum
+            FROM {table}
+            WHERE user_id = ? AND {column} >= ? AND total > 0
+            ORDER BY {column}
+        """, (user_id, since or "")).fetchall()
+        return [
+            {"period": bucket, "total": total, "positive": positive, "neutral": neutral, "negative": negative,
+             "mood": mood_sum / total}
+            for bucket, total, positive, neutral, negative, mood_sum in rows
+        ]
+
+    # [(chat_id, user_id, first_at)] of chats with live messages and none
+    # newer than `before`, by user and start time
+    def get_archivable_chats(self, before, limit=None):
+        return self._connection().execute("""
+            SELECT chat_id, user_id, first_at FROM chat_sessions AS s
+            WHERE last_at < ? AND EXISTS (SELECT 1 FROM messages WHERE chat_id = s.chat_id)
+            ORDER BY user_id, first_at, chat_id
+            LIMIT ?
+        """, (before, -1 if limit is None else limit)).fetchall()
+
+    # Live messages of some chats as tuples in chat_archive.COLUMNS order
+    def load_archive_rows(self, chat_ids):
+        conn = self._connection()
+        rows = []
+        for start in range(0, len(chat_ids), 500):
+            chunk = chat_ids[start:start + 500]
+            rows += conn.execute(f"""
+                SELECT {", ".join(COLUMNS)} FROM messages
+                WHERE chat_id IN ({", ".join("?" * len(chunk))})
+                ORDER BY chat_id, id
+            """, chunk).fetchall()
+        return rows
+
+    # Record that archive file `path` holds each [(chat_id, through_id)]
+    # chat's messages up to through_id, and delete those messages, in one
+    # transaction. Rows written to a chat since it was read are kept.
+    def record_archive(self, path, user_id, month, chats):
+        now = time.time()
+        conn = self._connection()
+        with conn:
+            conn.executemany(
+                "INSERT OR REPLACE INTO archived_chats (chat_id, path, user_id, month, through_id, archived_at) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                [(chat_id, path, user_id or "", month, through_id, now) for chat_id, through_id in chats]
+            )
+            conn.executemany("DELETE FROM messages WHERE chat_id = ? AND id <= ?", chats)
+
+    # A user's archive files, oldest month first
+    def get_archive_files(self, user_id):
+        if not user_id:
+            return []
+        return [path for path, in self._connection().execute(
+            "SELECT DISTINCT path FROM archived_chats WHERE user_id = ? ORDER BY month, path", (user_id,)
+        )]
+
+    # Next page of a user's live messages, by chat and id, after the
+    # (chat_id, id) key of the last row of the previous page; tuples in
+    # chat_archive.COLUMNS order
+    def load_user_messages(self, user_id, after=None, limit=1000):
+        if not user_id:
+            return []
+        after = after or ("", 0)
+        return self._connection().execute(f"""
+            SELECT {", ".join(COLUMNS)} FROM messages
+            WHERE user_id = ? AND (chat_id, id) > (?, ?)
+            ORDER BY chat_id, id
+            LIMIT ?
+        """, (user_id, after[0], after[1], limit)).fetchall()
+
+    # Give back the space of deleted rows: merge the full-text index (which
+    # keeps deletions as tombstones until then), rewrite the database file
+    # and empty the WAL it was rewritten through
+    def vacuum(self):
+        conn = self._connection()
+        with conn:
+            conn.execute("INSERT INTO messages_fts (messages_fts) VALUES ('optimize')")
+        conn.execute("VACUUM")
+        conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+
+    # Unclaimed legacy chats as [(chat_id, title, first_timestamp, message_count)]
+    def get_legacy_chats(self):
+        return self._connection().execute(f"""
+            SELECT chat_id, COALESCE(title, 'New Chat'), {LOCAL_TIMESTAMP.format(column="first_at")}, message_count
+            FROM chat_sessions
+            WHERE user_id = ?
+            ORDER BY first_at
+        """, (LEGACY_USER,)).fetchall()
+
+    # Give unclaimed legacy chats to their users: {chat_id: user_id}. Setting
+    # sentiment to itself moves scored messages between users' mood rollups
+    # (through the rescore triggers); the full-text trigger re-keys them.
+    def claim_legacy_chats(self, owners):
+        owners = [(user_id, chat_id) for chat_id, user_id in owners.items() if user_id]
+        conn = self._connection()
+        with conn:
+            conn.executemany(
+                "UPDATE messages SET user_id = ?, sentiment = sentiment WHERE chat_id = ? AND user_id = ''", owners
+            )
+            cursor = conn.executemany(
+                "UPDATE chat_sessions SET user_id = ? WHERE chat_id = ? AND user_id = ''", owners
+            )
+        return cursor.rowcount
+
+    # First user message of a chat, truncated for display
+    def get_chat_title(self, chat_id):
+        row = self._connection().execute(
+            "SELECT title FROM chat_sessions WHERE chat_id = ?", (chat_id,)
+        ).fetchone()
+        return row[0] if row and row[0] else "New Chat"
+
+    # One page of a user's chats, newest first, from the materialized
+    # chat_sessions table. Returns (sessions, cursor); pass the cursor back as
+    # `before` to get the next page (None when there are no more).
+    def get_sidebar_summary(self, user_id, limit=50, before=None):
+        if not user_id:
+            return [], None
+        params = [user_id]
+        keyset = ""
+        if before is not None:
+            keyset = "AND (first_at < ? OR (first_at = ? AND chat_id < ?))"
+            params += [before[0], before[0], before[1]]
+        rows = self._connection().execute(f"""
+            SELECT chat_id, COALESCE(title, 'New Chat'), first_at,
+                   {LOCAL_TIMESTAMP.format(column="first_at")}, message_count
+            FROM chat_sessions
+            WHERE user_id = ? {keyset}
+            ORDER BY first_at DESC, chat_id DESC
+            LIMIT ?
+        """, params + [limit + 1]).fetchall()
+
+        sessions = [
+            {"chat_id": chat_id, "title": title, "first_timestamp": first_timestamp, "message_count": count}
+            for chat_id, title, _, first_timestamp, count in rows[:limit]
+        ]
+        cursor = (rows[limit - 1][2], rows[limit - 1][0]) if len(rows) > limit else None
+        return sessions, cursor
+
+    # [(chat_id, first_timestamp)] for a user's chats, newest first
+    def get_chat_sessions(self, user_id):
+        if not user_id:
+            return []
+        return self._connection().execute(f"""
+            SELECT chat_id, {LOCAL_TIMESTAMP.format(column="first_at")}
+            FROM chat_sessions
+            WHERE user_id = ?
+            ORDER BY first_at DESC, chat_id DESC
+        """, (user_id,)).fetchall()
+
+    # {date: [(chat_id, first_timestamp)]} for the sidebar
+    def get_chat_history_grouped_by_day(self, user_id):
+        grouped_sessions = {}
+        for chat_id, first_message_time in self.get_chat_sessions(user_id):
+            date = first_message_time.split(" ")[0]
+            grouped_sessions.setdefault(date, []).append((chat_id, first_message_time))
+        return grouped_sessions
+
+
+_stores = {}
+_stores_lock = threading.Lock()
+
+
+# Shared store per database path (Streamlit reruns re-execute the page but
+# imported modules, and so these stores, persist)
+def get_history_store(path=DB_PATH):
+    with _stores_lock:
+        store = _stores.get(path)
+        if store is None:
+            store = HistoryStore(path)
+            _stores[path] = store
+        return store
+
+
+# Assign legacy chats (saved before messages had an owner) to their users:
+#   python history_store.py --list-legacy
+#   python history_store.py --claim owners.json    # {"<chat_id>": "<username>", ...}
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="List or claim chats migrated from the legacy table.")
+    parser.add_argument("--db", default=DB_PATH)
+    parser.add_argument("--list-legacy", action="store_true")
+    parser.add_argument("--claim", metavar="OWNERS_JSON")
+    args = parser.parse_args()
+
+    store = HistoryStore(args.db)
+    if args.list_legacy:
+        for chat_id, title, first_timestamp, count in store.get_legacy_chats():
+            print(f"{chat_id}\t{first_timestamp}\t{count}\t{title}")
+    if args.claim:
+        with open(args.claim, encoding="utf-8") as file:
+            claimed = store.claim_legacy_chats(json.load(file))
+        print(f"✅ Claimed {claimed} legacy chats")
+    store.close()
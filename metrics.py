@@ -0,0 +1,408 @@
+import glob
+import json
+import logging
+import os
+import sys
+import threading
+import time
+from contextlib import contextmanager
+
+# Request timing and a Prometheus text-format registry, without a client
+# library. Each /chat request carries a RequestTimer; stages record spans on
+# it (several spans of one stage add up) and observe_request() turns them into
+# histogram samples tagged with the sentiment label and outcome.
+# SlowRequestProfiler samples the stack of threads serving a request and
+# appends collapsed stacks ("frame;frame;frame count", the input format of
+# flamegraph.pl and speedscope) for requests slower than a threshold.
+#
+# Values live in process memory. Under serve.py's pre-forked workers each
+# worker also writes a snapshot to a shared directory (enable_multiprocess),
+# and /metrics in any worker merges them: histograms and counters are summed
+# over all workers, including ones that have exited, while collector gauges
+# are reported per live worker with a "worker" label. Other workers' values
+# can be up to METRICS_FLUSH_INTERVAL seconds old.
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+METRICS_FLUSH_INTERVAL = float(os.getenv("METRICS_FLUSH_INTERVAL", "5"))
+
+logger = logging.getLogger(__name__)
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(names, values, extra=()):
+    pairs = [f'{name}="{_escape(value)}"' for name, value in list(zip(names, values)) + list(extra)]
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _format_value(value):
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Histogram:
+    def __init__(self, name, help_text, label_names=(), buckets=DEFAULT_BUCKETS):
+        self.name = name
+        self.help_text = help_text
+        self.label_names = tuple(label_names)
+        self.buckets = tuple(sorted(buckets))
+        self._series = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value, **labels):
+        key = tuple(str(labels.get(name, "")) for name in self.label_names)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = self._series[key] = {"counts": [0] * len(self.buckets), "sum": 0.0, "count": 0}
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    series["counts"][i] += 1
+            series["sum"] += value
+            series["count"] += 1
+
+    # {label values: (bucket counts, sum, count)}
+    def snapshot(self):
+        with self._lock:
+            return {key: (list(s["counts"]), s["sum"], s["count"]) for key, s in self._series.items()}
+
+    # Sum of snapshots from several processes
+    @staticmethod
+    def merge(snapshots):
+        merged = {}
+        for snapshot in snapshots:
+            for key, (counts, total, count) in snapshot.items():
+                if key not in merged:
+                    merged[key] = (list(counts), total, count)
+                else:
+                    old_counts, old_total, old_count = merged[key]
+                    merged[key] = ([a + b for a, b in zip(old_counts, counts)], old_total + total, old_count + count)
+        return merged
+
+    def render(self, series=None):
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} histogram"]
+        if series is None:
+            series = self.snapshot()
+        for key, (counts, total, count) in sorted(series.items()):
+            for bound, bucket_count in zip(self.buckets, counts):
+                labels = _format_labels(self.label_names, key, [("le", repr(float(bound)))])
+                lines.append(f"{self.name}_bucket{labels} {bucket_count}")
+            labels = _format_labels(self.label_names, key, [("le", "+Inf")])
+            lines.append(f"{self.name}_bucket{labels} {count}")
+            labels = _format_labels(self.label_names, key)
+            lines.append(f"{self.name}_sum{labels} {repr(total)}")
+            lines.append(f"{self.name}_count{labels} {count}")
+        return lines
+
+
+class CounterMetric:
+    def __init__(self, name, help_text, label_names=()):
+        self.name = name
+        self.help_text = help_text
+        self.label_names = tuple(label_names)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def inc(self, amount=1, **labels):
+        key = tuple(str(labels.get(name, "")) for name in self.label_names)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    # {label values: value}
+    def snapshot(self):
+        with self._lock:
+            return dict(self._values)
+
+    @staticmethod
+    def merge(snapshots):
+        merged = {}
+        for snapshot in snapshots:
+            for key, value in snapshot.items():
+                merged[key] = merged.get(key, 0) + value
+        return merged
+
+    def render(self, values=None):
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} counter"]
+        if values is None:
+            values = self.snapshot()
+        for key, value in sorted(values.items()):
+            lines.append(f"{self.name}{_format_labels(self.label_names, key)} {_format_value(value)}")
+        return lines
+
+
+class MetricsRegistry:
+    def __init__(self):
+        self._metrics = []
+        self._collectors = []
+        self._directory = None
+        self._flusher = None
+
+    def histogram(self, name, help_text, label_names=(), buckets=DEFAULT_BUCKETS):
+        metric = Histogram(name, help_text, label_names, buckets)
+        self._metrics.append(metric)
+        return metric
+
+    def counter(self, name, help_text, label_names=()):
+        metric = CounterMetric(name, help_text, label_names)
+        self._metrics.append(metric)
+        return metric
+
+    # Values read at scrape time: func() returns a dict of numbers, each
+    # exported as the gauge "<prefix>_<key>" (non-numeric values are skipped)
+    def add_collector(self, prefix, func, help_text=""):
+        self._collectors.append((prefix, func, help_text))
+
+    # {gauge name: (help text, value)} from the collectors
+    def _gauges(self):
+        gauges = {}
+        for prefix, func, help_text in self._collectors:
+            try:
+                values = func()
+            except Exception as e:
+                logger.error("Metrics collector %s failed: %s", prefix, e)
+                continue
+            for key, value in values.items():
+                if isinstance(value, bool) or not isinstance(value, (int, float)):
+                    continue
+                gauges[f"{prefix}_{key}"] = (help_text, value)
+        return gauges
+
+    # Share this process's metrics with the other workers through `directory`
+    # (one JSON file per process, rewritten every `interval` seconds and on
+    # each scrape); call in each worker after fork
+    def enable_multiprocess(self, directory, interval=METRICS_FLUSH_INTERVAL):
+        os.makedirs(directory, exist_ok=True)
+        self._directory = directory
+        self._interval = interval
+        self.flush()
+        if self._flusher is None or not self._flusher.is_alive():
+            self._flusher = threading.Thread(target=self._flush_loop, name="metrics-flusher", daemon=True)
+            self._flusher.start()
+
+    def _flush_loop(self):
+        while True:
+            time.sleep(self._interval)
+            self.flush()
+
+    # Write this process's snapshot (written under a temporary name and
+    # renamed, so readers never see half a file)
+    def flush(self):
+        if self._directory is None:
+            return
+        pid = os.getpid()
+        data = {
+            "pid": pid,
+            "metrics": {metric.name: [[list(key), value] for key, value in metric.snapshot().items()]
+                        for metric in self._metrics},
+            "gauges": self._gauges(),
+        }
+        path = os.path.join(self._directory, f"{pid}.json")
+        try:
+            with open(path + ".tmp", "w") as file:
+                json.dump(data, file)
+            os.replace(path + ".tmp", path)
+        except OSError as e:
+            logger.error("Failed to write metrics to %s: %s", path, e)
+
+    # Snapshots of every process; gauges only from processes that flushed
+    # recently (an exited worker's counts stay, its gauges go)
+    def _read_all(self):
+        snapshots, live_gauges = [], []
+        stale_after = time.time() - 3 * self._interval
+        for path in glob.glob(os.path.join(self._directory, "*.json")):
+            try:
+                with open(path) as file:
+                    data = json.load(file)
+                modified = os.path.getmtime(path)
+            except (OSError, ValueError) as e:
+                logger.warning("Skipping metrics file %s: %s", path, e)
+                continue
+            snapshots.append({name: {tuple(key): value for key, value in series}
+                              for name, series in data["metrics"].items()})
+            if modified >= stale_after or data["pid"] == os.getpid():
+                live_gauges.append((data["pid"], data["gauges"]))
+        return snapshots, live_gauges
+
+    def render(self):
+        lines = []
+        if self._directory is None:
+            for metric in self._metrics:
+                lines.extend(metric.render())
+            gauges = [(None, self._gauges())]
+        else:
+            self.flush()
+            snapshots, gauges = self._read_all()
+            for metric in self._metrics:
+                merged = metric.merge(snapshot.get(metric.name, {}) for snapshot in snapshots)
+                lines.extend(metric.render(merged))
+
+        by_name = {}
+        for pid, values in gauges:
+            for name, (help_text, value) in values.items():
+                by_name.setdefault(name, (help_text, []))[1].append((pid, value))
+        for name, (help_text, values) in by_name.items():
+            if help_text:
+                lines.append(f"# HELP {name} {help_text}")
+            lines.append(f"# TYPE {name} gauge")
+            for pid, value in sorted(values, key=lambda item: item[0] or 0):
+                labels = _format_labels(("worker",), (pid,)) if pid is not None else ""
+                lines.append(f"{name}{labels} {_format_value(value)}")
+        return "\n".join(lines) + "\n"
+
+
+registry = MetricsRegistry()
+
+STAGE_SECONDS = registry.histogram(
+    "chat_stage_seconds", "Time spent in each stage of a chat request",
+    ("endpoint", "stage", "sentiment", "outcome")
+)
+REQUEST_SECONDS = registry.histogram(
+    "chat_request_seconds", "End-to-end chat request latency",
+    ("endpoint", "sentiment", "outcome")
+)
+REQUESTS_TOTAL = registry.counter(
+    "chat_requests_total", "Chat requests by outcome",
+    ("endpoint", "sentiment", "outcome")
+)
+ERRORS_TOTAL = registry.counter(
+    "chat_errors_total", "Errors the backend logged and recovered from, by where they happened",
+    ("where",)
+)
+
+
+class RequestTimer:
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.spans = {}
+        self.sentiment = "unknown"
+        self.outcome = "ok"
+
+    def add(self, stage, seconds):
+        self.spans[stage] = self.spans.get(stage, 0.0) + seconds
+
+    @contextmanager
+    def span(self, stage):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add(stage, time.perf_counter() - start)
+
+    # func with each call recorded as a `stage` span (for callables handed to
+    # other threads, e.g. the Gemini and YouTube calls in gather_response)
+    def wrap(self, stage, func):
+        def timed(*args, **kwargs):
+            with self.span(stage):
+                return func(*args, **kwargs)
+        return timed
+
+    def elapsed(self):
+        return time.perf_counter() - self.started
+
+
+def observe_request(endpoint, timer):
+    labels = {"endpoint": endpoint, "sentiment": timer.sentiment, "outcome": timer.outcome}
+    for stage, seconds in timer.spans.items():
+        STAGE_SECONDS.observe(seconds, stage=stage, **labels)
+    REQUEST_SECONDS.observe(timer.elapsed(), **labels)
+    REQUESTS_TOTAL.inc(**labels)
+
+
+def _collapse(frame, max_depth):
+    names = []
+    while frame is not None and len(names) < max_depth:
+        code = frame.f_code
+        names.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{frame.f_lineno})")
+        frame = frame.f_back
+    return ";".join(reversed(names))
+
+
+# Samples the stacks of threads inside profile() every interval_ms and keeps
+# the samples of requests that took at least threshold_ms. Work the request
+# hands to other threads (the Gemini and YouTube calls on the chat executor)
+# is sampled too when the callable is passed through wrap(); those stacks are
+# prefixed with the thread's name. Disabled (no sampler thread, profile()
+# does nothing) when threshold_ms is 0.
+class SlowRequestProfiler:
+    def __init__(self, threshold_ms=0, interval_ms=5, output_path="slow_requests.folded", max_depth=96):
+        self.threshold = threshold_ms / 1000.0
+        self.interval = interval_ms / 1000.0
+        self.output_path = output_path
+        self.max_depth = max_depth
+        self._active = {}
+        self._lock = threading.Lock()
+        self._write_lock = threading.Lock()
+        self._sampler = None
+        self.dumped = 0
+
+    @property
+    def enabled(self):
+        return self.threshold > 0
+
+    def _ensure_sampler(self):
+        if self._sampler is None:
+            self._sampler = threading.Thread(target=self._run, name="slow-request-profiler", daemon=True)
+            self._sampler.start()
+
+    def _run(self):
+        while True:
+            time.sleep(self.interval)
+            with self._lock:
+                if not self._active:
+                    continue
+                frames = sys._current_frames()
+                for ident, (samples, prefix) in self._active.items():
+                    frame = frames.get(ident)
+                    if frame is not None:
+                        stack = prefix + _collapse(frame, self.max_depth)
+                        samples[stack] = samples.get(stack, 0) + 1
+
+    @contextmanager
+    def profile(self, name):
+        if not self.enabled:
+            yield
+            return
+        ident, samples = threading.get_ident(), {}
+        with self._lock:
+            self._ensure_sampler()
+            self._active[ident] = (samples, "")
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - start
+            with self._lock:
+                self._active.pop(ident, None)
+                # A wrapped call may still be running (e.g. after a timeout)
+                samples = dict(samples)
+            if elapsed >= self.threshold and samples:
+                self._dump(name, samples)
+
+    # func, sampled into the calling thread's profile while it runs on
+    # another thread; func itself when that thread is not being profiled
+    def wrap(self, func):
+        with self._lock:
+            active = self._active.get(threading.get_ident())
+        if active is None:
+            return func
+        samples = active[0]
+
+        def profiled(*args, **kwargs):
+            ident = threading.get_ident()
+            with self._lock:
+                self._active[ident] = (samples, f"[{threading.current_thread().name}];")
+            try:
+                return func(*args, **kwargs)
+            finally:
+                with self._lock:
+                    if self._active.get(ident, (None,))[0] is samples:
+                        del self._active[ident]
+        return profiled
+
+    def _dump(self, name, samples):
+        lines = [f"{name};{stack} {count}\n" for stack, count in samples.items()]
+        with self._write_lock:
+            with open(self.output_path, "a") as file:
+                file.writelines(lines)
+            self.dumped += 1
@@ -0,0 +1,249 @@
+import argparse
+import json
+import os
+import threading
+import time
+
+# Sentiment model registry. Artifacts are stored in a compact versioned format
+# instead of joblib pickles:
+#
+#   model_artifacts/v1/metadata.json    format version, vectorizer/model params
+#   model_artifacts/v1/vocabulary.json  terms in feature-index order
+#   model_artifacts/v1/idf.npy          (n_features,) float64
+#   model_artifacts/v1/coef.npy         (n_classes, n_features) float64
+#   model_artifacts/v1/intercept.npy    (n_classes,) float64
+#
+# The .npy files are memory-mapped on load, so pre-forked workers share the
+# pages. NumPy and scikit-learn are imported only when a model is actually
+# loaded, and loading can happen lazily on first use or on a background
+# warm-up thread. The NumPy scorer (get_scorer) reads the artifacts directly
+# and needs neither scikit-learn nor joblib; they are only imported to build
+# the artifacts when none exist yet.
+
+ARTIFACT_DIR = "model_artifacts"
+FORMAT_VERSION = 1
+
+# Vectorizer settings needed to reproduce tokenization and weighting
+VECTORIZER_PARAMS = (
+    "lowercase", "strip_accents", "token_pattern", "ngram_range", "stop_words", "analyzer",
+    "binary", "max_df", "min_df", "max_features", "norm", "use_idf", "smooth_idf", "sublinear_tf",
+)
+
+
+def version_dir(artifact_dir=ARTIFACT_DIR, version=FORMAT_VERSION):
+    return os.path.join(artifact_dir, f"v{version}")
+
+
+def artifacts_exist(artifact_dir=ARTIFACT_DIR, version=FORMAT_VERSION):
+    return os.path.exists(os.path.join(version_dir(artifact_dir, version), "metadata.json"))
+
+
+# Write a fitted TfidfVectorizer + LogisticRegression as versioned artifacts.
+# Files are written to a temporary directory and renamed into place so a
+# reader never sees a half-written version.
+def export_artifacts(model, vectorizer, artifact_dir=ARTIFACT_DIR):
+    import numpy as np
+
+    target = version_dir(artifact_dir)
+    staging = f"{target}.tmp-{os.getpid()}"
+    os.makedirs(staging, exist_ok=True)
+
+    terms = [None] * len(vectorizer.vocabulary_)
+    for term, index in vectorizer.vocabulary_.items():
+        terms[int(index)] = term
+    vectorizer_params = {name: vectorizer.get_params()[name] for name in VECTORIZER_PARAMS}
+    # Stored as the word list, so the NumPy scorer doesn't need sklearn's
+    if vectorizer_params["stop_words"] == "english":
+        from sklearn.feature_extraction.text import ENGLISH_STOP_WORDS
+        vectorizer_params["stop_words"] = ENGLISH_STOP_WORDS
+    if isinstance(vectorizer_params["stop_words"], (set, frozenset)):
+        vectorizer_params["stop_words"] = sorted(vectorizer_params["stop_words"])
+
+    model_params = {name: value for name, value in model.get_params().items()
+                    if isinstance(value, (str, int, float, bool, type(None)))}
+    metadata = {
+        "format_version": FORMAT_VERSION,
+        "created_at": time.time(),
+        "vectorizer": vectorizer_params,
+        "model": model_params,
+        "classes": [str(label) for label in model.classes_],
+        "n_features": len(terms),
+    }
+
+    with open(os.path.join(staging, "vocabulary.json"), "w") as file:
+        json.dump(terms, file)
+    np.save(os.path.join(staging, "idf.npy"), np.asarray(vectorizer.idf_, dtype=np.float64))
+    np.save(os.path.join(staging, "coef.npy"), np.asarray(model.coef_, dtype=np.float64))
+    np.save(os.path.join(staging, "intercept.npy"), np.asarray(model.intercept_, dtype=np.float64))
+    with open(os.path.join(staging, "metadata.json"), "w") as file:
+        json.dump(metadata, file, indent=2)
+
+    if os.path.exists(target):
+        import shutil
+        shutil.rmtree(target)
+    os.replace(staging, target)
+    return target
+
+
+# Raw artifacts: metadata dict, vocabulary dict and memory-mapped arrays
+def read_artifacts(artifact_dir=ARTIFACT_DIR, mmap=True):
+    import numpy as np
+
+    path = version_dir(artifact_dir)
+    with open(os.path.join(path, "metadata.json")) as file:
+        metadata = json.load(file)
+    if metadata.get("format_version") != FORMAT_VERSION:
+        raise ValueError(f"Unsupported model artifact version {metadata.get('format_version')}")
+    with open(os.path.join(path, "vocabulary.json")) as file:
+        vocabulary = {term: index for index, term in enumerate(json.load(file))}
+
+    mmap_mode = "r" if mmap else None
+    arrays = {name: np.load(os.path.join(path, f"{name}.npy"), mmap_mode=mmap_mode)
+              for name in ("idf", "coef", "intercept")}
+    return metadata, vocabulary, arrays
+
+
+# Rebuild scikit-learn objects from the artifacts, without unpickling
+def load_artifacts(artifact_dir=ARTIFACT_DIR):
+    import numpy as np
+    from sklearn.feature_extraction.text import TfidfVectorizer
+    from sklearn.linear_model import LogisticRegression
+
+    metadata, vocabulary, arrays = read_artifacts(artifact_dir)
+
+    vectorizer_params = dict(metadata["vectorizer"])
+    vectorizer_params["ngram_range"] = tuple(vectorizer_params["ngram_range"])
+    vectorizer = TfidfVectorizer(vocabulary=vocabulary, **vectorizer_params)
+    vectorizer.idf_ = arrays["idf"]
+
+    model = LogisticRegression(**metadata["model"])
+    model.classes_ = np.array(metadata["classes"])
+    model.coef_ = arrays["coef"]
+    model.intercept_ = arrays["intercept"]
+    model.n_features_in_ = int(metadata["n_features"])
+    return model, vectorizer, metadata
+
+
+# Loads the sentiment model once, from (in order) versioned artifacts, legacy
+# joblib pickles (converted to artifacts for next time), or the training
+# fallback. get() returns the scikit-learn objects and get_scorer() the NumPy
+# scorer; each blocks until its own load finishes, and get_scorer() only goes
+# through get() when there are no artifacts to read. warm_up() starts loading
+# on a background thread so the process can accept requests (and report
+# not-ready) in the meantime.
+class ModelRegistry:
+    def __init__(self, artifact_dir=ARTIFACT_DIR, legacy_model_path=None, legacy_vectorizer_path=None, train=None):
+        self.artifact_dir = artifact_dir
+        self.legacy_model_path = legacy_model_path
+        self.legacy_vectorizer_path = legacy_vectorizer_path
+        self.train = train
+        self._lock = threading.Lock()
+        self._loaded = threading.Event()
+        self._model = None
+        self._vectorizer = None
+        self._scorer_lock = threading.Lock()
+        self._scorer = None
+        self._status = {"ready": False, "source": None, "format_version": None, "load_seconds": None, "error": None}
+
+    def _load(self):
+        start = time.perf_counter()
+        if artifacts_exist(self.artifact_dir):
+            model, vectorizer, metadata = load_artifacts(self.artifact_dir)
+            source = "artifacts"
+        else:
+            if (self.legacy_model_path and self.legacy_vectorizer_path
+                    and os.path.exists(self.legacy_model_path) and os.path.exists(self.legacy_vectorizer_path)):
+                import joblib
+                print("✅ Loading existing sentiment model and vectorizer...")
+                model = joblib.load(self.legacy_model_path)
+                vectorizer = joblib.load(self.legacy_vectorizer_path)
+                source = "pickle"
+            elif self.train is not None:
+                model, vectorizer = self.train()
+                source = "trained"
+            else:
+                raise FileNotFoundError("No sentiment model artifacts or pickles found")
+            try:
+                print(f"✅ Exported model artifacts to {export_artifacts(model, vectorizer, self.artifact_dir)}")
+            except OSError as e:
+                print(f"⚠️ Could not export model artifacts: {e}")
+
+        self._model, self._vectorizer = model, vectorizer
+        self._ready(source, start)
+
+    def _ready(self, source, start):
+        self._status.update({
+            "ready": True,
+            "source": source,
+            "format_version": FORMAT_VERSION,
+            "load_seconds": round(time.perf_counter() - start, 4),
+            "error": None,
+        })
+
+    def _load_scorer(self):
+        from fast_sentiment import FastSentimentScorer
+
+        start = time.perf_counter()
+        if not artifacts_exist(self.artifact_dir):
+            # Loads the pickles (or trains) and exports the artifacts
+            model, vectorizer = self.get()
+            if not artifacts_exist(self.artifact_dir):
+                return FastSentimentScorer.from_sklearn(model, vectorizer)
+        scorer = FastSentimentScorer.from_artifacts(self.artifact_dir)
+        if not self._loaded.is_set():
+            self._ready("artifacts", start)
+        return scorer
+
+    def get(self):
+        if not self._loaded.is_set():
+            with self._lock:
+                if not self._loaded.is_set():
+                    try:
+                        self._load()
+                    except Exception as e:
+                        self._status["error"] = repr(e)
+                        raise
+                    self._loaded.set()
+        return self._model, self._vectorizer
+
+    def get_scorer(self):
+        if self._scorer is None:
+            with self._scorer_lock:
+                if self._scorer is None:
+                    try:
+                        self._scorer = self._load_scorer()
+                    except Exception as e:
+                        self._status["error"] = repr(e)
+                        raise
+        return self._scorer
+
+    # Load in the background: the NumPy scorer if scorer is true, otherwise
+    # the scikit-learn objects
+    def warm_up(self, scorer=False):
+        def run():
+            try:
+                self.get_scorer() if scorer else self.get()
+            except Exception as e:
+                print(f"❌ Model warm-up failed: {e}")
+
+        thread = threading.Thread(target=run, name="model-warmup", daemon=True)
+        thread.start()
+        return thread
+
+    def is_ready(self):
+        return self._loaded.is_set() or self._scorer is not None
+
+    def status(self):
+        return dict(self._status)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Convert the joblib sentiment pickles to versioned artifacts.")
+    parser.add_argument("--model", default="sentiment_model.pkl")
+    parser.add_argument("--vectorizer", default="vectorizer.pkl")
+    parser.add_argument("--out", default=ARTIFACT_DIR)
+    args = parser.parse_args()
+
+    import joblib
+    path = export_artifacts(joblib.load(args.model), joblib.load(args.vectorizer), args.out)
+    print(f"✅ Wrote model artifacts to {path}")
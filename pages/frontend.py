@@ -1,375 +1,338 @@
 import streamlit as st
-import requests
 import time
+import html
+import json
 import logging
-import sqlite3
 import uuid
 from datetime import datetime
 
+from chat_archive import EXPORT_FORMATS
+from clients import get_http_session
+from context_window import ContextWindow
+from crisis_triage import get_crisis_triage
+from history_store import get_history_store
+from static_assets import AVATAR, AVATAR_SOURCE, bubbles_markup, has_asset, image_markup, stylesheet_markup
+from transcript_cache import TranscriptCache, bubble_html, bubble_markup
+from write_behind import get_write_behind_store
+
 # API Endpoint
 API_URL = "https://mental-health-chatbot-0yvl.onrender.com/chat"  # Update this if your backend is hosted elsewhere
-
-# Connect to the SQLite database
-conn = sqlite3.connect("chat_history.db", check_same_thread=False)
-cursor = conn.cursor()
-
-# Create table for storing chat history
-cursor.execute('''CREATE TABLE IF NOT EXISTS conversations (
-    chat_id TEXT,
-    role TEXT,
-    message TEXT
-)''')
-conn.commit()
-
-# Function to store messages
+BACKEND_TIMEOUT = 60  # seconds; the backend itself waits on Gemini and YouTube
+STREAM_URL = API_URL + "/stream"  # server-sent events version of /chat
+STREAMING_ENABLED = True
+# Reference the stylesheet and avatar served from static/ instead of sending
+# them with every rerun (needs enableStaticServing, see .streamlit/config.toml)
+STATIC_ASSETS_ENABLED = True
+
+# Chat history store (WAL-mode SQLite, see history_store.py). With write-behind
+# on, saves are queued and committed in batches off the request path; reads of
+# the current chat still see them (see write_behind.py)
+WRITE_BEHIND_ENABLED = True
+history = get_write_behind_store() if WRITE_BEHIND_ENABLED else get_history_store()
+
+# Messages and sidebar entries belong to the logged-in user
+def current_user():
+    return st.session_state.get("username", "")
+
+# Function to store messages; returns the saved row (its id, or a handle to
+# it while the write is queued) for save_sentiment
 def save_message(chat_id, role, message):
-    timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")  # Add timestamp
-    cursor.execute("INSERT INTO conversations (chat_id, role, message, timestamp) VALUES (?, ?, ?, ?)", 
-                   (chat_id, role, message, timestamp))
-    conn.commit()
-
-# Function to load chat history
-def load_chat_history(chat_id):
-    cursor.execute("SELECT role, message, timestamp FROM conversations WHERE chat_id = ? ORDER BY timestamp", (chat_id,))
-    return cursor.fetchall()
-
-# logging to store messages
-logging.basicConfig(level=logging.DEBUG, format="%(asctime)s - %(levelname)s - %(message)s")
-
-# Function to fetch chat sessions with timestamps
-def get_chat_sessions():
-    cursor.execute("SELECT DISTINCT chat_id, MIN(timestamp) FROM conversations GROUP BY chat_id ORDER BY MIN(timestamp) DESC")
-    return cursor.fetchall()
-
-def get_all_chat_ids():
-    cursor.execute("SELECT DISTINCT chat_id FROM conversations")
-    return [row[0] for row in cursor.fetchall()]
-
-chat_ids = get_all_chat_ids()
-
-def get_chat_name(chat_id):
-    messages = load_chat_history(chat_id)  # Fetch chat messages from the database
-    if messages:
-        first_message = messages[0][1]  # Get the first user message
-        return first_message[:30]  # Truncate to 30 chars for display
-    return "New Chat"
-
-# Function to generate a chat title from the first user message
-def get_chat_title(chat_id):
-    cursor.execute("SELECT message FROM conversations WHERE chat_id = ? AND role = 'user' ORDER BY timestamp LIMIT 1", (chat_id,))
-    first_message = cursor.fetchone()
-    return first_message[0][:30] if first_message else "New Chat"
-
-# Generate chat session names dynamically
-chat_sessions = {chat_id: get_chat_name(chat_id) for chat_id in chat_ids}
-
-# Function to fetch all chat sessions grouped by day
-def get_chat_history_grouped_by_day():
-    cursor.execute("""
-        SELECT chat_id, MIN(timestamp)
-        FROM conversations
-        GROUP BY chat_id
-        ORDER BY MIN(timestamp) DESC
-    """)
-    chat_sessions = cursor.fetchall()  # Fetch chat sessions
-
-    # DEBUG: Print what we got from the database
-    print("DEBUG: Retrieved chat_sessions ->", chat_sessions)
-
-    # Initialize grouped_sessions dictionary
+    return history.save_message(current_user(), chat_id, role, message)
+
+# Store the backend's sentiment for a saved user message (feeds the mood dashboard)
+def save_sentiment(saved, sentiment):
+    if saved is not None and isinstance(sentiment, dict) and sentiment.get("label"):
+        try:
+            history.set_sentiment(saved, sentiment)
+        except Exception as e:
+            logging.error("Could not store message sentiment: %s", e)
+
+# Multi-turn context (summary plus recent turns) built from this page's
+# history and sent with each request, since the backend host doesn't share
+# this database (see context_window.py)
+context_window = ContextWindow(history)
+
+def build_context(chat_id, message):
+    try:
+        context = context_window.build(chat_id, message)
+    except Exception as e:
+        logging.error("Could not build chat context: %s", e)
+        return None
+    return {"summary": context["summary"], "turns": [list(turn) for turn in context["turns"]]}
+
+# Open a chat; the crisis banner belongs to the reply that raised it, not the session
+def open_chat(chat_id):
+    st.session_state["current_chat"] = chat_id
+    st.session_state.pop("crisis_contacts", None)
+
+# Show the crisis banner for a flagged reply, clear it after any other reply
+def update_crisis_contacts(reply):
+    if reply.get("crisis"):
+        st.session_state["crisis_contacts"] = reply.get("contacts", [])
+    else:
+        st.session_state.pop("crisis_contacts", None)
+
+# Errors and warnings only; message text is never logged
+logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
+
+SIDEBAR_PAGE_SIZE = 50
+
+# Function to fetch the sidebar summary (chat id, title, first timestamp,
+# message count) in one query; more pages load on demand
+def get_sidebar_sessions(pages):
+    sessions, cursor = [], None
+    for _ in range(pages):
+        page, cursor = history.get_sidebar_summary(current_user(), limit=SIDEBAR_PAGE_SIZE, before=cursor)
+        sessions.extend(page)
+        if cursor is None:
+            break
+    return sessions, cursor is not None
+
+# Function to group chat sessions by the day they started
+def group_sessions_by_day(sessions):
     grouped_sessions = {}
+    for session in sessions:
+        date = session["first_timestamp"].split(" ")[0]  # Extract date
+        grouped_sessions.setdefault(date, []).append(session)
+    return grouped_sessions
 
-    # Iterate through chat sessions
-    for row in chat_sessions:
-        print("DEBUG: Row contents ->", row) 
-        
-        if len(row) == 2:  
-            chat_id, first_message_time = row
-            if first_message_time:  # Ensure timestamp exists
-                date = first_message_time.split(" ")[0]  # Extract date
-                grouped_sessions.setdefault(date, []).append((chat_id, first_message_time))
-        else:
-            print("⚠️ Unexpected number of values in row, skipping:", row)  
 
-    return grouped_sessions  
+# Styling (static/chat.css)
+st.markdown(stylesheet_markup(inline=not STATIC_ASSETS_ENABLED), unsafe_allow_html=True)
 
+# user authentication: nothing below (sidebar, search, saving) runs without a
+# logged-in user, so no query is ever made for the empty user id
+if not st.session_state.get("authenticated") or not current_user():
+    st.warning("⚠️ Please log in first.")
+    st.stop()
 
 # Fetch chat sessions properly
-chat_sessions = get_chat_history_grouped_by_day()  
+if "sidebar_pages" not in st.session_state:
+    st.session_state["sidebar_pages"] = 1
+sidebar_sessions, more_sessions = get_sidebar_sessions(st.session_state["sidebar_pages"])
+chat_sessions = group_sessions_by_day(sidebar_sessions)
 
 # Sidebar for Chat History
 st.sidebar.title("📝 Chat History")
 
 if st.sidebar.button("➕ New Chat", key="new_chat"):
-    new_chat_id = str(uuid.uuid4())
-    st.session_state["current_chat"] = new_chat_id
+    open_chat(str(uuid.uuid4()))
     st.sidebar.success("New chat created!")
 
+# Search across this user's past messages (full-text index, see
+# HistoryStore.search_messages); matched words are highlighted
+SEARCH_RESULTS = 10
+HIGHLIGHT = ("\x02", "\x03")  # markers swapped for <mark> after escaping the snippet
+
+def snippet_html(snippet):
+    return html.escape(snippet).replace(HIGHLIGHT[0], "<mark>").replace(HIGHLIGHT[1], "</mark>")
+
+search_query = st.sidebar.text_input("🔍 Search chats", key="chat_search", placeholder="Search your messages")
+if search_query.strip():
+    results = history.search_messages(current_user(), search_query, limit=SEARCH_RESULTS, highlight=HIGHLIGHT)
+    if not results:
+        st.sidebar.caption("No matching messages.")
+    # Archived chats (see chat_archive.py) are not in the search index
+    if history.get_archive_files(current_user()):
+        st.sidebar.caption("Older chats are archived and not searched; open them from the list below "
+                           "or export your history.")
+    for result in results:
+        st.sidebar.markdown(
+            f"<div class='search-result'><div class='search-title'>{html.escape(result['title'])} · "
+            f"{result['timestamp'].split(' ')[0]}</div>{snippet_html(result['snippet'])}</div>",
+            unsafe_allow_html=True
+        )
+        if st.sidebar.button("Open chat", key=f"search_{result['id']}"):
+            open_chat(result["chat_id"])
+
 # Display chat history grouped by date
 for date, chats in chat_sessions.items(): 
     st.sidebar.markdown(f"<div class='date-header'>{date}</div>", unsafe_allow_html=True)  
-    for chat_id, first_message_time in chats:
-        title = get_chat_title(chat_id)  
-        if st.sidebar.button(title, key=f"{chat_id}_{date}"):
-            st.session_state["current_chat"] = chat_id
+    for session in chats:
+        if st.sidebar.button(session["title"], key=f"{session['chat_id']}_{date}"):
+            open_chat(session["chat_id"])
+
+if more_sessions and st.sidebar.button("Load older chats", key="load_older_chats"):
+    st.session_state["sidebar_pages"] += 1
+    st.rerun()
+
+if st.sidebar.button("📈 Mood over time", key="mood_dashboard"):
+    st.switch_page("pages/mood_dashboard.py")
+
+# The logged-in user's whole history, archived chats included, as NDJSON
+# (see chat_archive.export_ndjson); built on request, not on every rerun
+if st.sidebar.button("⬇️ Export my history", key="export_history"):
+    export, mimetype = EXPORT_FORMATS["ndjson"]
+    st.session_state["history_export"] = (
+        current_user(), mimetype, b"".join(export(history, current_user(), history.archive_dir))
+    )
+history_export = st.session_state.get("history_export")
+if history_export and history_export[0] == current_user():
+    st.sidebar.download_button("Download chat-history.jsonl", history_export[2], file_name="chat-history.jsonl",
+                               mime=history_export[1], key="download_history",
+                               on_click=lambda: st.session_state.pop("history_export", None))
 
 # chatbot avatar GIF 
 col1, col2 = st.columns((0.1, 0.9)) 
 
 with col1:
-    st.image("chatbot_avatar.gif.gif", width=60) 
+    if STATIC_ASSETS_ENABLED and has_asset(AVATAR):
+        st.markdown(image_markup(AVATAR, alt="Calm Chatbot", css_class="chat-avatar"), unsafe_allow_html=True)
+    else:
+        st.image(AVATAR_SOURCE, width=60)
 
 with col2:
     st.markdown("<h1 style='color: black;'>Calm Chatbot</h1>", unsafe_allow_html=True)
 
 
-# Styling
-st.markdown(
-    """
-    <style>
-        [data-testid="stSidebarNav"] { display: none; }
-
-        /* Background Gradient Animation */
-        @keyframes gradientAnimation {
-            0% { background-position: 0% 50%; }
-            50% { background-position: 100% 50%; }
-            100% { background-position: 0% 50%; }
-        }
-
-        .stApp {
-            background: linear-gradient(-45deg, #d4eaf7, #e3d7ff, #f5e6cc, #d3f3e3);
-            background-size: 400% 400%;
-            animation: gradientAnimation 15s ease infinite;
-        }
-          /* Sidebar background gradient */
-        [data-testid="stSidebar"] {
-            background: linear-gradient(135deg, #fdfcfb, #e2d1c3, #f5e6cc, #d3f3e3);
-            background-size: 400% 400%;
-            animation: gradientAnimation 15s ease infinite;
-        }
-         /* Rounded colored New Chat button */
-        div.stButton > button:first-child {
-            background: linear-gradient(to right, #A18CD1, #FBC2EB);
-            color: #333;
-            border-radius: 30px;
-            padding: 10px 25px;
-            font-weight: bold;
-            font-size: 15px;
-            border: none;
-            box-shadow: 0 4px 8px rgba(0,0,0,0.1);
-            margin-bottom: 20px;
-            transition: 0.3s ease;
-        }
-        div.stButton > button:first-child:hover {
-            background: linear-gradient(to right, #8e76bd, #ebb8dc);
-            color: #000;
-        }
-
-        /* Chat history bubbles like new chat button */
-        .chat-bubble {
-            background: linear-gradient(to right, #f3f3f3, #eaeaea);
-            color: #333;
-            border-radius: 20px;
-            padding: 10px 15px;
-            margin: 6px 0;
-            font-size: 14px;
-            font-weight: 500;
-            text-align: left;
-            display: inline-block;
-            width: 100%;
-            box-shadow: 0 2px 5px rgba(0,0,0,0.1);
-            transition: all 0.3s ease;
-        }
-        .chat-bubble:hover {
-            background: linear-gradient(to right, #e0e0e0, #d9d9d9);
-            transform: scale(1.02);
-            box-shadow: 0 4px 12px rgba(0, 0, 0, 0.1);
-            filter: brightness(1.05);
-        }
-
-        /* Date header styling */
-        .date-header {
-            font-size: 16px;
-            font-weight: bold;
-            color: #444;
-            margin-top: 20px;
-            margin-bottom: 10px;
-        }
-                                                          /* Chat Bubble Styling */
-       .chat-container {
-              display: flex;
-              width: 100%;
-              margin-bottom: 10px;
-         }
-   
-        .chat-bubble {
-            max-width: 60%;
-            padding: 10px 15px;
-            border-radius: 20px;
-            margin-bottom: 10px;
-            word-wrap: break-word;
-            display: inline-block;
-        }
-       
-        .user-bubble {
-            background-color: #EADCF8; /* Soft Muted Purple */
-            color: black;
-            align-self: flex-end;
-            border-radius: 18px;
-            padding: 12px 16px;
-            max-width: 80%;
-            border: none;
-            transition: background-color 0.5s ease-in-out; /* Smooth color transition */
-            text-align: left;
-       }
-
-       .bot-bubble {
-            background-color: #FFEFE2; /* Lighter Soft Peach */
-            color: black;
-            align-self: flex-start;
-            border-radius: 18px;
-            padding: 12px 16px;
-            max-width: 80%;
-            border: none;
-            transition: background-color 0.5s ease-in-out; /* Smooth color transition */
-            text-align: left;
-       }
-                                                 /* Floating Bubbles */
-        .bubble {
-            position: absolute;
-            background-color: rgba(255, 255, 255, 0.5); /* Increase opacity for better visibility */
-            border-radius: 50%;
-            opacity: 0.4; /* Make the bubbles more visible */
-            animation: floatUp 12s infinite ease-in-out; /* Adjust animation duration for smoother movement */
-            }
-        @keyframes floatUp {
-             0% { transform: translateY(100vh); opacity: 0.4; }
-             50% { opacity: 0.4; } /* Make bubbles more visible mid-animation */
-            100% { transform: translateY(-10vh); opacity: 0; }
-        }
-                                        /* Bubble Container */
-        .bubble-container {
-            position: fixed;
-            top: 0;
-            left: 0;
-            width: 100%;
-            height: 100vh;
-            pointer-events: none;
-            overflow: hidden;
-        }
-                                          /* Emergency Contacts */
-        .emergency-contacts {
-            position: fixed;
-            bottom: 50px;
-            right: 20px;
-            font-size: 14px;
-            color: #333;
-            text-align: right;
-            font-weight: bold;
-        }
-    </style>
-   
-    """,
-    unsafe_allow_html=True
-)
 # Initialize session state for user input
 if "user_input" not in st.session_state:
     st.session_state["user_input"] = ""
-#function to send message
-def send_message():
-    user_input = st.session_state.get("user_input", "").strip()
-    if not user_input:
-        return
-
-    chat_id = st.session_state.current_chat
-    save_message(chat_id, "user", user_input)
-    st.session_state["user_input"] = ""
-
-    with st.spinner("Typing..."):
-        time.sleep(0.5)
-
+# Ask the backend for a complete (non-streamed) reply
+def request_bot_reply(chat_id, user_input, saved=None):
     try:
-        response = requests.post(API_URL, json={"message": user_input})
-        logging.debug("Raw API response text: %s", response.text)  # <-- Add this debug print
-
+        payload = {"message": user_input, "chat_id": chat_id, "context": build_context(chat_id, user_input)}
+        response = get_http_session("backend").post(API_URL, json=payload, timeout=BACKEND_TIMEOUT)
         if response.status_code == 200:
             try:
                 response_data = response.json()
             except ValueError:
                 bot_response = "❌ Error: Backend returned invalid JSON."
-                logging.error("Invalid JSON response: %s", response.text)
+                logging.error("Invalid JSON response (%d bytes)", len(response.content))
             else:
                 bot_response = response_data.get("response", "I'm not sure how to respond.")
+                save_sentiment(saved, response_data.get("sentiment"))
+                update_crisis_contacts(response_data)
                 # Process bot_response and videos as before...
         else:
             bot_response = f"❌ Error {response.status_code}: {response.text}"
     except Exception as e:
         bot_response = f"❌ Exception: {e}"
+    return bot_response
+
+#function to send message
+def send_message():
+    user_input = st.session_state.get("user_input", "").strip()
+    if not user_input:
+        return
+
+    chat_id = st.session_state.current_chat
+    saved = save_message(chat_id, "user", user_input)
+    st.session_state["user_input"] = ""
+
+    if STREAMING_ENABLED:
+        # The reply is streamed into the page below the transcript (see stream_bot_reply)
+        st.session_state["pending_reply"] = {"chat_id": chat_id, "message": user_input, "saved": saved}
+        return
+
+    with st.spinner("Typing..."):
+        bot_response = request_bot_reply(chat_id, user_input, saved)
 
     save_message(chat_id, "bot", bot_response)
     st.session_state.pop("user_input", None)
 
 
 send_message() 
-# Bubbles
+# Bubbles (sized and placed by static/chat.css)
 def create_bubbles():
-    bubble_styles = "".join(
-        f'<div class="bubble" style="width:{size}px; height:{size}px; left:{left}%; animation-duration:{duration}s;"></div>'
-        for size, left, duration in  [(30, 5, 10), (50, 15, 12), (40, 25, 14), (60, 35, 16), (70, 45, 18),  # Larger bubbles
-            (20, 55, 8), (30, 65, 10), (40, 75, 12), (50, 85, 14), (60, 95, 16),  # More bubbles
-            (25, 10, 9), (35, 20, 11), (45, 30, 13), (55, 40, 15), (65, 50, 17)   # Additional bubbles
-        ]
-    )
-    st.markdown(f'<div class="bubble-container">{bubble_styles}</div>', unsafe_allow_html=True)
+    st.markdown(bubbles_markup(), unsafe_allow_html=True)
 
 create_bubbles()
 
-# user authentication
-if "authenticated" not in st.session_state or not st.session_state["authenticated"]:
-    st.warning("⚠️ Please log in first.")
-    st.stop()
 # Automatically create a new chat session after login
 if "authenticated" in st.session_state and st.session_state["authenticated"]:
     if "current_chat" not in st.session_state or st.session_state["current_chat"] == "New Chat":
         # Automatically create a new chat session
-        new_chat_id = str(uuid.uuid4())
-        st.session_state["current_chat"] = new_chat_id
+        open_chat(str(uuid.uuid4()))
         st.sidebar.success("New chat session created automatically!")
         
 st.write("Start chatting with our AI-powered assistant. Your messages are private and secure.")
 
-# Load chat history from the database for the selected session
-chat_history = load_chat_history(st.session_state.current_chat) if st.session_state.get("current_chat", "New Chat") != "New Chat" else []
-
-# Display user and bot messages with proper alignment
-def handle_user_and_bot_messages(chat_history):
-  for role, msg, timestamp in chat_history:
-    if role == "user":  # User message
-        col1, col2 = st.columns([0.3, 0.7])  # User on the right
-        with col2:
-            st.markdown(
-                f"""
-                <div class="user-bubble">
-                    <b>{datetime.strptime(timestamp, "%Y-%m-%d %H:%M:%S").strftime("%H:%M")}</b><br>
-                    {msg}
-                </div>
-                """,
-                unsafe_allow_html=True
-            )
-    else:  # Bot message
-        col1, col2 = st.columns([0.7, 0.3])  # Bot on the left
-        with col1:
-            st.markdown(
-                f"""
-                <div class="bot-bubble">
-                    <b>{datetime.strptime(timestamp, "%Y-%m-%d %H:%M:%S").strftime("%H:%M")}</b><br>
-                    {msg}
-                </div>
-                """,
-                unsafe_allow_html=True
-            )
+# Per-session transcript cache: the last page of messages, already formatted,
+# plus whatever was written since the previous rerun
+def get_transcript(chat_id):
+    transcript = st.session_state.get("transcript")
+    if transcript is None or transcript.chat_id != chat_id:
+        transcript = TranscriptCache(chat_id)
+        st.session_state["transcript"] = transcript
+    transcript.refresh(history)
+    return transcript
+
+# Display user and bot messages with proper alignment, as one HTML block
+def handle_user_and_bot_messages(transcript):
+    if transcript.has_earlier and st.button("Load earlier messages", key="load_earlier"):
+        transcript.load_earlier(history)
+    st.markdown(f'<div class="chat-transcript">{transcript.html()}</div>', unsafe_allow_html=True)
 # Call the function to display messages
-handle_user_and_bot_messages(chat_history)
+if st.session_state.get("current_chat", "New Chat") != "New Chat":
+    handle_user_and_bot_messages(get_transcript(st.session_state.current_chat))
+
+# Parse a server-sent events response into (event, data) pairs
+def iter_sse_events(response):
+    event, data_lines = "message", []
+    for line in response.iter_lines(decode_unicode=True):
+        if line:
+            if line.startswith("event:"):
+                event = line[len("event:"):].strip()
+            elif line.startswith("data:"):
+                data_lines.append(line[len("data:"):].strip())
+            continue
+        if data_lines:
+            yield event, json.loads("\n".join(data_lines))
+        event, data_lines = "message", []
+
+def streaming_bubble_html(msg, time_label):
+    return f'<div class="chat-transcript">{bubble_html("bot", msg, time_label)}</div>'
+
+def typing_bubble_html(time_label):
+    return f'<div class="chat-transcript">{bubble_markup("bot", "<i>Typing...</i>", time_label)}</div>'
+
+# Draw the bot bubble token by token as the reply streams in, then save it once
+def stream_bot_reply(pending):
+    placeholder = st.empty()
+    time_label = datetime.now().strftime("%H:%M")
+    placeholder.markdown(typing_bubble_html(time_label), unsafe_allow_html=True)
+
+    parts, bot_response = [], None
+    try:
+        payload = {"message": pending["message"], "chat_id": pending["chat_id"],
+                   "context": build_context(pending["chat_id"], pending["message"])}
+        with get_http_session("backend").post(STREAM_URL, json=payload, timeout=BACKEND_TIMEOUT,
+                                              stream=True) as response:
+            if response.status_code == 200:
+                for event, data in iter_sse_events(response):
+                    if event == "meta":
+                        save_sentiment(pending.get("saved"),
+                                       {"label": data.get("sentiment"), "probabilities": data.get("probabilities")})
+                    elif event == "token":
+                        parts.append(data["text"])
+                        placeholder.markdown(streaming_bubble_html("".join(parts) + " ▌", time_label), unsafe_allow_html=True)
+                    elif event == "done":
+                        bot_response = data.get("response") or "".join(parts)
+                        update_crisis_contacts(data)
+            else:
+                logging.error("Streaming request failed with status %s", response.status_code)
+    except Exception as e:
+        logging.error("Streaming request failed: %s", e)
+
+    if bot_response is None:
+        # Stream failed or was cut off: keep what arrived, otherwise fall back to /chat
+        bot_response = "".join(parts) or request_bot_reply(pending["chat_id"], pending["message"], pending.get("saved"))
+
+    placeholder.markdown(streaming_bubble_html(bot_response, time_label), unsafe_allow_html=True)
+    save_message(pending["chat_id"], "bot", bot_response)
+
+# Cleared only after the reply is saved, so a rerun that interrupts the stream retries it
+pending_reply = st.session_state.get("pending_reply")
+if pending_reply:
+    if pending_reply["chat_id"] == st.session_state.get("current_chat"):
+        stream_bot_reply(pending_reply)
+    st.session_state.pop("pending_reply", None)
+
+# Emergency contacts, prominently, after a message the backend's safety triage flagged
+if st.session_state.get("crisis_contacts"):
+    st.error("💙 You don't have to go through this alone. Please reach out to someone now:\n\n"
+             + "\n".join(f"- **{contact['name']}**: {contact['phone']}" for contact in st.session_state["crisis_contacts"]))
 
 #input bar for user message
 st.text_input("Type your message here...", key="user_input", on_change=send_message)
@@ -381,13 +344,12 @@ if st.button("Logout"):
     time.sleep(2)
     st.rerun()
 
-# Emergency Contacts
+# Emergency Contacts (from crisis_lexicon.json, shared with the backend's triage)
+emergency_contacts = get_crisis_triage().contacts()
 st.markdown(
     '<div class="emergency-contacts">'
     'Emergency Contacts:<br>'
-    'Mental Health Support: 123-456-7890<br>'
-    'Suicide Prevention: 987-654-3210<br>'
-    'Crisis Helpline: 555-777-9999'
-    '</div>',
+    + "<br>".join(f"{contact['name']}: {contact['phone']}" for contact in emergency_contacts)
+    + '</div>',
     unsafe_allow_html=True
 )
@@ -0,0 +1,52 @@
+import streamlit as st
+from datetime import date, timedelta
+
+import pandas as pd
+
+from static_assets import stylesheet_markup
+from write_behind import get_write_behind_store
+
+# Mood over time for the logged-in user. Reads only the daily/weekly mood
+# rollups that the history database keeps up to date as messages are scored
+# (see HistoryStore.get_mood_rollups), never the messages themselves.
+
+st.markdown(stylesheet_markup(), unsafe_allow_html=True)
+
+if not st.session_state.get("authenticated") or not st.session_state.get("username"):
+    st.warning("⚠️ Please log in first.")
+    st.stop()
+
+history = get_write_behind_store()
+
+if st.sidebar.button("💬 Back to chat", key="back_to_chat"):
+    st.switch_page("pages/frontend.py")
+
+st.markdown("<h1 style='color: black;'>Mood over time</h1>", unsafe_allow_html=True)
+
+RANGES = {"Last 30 days": 30, "Last 12 weeks": 84, "Last year": 365, "All time": None}
+period_label = st.radio("Group by", ["Day", "Week"], horizontal=True)
+range_label = st.selectbox("Range", list(RANGES), index=1)
+days = RANGES[range_label]
+since = (date.today() - timedelta(days=days)).isoformat() if days else None
+
+rollups = history.get_mood_rollups(st.session_state["username"], period_label.lower(), since)
+if not rollups:
+    st.info("No scored messages yet. Your mood shows up here as you chat.")
+    st.stop()
+
+frame = pd.DataFrame(rollups)
+frame["period"] = pd.to_datetime(frame["period"])
+frame = frame.set_index("period")
+
+total = int(frame["total"].sum())
+average_mood = float((frame["mood"] * frame["total"]).sum() / total)
+col1, col2, col3 = st.columns(3)
+col1.metric("Messages", total)
+col2.metric("Average mood", f"{average_mood:+.2f}")
+col3.metric("Positive share", f"{frame['positive'].sum() / total:.0%}")
+
+st.subheader("Average mood (-1 negative … +1 positive)")
+st.line_chart(frame["mood"])
+
+st.subheader("Messages by sentiment")
+st.bar_chart(frame[["positive", "neutral", "negative"]], color=["#7FC8A9", "#C9C9C9", "#F4A6A6"])
@@ -0,0 +1,135 @@
+import math
+import re
+import threading
+import time
+from collections import OrderedDict
+
+# Caches LLM replies by (sentiment label, normalized message). Lookups first
+# try the exact normalized text, then the most similar cached message with the
+# same label (cosine similarity of idf-weighted term vectors) above a
+# threshold. Each entry collects up to `variants` different replies and hits
+# rotate through them, so a repeated "oh my gosh" doesn't always get the
+# identical answer; until an entry has `min_variants` replies, lookups miss
+# and the caller's fresh reply is added to it.
+
+_PUNCTUATION = re.compile(r"[^\w\s]+")
+_WHITESPACE = re.compile(r"\s+")
+
+
+def normalize(text):
+    return _WHITESPACE.sub(" ", _PUNCTUATION.sub(" ", text.lower())).strip()
+
+
+# Unit-length term vector; every token weighs 1 unless a weight function is
+# given (backend passes idf weights from the sentiment model's vocabulary)
+def term_vector(tokens, weight=None):
+    vector = {}
+    for token in tokens:
+        vector[token] = weight(token) if weight else 1.0
+    norm = math.sqrt(sum(w * w for w in vector.values()))
+    return {t: w / norm for t, w in vector.items()} if norm else {}
+
+
+def cosine(a, b):
+    if len(a) > len(b):
+        a, b = b, a
+    return sum(w * b.get(t, 0.0) for t, w in a.items())
+
+
+class ResponseCache:
+    def __init__(self, ttl=3600, max_entries=512, similarity=0.9, variants=3, min_variants=2,
+                 max_chars=200, tokenize=None, weight=None):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.similarity = similarity
+        self.variants = variants
+        self.min_variants = min_variants
+        self.max_chars = max_chars
+        self.tokenize = tokenize or str.split
+        self.weight = weight
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self._counters = {"hits": 0, "near_hits": 0, "misses": 0, "skipped": 0, "stores": 0,
+                          "evictions": 0, "latency_saved_ms": 0.0}
+
+    def _vector(self, key_text):
+        return term_vector(self.tokenize(key_text), self.weight)
+
+    def _live(self, key, now):
+        entry = self._entries.get(key)
+        if entry is not None and now - entry["created_at"] > self.ttl:
+            del self._entries[key]
+            return None
+        return entry
+
+    def _nearest(self, label, vector, now):
+        best, best_score = None, self.similarity
+        for key in list(self._entries):
+            if key[0] != label:
+                continue
+            entry = self._live(key, now)
+            if entry is None:
+                continue
+            score = cosine(vector, entry["vector"])
+            if score >= best_score:
+                best, best_score = key, score
+        return best
+
+    # A cached reply for the message, or None
+    def get(self, message, label):
+        text = normalize(message)
+        if not text or len(text) > self.max_chars:
+            with self._lock:
+                self._counters["skipped"] += 1
+            return None
+
+        now = time.time()
+        vector = self._vector(text) if self.similarity < 1 else None
+        with self._lock:
+            key, counter = (label, text), "hits"
+            if self._live(key, now) is None:
+                key, counter = (self._nearest(label, vector, now) if vector else None), "near_hits"
+            entry = self._entries.get(key) if key else None
+            if entry is None or len(entry["replies"]) < self.min_variants:
+                self._counters["misses"] += 1
+                return None
+
+            self._entries.move_to_end(key)
+            reply = entry["replies"][entry["served"] % len(entry["replies"])]
+            entry["served"] += 1
+            self._counters[counter] += 1
+            self._counters["latency_saved_ms"] += entry["generate_ms"]
+        return reply
+
+    # Record a freshly generated reply and how long generating it took
+    def add(self, message, label, reply, generate_ms=0.0):
+        text = normalize(message)
+        if not text or len(text) > self.max_chars or not reply:
+            return
+
+        now = time.time()
+        vector = self._vector(text)
+        with self._lock:
+            key = (label, text)
+            entry = self._live(key, now)
+            if entry is None:
+                entry = self._entries[key] = {"vector": vector, "replies": [], "served": 0,
+                                              "generate_ms": 0.0, "created_at": now}
+            self._entries.move_to_end(key)
+            if reply not in entry["replies"] and len(entry["replies"]) < self.variants:
+                count = len(entry["replies"])
+                entry["replies"].append(reply)
+                entry["generate_ms"] = (entry["generate_ms"] * count + generate_ms) / (count + 1)
+            self._counters["stores"] += 1
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self._counters["evictions"] += 1
+
+    def stats(self):
+        with self._lock:
+            counters = dict(self._counters)
+            counters["entries"] = len(self._entries)
+        lookups = counters["hits"] + counters["near_hits"] + counters["misses"]
+        counters["hit_rate"] = round((counters["hits"] + counters["near_hits"]) / lookups, 4) if lookups else 0.0
+        counters["latency_saved_ms"] = round(counters["latency_saved_ms"], 1)
+        return counters
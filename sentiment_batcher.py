@@ -0,0 +1,149 @@
+import math
+import queue
+import threading
+import time
+from collections import deque
+
+
+# Nearest-rank percentile over a list of numbers
+def percentile(values, pct):
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, math.ceil(pct / 100.0 * len(ordered)) - 1))
+    return ordered[index]
+
+
+class _PendingItem:
+    __slots__ = ("text", "submitted_at", "done", "result", "error")
+
+    def __init__(self, text):
+        self.text = text
+        self.submitted_at = time.perf_counter()
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+# Micro-batcher: gathers concurrent requests for a few milliseconds and
+# scores them with a single vectorized call to score_batch(list_of_texts)
+class SentimentBatcher:
+    def __init__(self, score_batch, max_batch_size=32, max_wait_ms=5, latency_window=2048):
+        self.score_batch = score_batch
+        self.max_batch_size = max(1, int(max_batch_size))
+        self.max_wait = max(0.0, float(max_wait_ms)) / 1000.0
+        self._queue = queue.Queue()
+        self._latencies = deque(maxlen=latency_window)
+        self._lock = threading.Lock()
+        self._batches = 0
+        self._messages = 0
+        self._worker = None
+        self._worker_stop = None
+
+    def start(self):
+        with self._lock:
+            self._ensure_worker()
+
+    # Caller holds self._lock. Each worker has its own stop event and reads
+    # the queue that was current when it started.
+    def _ensure_worker(self):
+        if self._worker is None or not self._worker.is_alive():
+            self._worker_stop = threading.Event()
+            self._worker = threading.Thread(target=self._run, args=(self._queue, self._worker_stop),
+                                            name="sentiment-batcher", daemon=True)
+            self._worker.start()
+
+    # Stop the worker after its current batch; requests still queued fail
+    # with an error rather than wait out their timeout. The worker is detached
+    # at once, so a later submit starts a new one on a fresh queue even if
+    # this one is still finishing a batch when the join times out.
+    def stop(self, timeout=1.0):
+        with self._lock:
+            worker, stop, old_queue = self._worker, self._worker_stop, self._queue
+            self._worker, self._worker_stop = None, None
+            self._queue = queue.Queue()
+        if worker is None:
+            self._fail_pending(old_queue, RuntimeError("Sentiment batcher stopped"))
+            return
+        stop.set()
+        old_queue.put(None)
+        worker.join(timeout)
+        self._fail_pending(old_queue, RuntimeError("Sentiment batcher stopped"))
+
+    @staticmethod
+    def _fail_pending(old_queue, error):
+        while True:
+            try:
+                item = old_queue.get_nowait()
+            except queue.Empty:
+                return
+            if item is not None:
+                item.error = error
+                item.done.set()
+
+    # Score one text, blocking until its batch has been processed
+    def submit(self, text, timeout=10.0):
+        item = _PendingItem(text)
+        # Under the lock, so the item can't land in a queue stop() has already drained
+        with self._lock:
+            self._ensure_worker()
+            self._queue.put(item)
+        if not item.done.wait(timeout):
+            raise TimeoutError("Sentiment batch did not complete in time")
+        if item.error is not None:
+            raise item.error
+        return item.result
+
+    # A None in the queue is stop()'s wake-up: the batch ends there
+    def _collect(self, work, first):
+        batch = [first]
+        deadline = time.perf_counter() + self.max_wait
+        while len(batch) < self.max_batch_size:
+            remaining = deadline - time.perf_counter()
+            if remaining <= 0:
+                break
+            try:
+                item = work.get(timeout=remaining)
+            except queue.Empty:
+                break
+            if item is None:
+                break
+            batch.append(item)
+        return batch
+
+    def _run(self, work, stop):
+        while not stop.is_set():
+            first = work.get()
+            if first is None:
+                continue
+            batch = self._collect(work, first)
+            try:
+                results = self.score_batch([item.text for item in batch])
+                for item, result in zip(batch, results):
+                    item.result = result
+            except Exception as e:
+                for item in batch:
+                    item.error = e
+
+            finished = time.perf_counter()
+            with self._lock:
+                self._batches += 1
+                self._messages += len(batch)
+                for item in batch:
+                    self._latencies.append((finished - item.submitted_at) * 1000.0)
+            for item in batch:
+                item.done.set()
+
+    def stats(self):
+        with self._lock:
+            latencies = list(self._latencies)
+            batches, messages = self._batches, self._messages
+        return {
+            "batches": batches,
+            "messages": messages,
+            "avg_batch_size": round(messages / batches, 2) if batches else 0.0,
+            "max_batch_size": self.max_batch_size,
+            "max_wait_ms": self.max_wait * 1000.0,
+            "p50_ms": round(percentile(latencies, 50), 3),
+            "p99_ms": round(percentile(latencies, 99), 3),
+        }
@@ -0,0 +1,259 @@
+import argparse
+import gc
+import logging
+import math
+import os
+import shutil
+import sys
+import tempfile
+import threading
+import time
+
+from gunicorn.app.base import BaseApplication
+
+# Production entry point for backend.app: gunicorn with pre-forked gthread
+# workers, started from here so the options below stay in one place.
+#
+# The master imports the backend, loads the sentiment model (and builds the
+# NumPy scorer) and freezes the GC before forking the workers (preload_app),
+# so the model's pages are shared copy-on-write instead of loaded once per
+# worker. Each worker serves backend.app behind a ConcurrencyLimiter: at most
+# `threads` requests run at once, up to `queue` more wait briefly for a slot,
+# and anything beyond that gets an immediate 503 instead of stacking up
+# stalled Gemini calls. Gunicorn gets threads + queue + SERVE_SPARE_THREADS
+# threads per worker, so waiting requests, the 503s and health checks all
+# have a thread to run on.
+#
+# SIGTERM/SIGINT drain: workers stop accepting, finish in-flight requests (up
+# to --drain-timeout), flush and exit; the master then exits too. Workers that
+# die unexpectedly are replaced by gunicorn.
+#
+# Workers share their metrics through SERVE_METRICS_DIR (a fresh temporary
+# directory by default), so /metrics reports the totals of all workers rather
+# than those of whichever worker answered the scrape (see metrics.py).
+#
+#   python serve.py --workers 4 --threads 16 --port 5001
+
+SERVE_HOST = os.getenv("SERVE_HOST", "0.0.0.0")
+SERVE_PORT = int(os.getenv("SERVE_PORT", "5001"))
+SERVE_WORKERS = int(os.getenv("SERVE_WORKERS", str(os.cpu_count() or 1)))
+SERVE_THREADS = int(os.getenv("SERVE_THREADS", "16"))
+SERVE_QUEUE = int(os.getenv("SERVE_QUEUE", "32"))
+SERVE_QUEUE_TIMEOUT = float(os.getenv("SERVE_QUEUE_TIMEOUT", "2"))
+SERVE_DRAIN_TIMEOUT = float(os.getenv("SERVE_DRAIN_TIMEOUT", "30"))
+SERVE_METRICS_DIR = os.getenv("SERVE_METRICS_DIR")
+SERVE_SPARE_THREADS = int(os.getenv("SERVE_SPARE_THREADS", "4"))
+
+# Only these paths are limited; health checks and metrics always answer
+LIMITED_PREFIXES = ("/chat", "/sentiment/batch")
+
+
+# WSGI middleware bounding concurrent requests with a short wait queue. Also
+# counts every in-flight request so a draining worker knows when it is idle.
+class ConcurrencyLimiter:
+    def __init__(self, app, max_concurrent=SERVE_THREADS, max_queue=SERVE_QUEUE, queue_timeout=SERVE_QUEUE_TIMEOUT,
+                 prefixes=LIMITED_PREFIXES):
+        self.app = app
+        self.max_queue = max_queue
+        self.queue_timeout = queue_timeout
+        self.prefixes = prefixes
+        self._slots = threading.BoundedSemaphore(max_concurrent)
+        self._lock = threading.Lock()
+        self._idle = threading.Condition(self._lock)
+        self._waiting = 0
+        self._in_flight = 0
+        self._counters = {"admitted": 0, "queued": 0, "rejected_queue_full": 0, "rejected_timeout": 0}
+
+    def _reject(self, start_response, reason):
+        with self._lock:
+            self._counters[reason] += 1
+        body = b'{"error": "Server busy, please retry"}'
+        start_response("503 Service Unavailable", [
+            ("Content-Type", "application/json"),
+            ("Content-Length", str(len(body))),
+            ("Retry-After", "1"),
+        ])
+        return [body]
+
+    def _acquire(self):
+        if self._slots.acquire(blocking=False):
+            return None
+        with self._lock:
+            if self._waiting >= self.max_queue:
+                return "rejected_queue_full"
+            self._waiting += 1
+            self._counters["queued"] += 1
+        try:
+            acquired = self._slots.acquire(timeout=self.queue_timeout)
+        finally:
+            with self._lock:
+                self._waiting -= 1
+        return None if acquired else "rejected_timeout"
+
+    def _finish(self, limited):
+        if limited:
+            self._slots.release()
+        with self._lock:
+            self._in_flight -= 1
+            if self._in_flight == 0:
+                self._idle.notify_all()
+
+    def __call__(self, environ, start_response):
+        limited = environ.get("PATH_INFO", "").startswith(self.prefixes)
+        if limited:
+            reason = self._acquire()
+            if reason:
+                return self._reject(start_response, reason)
+        with self._lock:
+            self._in_flight += 1
+            if limited:
+                self._counters["admitted"] += 1
+        try:
+            result = self.app(environ, start_response)
+        except BaseException:
+            self._finish(limited)
+            raise
+        # Streaming responses hold their slot until the body is fully sent
+        return _ClosingIterator(result, lambda: self._finish(limited))
+
+    # Block until no request is in flight or timeout passes; True if idle
+    def wait_idle(self, timeout):
+        deadline = time.monotonic() + timeout
+        with self._lock:
+            while self._in_flight:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    return False
+                self._idle.wait(remaining)
+        return True
+
+    def stats(self):
+        with self._lock:
+            counters = dict(self._counters)
+            counters["in_flight"] = self._in_flight
+            counters["waiting"] = self._waiting
+        return counters
+
+
+class _ClosingIterator:
+    def __init__(self, iterable, on_close):
+        self._iterable = iterable
+        self._iterator = iter(iterable)
+        self._on_close = on_close
+        self._closed = False
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        return next(self._iterator)
+
+    def close(self):
+        if self._closed:
+            return
+        self._closed = True
+        try:
+            if hasattr(self._iterable, "close"):
+                self._iterable.close()
+        finally:
+            self._on_close()
+
+
+# Import the backend and load everything workers would otherwise each load
+def preload():
+    os.environ.setdefault("MODEL_WARMUP", "0")
+    import backend
+
+    if backend.SENTIMENT_ENGINE == "numpy":
+        backend.get_scorer()
+    else:
+        backend.model_registry.get()
+    # Objects allocated so far are never collected; keeping the GC from
+    # touching them keeps their pages shared after fork
+    gc.collect()
+    gc.freeze()
+    return backend
+
+
+# Directory the workers share metrics through, emptied so counts from an
+# earlier run don't carry over; returns (path, whether to remove it on exit)
+def metrics_directory(path=SERVE_METRICS_DIR):
+    if not path:
+        return tempfile.mkdtemp(prefix="chatbot-metrics-"), True
+    os.makedirs(path, exist_ok=True)
+    for name in os.listdir(path):
+        if name.endswith((".json", ".json.tmp")):
+            os.remove(os.path.join(path, name))
+    return path, False
+
+
+class ChatbotServer(BaseApplication):
+    def __init__(self, host, port, workers, threads, queue, queue_timeout, drain_timeout, metrics_dir, access_log):
+        self.threads, self.queue, self.queue_timeout = threads, queue, queue_timeout
+        self.drain_timeout = drain_timeout
+        self.metrics_dir, self.remove_metrics_dir = metrics_directory(metrics_dir)
+        self.options = {
+            "bind": f"[{host}]:{port}" if ":" in host else f"{host}:{port}",
+            "backlog": 2048,
+            "workers": workers,
+            "worker_class": "gthread",
+            "threads": threads + queue + SERVE_SPARE_THREADS,
+            "graceful_timeout": math.ceil(drain_timeout),
+            "preload_app": True,
+            "accesslog": "-" if access_log else None,
+            "post_fork": self.post_fork,
+            "worker_exit": self.worker_exit,
+            "on_exit": self.on_exit,
+        }
+        self.backend = None
+        self.limiter = None
+        super().__init__()
+
+    def load_config(self):
+        for name, value in self.options.items():
+            self.cfg.set(name, value)
+
+    # Runs once in the master (preload_app); workers inherit the result
+    def load(self):
+        self.backend = preload()
+        self.limiter = ConcurrencyLimiter(self.backend.app, self.threads, self.queue, self.queue_timeout)
+        self.backend.metrics_registry.add_collector("concurrency_limiter", self.limiter.stats)
+        return self.limiter
+
+    def post_fork(self, server, worker):
+        self.backend.metrics_registry.enable_multiprocess(self.metrics_dir)
+
+    def worker_exit(self, server, worker):
+        if not self.limiter.wait_idle(self.drain_timeout):
+            logging.warning("Worker %s exiting with requests still in flight", os.getpid())
+        self.backend.shutdown()
+
+    def on_exit(self, server):
+        if self.remove_metrics_dir:
+            shutil.rmtree(self.metrics_dir, ignore_errors=True)
+
+
+def serve(host=SERVE_HOST, port=SERVE_PORT, workers=SERVE_WORKERS, threads=SERVE_THREADS, queue=SERVE_QUEUE,
+          queue_timeout=SERVE_QUEUE_TIMEOUT, drain_timeout=SERVE_DRAIN_TIMEOUT, metrics_dir=SERVE_METRICS_DIR,
+          access_log=False):
+    ChatbotServer(host, port, workers, threads, queue, queue_timeout, drain_timeout, metrics_dir, access_log).run()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Serve the chatbot backend with pre-forked workers.")
+    parser.add_argument("--host", default=SERVE_HOST)
+    parser.add_argument("--port", type=int, default=SERVE_PORT)
+    parser.add_argument("--workers", type=int, default=SERVE_WORKERS)
+    parser.add_argument("--threads", type=int, default=SERVE_THREADS, help="concurrent requests per worker")
+    parser.add_argument("--queue", type=int, default=SERVE_QUEUE, help="requests per worker waiting for a thread")
+    parser.add_argument("--queue-timeout", type=float, default=SERVE_QUEUE_TIMEOUT)
+    parser.add_argument("--drain-timeout", type=float, default=SERVE_DRAIN_TIMEOUT)
+    parser.add_argument("--metrics-dir", default=SERVE_METRICS_DIR,
+                        help="directory workers share metrics through (default: a temporary one)")
+    parser.add_argument("--access-log", action="store_true")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(name)s - %(message)s")
+    serve(args.host, args.port, args.workers, args.threads, args.queue, args.queue_timeout, args.drain_timeout,
+          args.metrics_dir, args.access_log)
+    sys.exit(0)
@@ -0,0 +1,87 @@
+import argparse
+import hashlib
+import os
+from functools import lru_cache
+
+# Static assets for the Streamlit pages. With static serving on
+# (.streamlit/config.toml), Streamlit serves files in static/ at app/static/,
+# so a rerun only has to send a <link> or <img> pointing at them instead of
+# the whole stylesheet or image. Each URL carries a content hash (?v=...),
+# so a changed file gets a new URL and browsers never use a stale copy.
+#
+# The avatar shown next to the title is a 60px thumbnail of the 800x600,
+# 1.8 MB chatbot_avatar.gif.gif; rebuild the optimized animated WebP with
+#   python static_assets.py
+
+STATIC_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "static")
+STATIC_URL = "app/static"
+
+STYLESHEET = "chat.css"
+AVATAR_SOURCE = "chatbot_avatar.gif.gif"
+AVATAR = "chatbot_avatar.webp"
+AVATAR_WIDTH = 60
+BUBBLE_COUNT = 15  # sized and placed by .bubble:nth-child rules in chat.css
+
+
+def asset_path(name):
+    return os.path.join(STATIC_DIR, name)
+
+
+def has_asset(name):
+    return os.path.isfile(asset_path(name))
+
+
+# Assets only change on deploy, so they're read and hashed once per process
+@lru_cache(maxsize=None)
+def read_asset(name):
+    with open(asset_path(name), "rb") as file:
+        return file.read()
+
+
+@lru_cache(maxsize=None)
+def asset_url(name):
+    return f"{STATIC_URL}/{name}?v={hashlib.sha256(read_asset(name)).hexdigest()[:12]}"
+
+
+# Markup for the page stylesheet: a reference to the served file, or the
+# whole stylesheet inline when static serving is off
+def stylesheet_markup(name=STYLESHEET, inline=False):
+    if inline:
+        return f"<style>{read_asset(name).decode('utf-8')}</style>"
+    return f'<link rel="stylesheet" href="{asset_url(name)}">'
+
+
+def image_markup(name, alt="", css_class=""):
+    return f'<img src="{asset_url(name)}" alt="{alt}" class="{css_class}">'
+
+
+def bubbles_markup(count=BUBBLE_COUNT):
+    return '<div class="bubble-container">' + '<div class="bubble"></div>' * count + "</div>"
+
+
+# Resize every frame of an animated image to `width` pixels (kept sharp on
+# high-DPI screens by `scale`) and save it as a looping animated WebP
+def optimize_avatar(source=AVATAR_SOURCE, target=None, width=AVATAR_WIDTH, scale=2, quality=80):
+    from PIL import Image, ImageSequence
+
+    target = target or asset_path(AVATAR)
+    with Image.open(source) as image:
+        size = (width * scale, round(image.height * width * scale / image.width))
+        frames, durations = [], []
+        for frame in ImageSequence.Iterator(image):
+            frames.append(frame.convert("RGBA").resize(size, Image.LANCZOS))
+            durations.append(frame.info.get("duration", image.info.get("duration", 40)))
+        frames[0].save(target, format="WEBP", save_all=True, append_images=frames[1:], duration=durations,
+                       loop=image.info.get("loop", 0), quality=quality, method=6)
+    print(f"✅ {source} ({os.path.getsize(source):,} bytes) -> {target} ({os.path.getsize(target):,} bytes, "
+          f"{size[0]}x{size[1]}, {len(frames)} frames)")
+    return target
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Build the optimized chatbot avatar in static/.")
+    parser.add_argument("--source", default=AVATAR_SOURCE)
+    parser.add_argument("--width", type=int, default=AVATAR_WIDTH, help="displayed width in pixels")
+    parser.add_argument("--quality", type=int, default=80)
+    args = parser.parse_args()
+    optimize_avatar(args.source, width=args.width, quality=args.quality)
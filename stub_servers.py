@@ -0,0 +1,207 @@
+import argparse
+import json
+import math
+import random
+import threading
+import time
+import zlib
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse, parse_qs
+
+# Local stand-ins for the Gemini REST API and the YouTube Data API so the
+# chat pipeline can be exercised offline. Point the backend at them with
+#   GEMINI_API_ENDPOINT=http://127.0.0.1:8701
+#   YOUTUBE_API_ENDPOINT=http://127.0.0.1:8702/
+# Latency is fixed, or log-normally distributed around it (latency_sigma > 0);
+# error_rate is the fraction of requests answered with error_status instead.
+
+
+class _StubHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    latency = 0.0
+    latency_sigma = 0.0
+    error_rate = 0.0
+    error_status = 503
+
+    def log_message(self, format, *args):
+        pass
+
+    # Seconds for this request: the configured latency as the median of a
+    # log-normal distribution, or exactly, when latency_sigma is 0
+    def _sample_latency(self):
+        if self.latency > 0 and self.latency_sigma > 0:
+            return random.lognormvariate(math.log(self.latency), self.latency_sigma)
+        return self.latency
+
+    # Answer with an injected error for error_rate of requests; True if it did
+    def _inject_error(self):
+        if self.error_rate <= 0 or random.random() >= self.error_rate:
+            return False
+        time.sleep(self._sample_latency())
+        self._send_json(self.error_status, {
+            "error": {"code": self.error_status, "message": "Injected stub failure", "status": "UNAVAILABLE"}
+        })
+        return True
+
+    def _send_json(self, status, payload):
+        body = json.dumps(payload).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _read_json(self):
+        length = int(self.headers.get("Content-Length") or 0)
+        if not length:
+            return {}
+        try:
+            return json.loads(self.rfile.read(length))
+        except ValueError:
+            return {}
+
+
+def _candidate(text, finished=True):
+    candidate = {"content": {"role": "model", "parts": [{"text": text}]}, "index": 0}
+    if finished:
+        candidate["finishReason"] = "STOP"
+    return {"candidates": [candidate]}
+
+
+class GeminiStubHandler(_StubHandler):
+    def do_POST(self):
+        parsed = urlparse(self.path)
+        request_body = self._read_json()
+        prompt = ""
+        for content in request_body.get("contents", []):
+            for part in content.get("parts", []):
+                prompt += part.get("text", "")
+        reply = f"(stub reply to {len(prompt)} prompt chars) You've got this. 😊"
+
+        if "Content" in parsed.path and self._inject_error():
+            return
+        if ":streamGenerateContent" in parsed.path:
+            self._stream(reply, parse_qs(parsed.query).get("alt", [""])[0] == "sse")
+        elif ":generateContent" in parsed.path:
+            time.sleep(self._sample_latency())
+            response = _candidate(reply)
+            response["usageMetadata"] = {"promptTokenCount": len(prompt.split()), "candidatesTokenCount": 8}
+            self._send_json(200, response)
+        else:
+            self._send_json(404, {"error": {"code": 404, "message": "Not found"}})
+
+    # Streams the reply word by word, spreading the configured latency over
+    # the chunks; SSE when alt=sse, otherwise a progressively written JSON array
+    def _stream(self, reply, sse):
+        words = reply.split(" ")
+        delay = self._sample_latency() / len(words)
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream" if sse else "application/json")
+        self.send_header("Connection", "close")
+        self.end_headers()
+        self.close_connection = True
+
+        if not sse:
+            self.wfile.write(b"[")
+        for i, word in enumerate(words):
+            time.sleep(delay)
+            last = i == len(words) - 1
+            chunk = json.dumps(_candidate(word + ("" if last else " "), finished=last))
+            if sse:
+                self.wfile.write(f"data: {chunk}\r\n\r\n".encode("utf-8"))
+            else:
+                self.wfile.write((("" if i == 0 else ",\r\n") + chunk).encode("utf-8"))
+            self.wfile.flush()
+        if not sse:
+            self.wfile.write(b"]")
+
+
+class YouTubeStubHandler(_StubHandler):
+    def do_GET(self):
+        parsed = urlparse(self.path)
+        if not parsed.path.rstrip("/").endswith("/youtube/v3/search"):
+            self._send_json(404, {"error": {"code": 404, "message": "Not found"}})
+            return
+        if self._inject_error():
+            return
+
+        time.sleep(self._sample_latency())
+        params = parse_qs(parsed.query)
+        query = params.get("q", [""])[0]
+        max_results = int(params.get("maxResults", ["1"])[0])
+        self._send_json(200, {
+            "kind": "youtube#searchListResponse",
+            "items": [
+                {"id": {"kind": "youtube#video", "videoId": f"stub{zlib.crc32(query.encode()) % 10000:04d}{i}"},
+                 "snippet": {"title": f"{query} #{i + 1}"}}
+                for i in range(max_results)
+            ],
+        })
+
+
+# Stand-in for the backend's own /chat endpoint, used to benchmark the
+# frontend's HTTP client without running the model or the upstream APIs
+class ChatStubHandler(_StubHandler):
+    def do_POST(self):
+        request_body = self._read_json()
+        if urlparse(self.path).path != "/chat":
+            self._send_json(404, {"error": "Not found"})
+            return
+        if self._inject_error():
+            return
+
+        time.sleep(self._sample_latency())
+        self._send_json(200, {
+            "response": f"(stub) I hear you: {request_body.get('message', '')[:40]}",
+            "video": {"title": "meditation or breathing exercises #1", "url": "https://www.youtube.com/watch?v=stub"},
+        })
+
+
+def _configured_handler(handler_class, latency_ms, latency_sigma, error_rate, error_status):
+    return type(handler_class.__name__, (handler_class,), {
+        "latency": latency_ms / 1000.0,
+        "latency_sigma": latency_sigma,
+        "error_rate": error_rate,
+        "error_status": error_status,
+    })
+
+
+# Start a stub server on a background thread and return it; call
+# server.shutdown() when done. Port 0 picks a free port.
+def start_stub_server(handler_class, port=0, latency_ms=0.0, host="127.0.0.1", latency_sigma=0.0, error_rate=0.0,
+                      error_status=503):
+    handler = _configured_handler(handler_class, latency_ms, latency_sigma, error_rate, error_status)
+    server = ThreadingHTTPServer((host, port), handler)
+    server.daemon_threads = True
+    thread = threading.Thread(target=server.serve_forever, name=handler_class.__name__, daemon=True)
+    thread.start()
+    return server
+
+
+def server_url(server):
+    host, port = server.server_address[:2]
+    return f"http://{host}:{port}"
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Run local Gemini and YouTube stub servers.")
+    parser.add_argument("--gemini-port", type=int, default=8701)
+    parser.add_argument("--youtube-port", type=int, default=8702)
+    parser.add_argument("--gemini-latency-ms", type=float, default=800.0)
+    parser.add_argument("--youtube-latency-ms", type=float, default=300.0)
+    parser.add_argument("--latency-sigma", type=float, default=0.0, help="log-normal spread of both latencies")
+    parser.add_argument("--gemini-error-rate", type=float, default=0.0)
+    parser.add_argument("--youtube-error-rate", type=float, default=0.0)
+    args = parser.parse_args()
+
+    gemini = start_stub_server(GeminiStubHandler, args.gemini_port, args.gemini_latency_ms,
+                               latency_sigma=args.latency_sigma, error_rate=args.gemini_error_rate)
+    youtube = start_stub_server(YouTubeStubHandler, args.youtube_port, args.youtube_latency_ms,
+                                latency_sigma=args.latency_sigma, error_rate=args.youtube_error_rate)
+    print(f"✅ Gemini stub on {server_url(gemini)}, YouTube stub on {server_url(youtube)}/")
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        gemini.shutdown()
+        youtube.shutdown()
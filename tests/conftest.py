@@ -0,0 +1,10 @@
+import os
+import sys
+import tempfile
+
+# The modules live at the repository root, next to backend.py
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# Importing backend opens its history database; keep the suite off the
+# repository's chat_history.db
+os.environ.setdefault("HISTORY_DB_PATH", os.path.join(tempfile.mkdtemp(prefix="chatbot-tests-"), "chat_history.db"))
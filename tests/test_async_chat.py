@@ -0,0 +1,79 @@
+import asyncio
+import json
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from async_chat import FALLBACK_MESSAGE, gather_response, gather_response_sync
+
+
+def test_sync_gather_returns_fallback_at_the_llm_timeout():
+    release = threading.Event()
+
+    def hang(prompt):
+        release.wait(3)
+        return "too late"
+
+    with ThreadPoolExecutor(2) as executor:
+        start = time.monotonic()
+        result = gather_response_sync("p", "q", hang, lambda q: {"title": "t", "url": "u"}, executor,
+                                      llm_timeout=0.2, youtube_timeout=0.2)
+        elapsed = time.monotonic() - start
+        release.set()
+    assert result["message"] == FALLBACK_MESSAGE
+    assert elapsed < 1
+
+
+def test_async_gather_runs_both_calls_concurrently():
+    def slow(value):
+        time.sleep(0.2)
+        return value
+
+    start = time.monotonic()
+    result = asyncio.run(gather_response("hi", {"title": "t", "url": "u"}, slow, slow))
+    assert result == {"message": "hi", "video": {"title": "t", "url": "u"}}
+    assert time.monotonic() - start < 0.35
+
+
+pytest.importorskip("flask")
+pytest.importorskip("numpy")
+
+
+def asgi_post(app, path, payload):
+    messages = []
+
+    async def receive():
+        return {"type": "http.request", "body": json.dumps(payload).encode(), "more_body": False}
+
+    async def send(message):
+        messages.append(message)
+
+    asyncio.run(app({"type": "http", "path": path, "method": "POST"}, receive, send))
+    return messages[0]["status"], json.loads(messages[1]["body"])
+
+
+def test_asgi_chat_honours_open_breaker_and_is_observed(monkeypatch):
+    import async_chat
+    import backend
+    from circuit_breaker import CircuitBreaker
+
+    breaker = CircuitBreaker("test", min_calls=1, window=1)
+    breaker.record(False, 0.0)
+    monkeypatch.setattr(backend, "gemini_breaker", breaker)
+
+    def classify(message, timer):
+        timer.sentiment = "neutral"
+        return {"label": "neutral", "probabilities": {}}
+
+    monkeypatch.setattr(backend, "classify_message", classify)
+    monkeypatch.setattr(backend, "cached_reply", lambda *args: None)
+    monkeypatch.setattr(backend, "fetch_youtube_link", lambda query: {"title": "t", "url": "u"})
+    monkeypatch.setattr(backend, "crisis_triage", type("NoCrisis", (), {"check": staticmethod(lambda m: None)})())
+    monkeypatch.setattr(backend, "gemini_generate", lambda *a, **k: pytest.fail("Gemini called with breaker open"))
+
+    status, body = asgi_post(async_chat.app, "/chat", {"message": "hello"})
+    assert status == 200 and body["response"] in backend.CANNED_REPLIES["neutral"]
+    metrics = backend.metrics_registry.render()
+    assert 'chat_requests_total{endpoint="/chat (asgi)",sentiment="neutral",outcome="breaker_open"}' in metrics
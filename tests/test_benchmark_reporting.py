@@ -0,0 +1,23 @@
+import json
+
+from benchmarks.reporting import _flatten, compare, write_results
+
+
+def test_flatten_keeps_numeric_leaves():
+    assert _flatten({"chat": {"p50_ms": 12.5, "ok": True, "errors": 0, "name": "x"}, "rps": 40}) == {
+        "chat.p50_ms": 12.5, "chat.errors": 0, "rps": 40
+    }
+
+
+def test_results_round_trip_through_compare(tmp_path, capsys):
+    path = write_results("bench", {"requests": 10}, {"chat": {"p50_ms": 10.0, "errors": 0}},
+                         path=str(tmp_path / "out" / "before.json"))
+    with open(path) as file:
+        document = json.load(file)
+    assert document["benchmark"] == "bench" and document["params"] == {"requests": 10}
+
+    compare(path, {"chat": {"p50_ms": 12.0, "errors": 0, "p99_ms": 30.0}})
+    lines = {line.split()[0]: line.split()[1:] for line in capsys.readouterr().out.splitlines()[2:]}
+    assert lines["chat.p50_ms"] == ["10", "12", "+20.0%"]
+    assert lines["chat.p99_ms"] == ["-", "30", "new"]
+    assert lines["chat.errors"] == ["0", "0"]
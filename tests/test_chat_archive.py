@@ -0,0 +1,59 @@
+import json
+import time
+
+import pytest
+
+pytest.importorskip("pyarrow")
+
+from chat_archive import archive_chats, export_ndjson  # noqa: E402
+from history_store import HistoryStore  # noqa: E402
+from write_behind import WriteBehindStore  # noqa: E402
+
+DAY = 86400
+
+
+@pytest.fixture
+def store(tmp_path):
+    store = HistoryStore(str(tmp_path / "history.db"), archive_dir=str(tmp_path / "archive"))
+    now = time.time()
+    store.save_messages([
+        ("alice", "old", "user", "an anxious night long ago", now - 400 * DAY),
+        ("alice", "old", "bot", "breathe slowly", now - 400 * DAY + 1),
+        ("alice", "new", "user", "an anxious morning", now - DAY),
+        ("bob", "bobs", "user", "bob's anxious chat", now - 400 * DAY),
+    ])
+    yield store
+    store.close()
+
+
+def test_archived_chat_reads_back_unchanged(store):
+    before = store.load_chat_history("old")
+    totals = archive_chats(store, store.archive_dir, older_than_days=180)
+    assert totals["chats"] == 2 and totals["messages"] == 3
+    assert store.load_chat_history("old") == before
+    assert [row[2] for row in store.load_messages("old")] == ["an anxious night long ago", "breathe slowly"]
+
+
+# Archived messages leave the search index; the page tells the user so
+def test_search_skips_archived_chats(store):
+    archive_chats(store, store.archive_dir, older_than_days=180)
+    assert {result["chat_id"] for result in store.search_messages("alice", "anxious")} == {"new"}
+    assert store.get_archive_files("alice")
+
+
+def test_export_has_only_that_users_archived_and_live_messages(store):
+    archive_chats(store, store.archive_dir, older_than_days=180)
+    rows = [json.loads(line) for chunk in export_ndjson(store, "alice", store.archive_dir)
+            for line in chunk.decode().splitlines()]
+    assert sorted(row["message"] for row in rows) == ["an anxious morning", "an anxious night long ago",
+                                                      "breathe slowly"]
+    assert {row["user_id"] for row in rows} == {"alice"}
+
+
+# The page exports through its write-behind store, including rows still queued
+def test_export_through_write_behind_sees_queued_rows(store):
+    queued = WriteBehindStore(store)
+    queued.save_message("alice", "new", "user", "just typed")
+    rows = b"".join(export_ndjson(queued, "alice", queued.archive_dir)).decode()
+    assert "just typed" in rows
+    queued.close()
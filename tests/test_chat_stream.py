@@ -0,0 +1,78 @@
+import json
+
+import pytest
+
+pytest.importorskip("flask")
+pytest.importorskip("flask_cors")
+pytest.importorskip("numpy")
+
+import backend  # noqa: E402
+from circuit_breaker import CircuitBreaker  # noqa: E402
+
+
+@pytest.fixture
+def stream(monkeypatch):
+    remembered = []
+    breaker = CircuitBreaker("test-gemini")
+    monkeypatch.setattr(backend, "gemini_breaker", breaker)
+    monkeypatch.setattr(backend, "classify_message", lambda message, timer: {
+        "label": "neutral", "probabilities": {"positive": 0.2, "neutral": 0.6, "negative": 0.2}})
+    monkeypatch.setattr(backend, "cached_reply", lambda *args: None)
+    monkeypatch.setattr(backend, "remember_reply", lambda *args: remembered.append(args))
+    monkeypatch.setattr(backend, "fetch_youtube_link", lambda query: {"title": "t", "url": "u"})
+    monkeypatch.setattr(backend, "crisis_triage", type("NoCrisis", (), {"check": staticmethod(lambda m: None)})())
+
+    # [(event, data)] streamed for one message, with Gemini yielding `chunks`
+    def events(chunks, fail_after=None):
+        def fake_stream(prompt):
+            for i, chunk in enumerate(chunks):
+                if fail_after is not None and i == fail_after:
+                    raise ConnectionError("stream reset")
+                yield chunk
+        monkeypatch.setattr(backend, "gemini_stream", fake_stream)
+        body = backend.app.test_client().post("/chat/stream", json={"message": "hello there"}).get_data(as_text=True)
+        return [_parse_event(block) for block in body.split("\n\n") if block.strip()]
+
+    def post(chunks, fail_after=None):
+        return [data for event, data in events(chunks, fail_after) if event == "done"][0]
+
+    post.events = events
+    return post, remembered, breaker
+
+
+def _parse_event(block):
+    fields = dict(line.split(": ", 1) for line in block.splitlines())
+    return fields["event"], json.loads(fields["data"])
+
+
+def test_clean_stream_is_cached_and_counts_as_success(stream):
+    post, remembered, breaker = stream
+    assert post(["Hello", " friend"])["response"] == "Hello friend"
+    assert len(remembered) == 1
+    assert breaker.stats()["failures"] == 0
+
+
+def test_stream_failing_midway_is_not_cached_and_counts_as_failure(stream):
+    post, remembered, breaker = stream
+    assert post(["Hello", " friend", "!"], fail_after=1)["response"] == "Hello"
+    assert remembered == []
+    assert breaker.stats()["failures"] == 1
+
+
+def test_tokens_stream_between_meta_and_done(stream):
+    post, remembered, breaker = stream
+    events = post.events(["Hel", "lo"])
+    assert [event for event, _ in events] == ["meta", "token", "token", "done"]
+    assert events[0][1]["sentiment"] == "neutral"
+    assert [data["text"] for event, data in events if event == "token"] == ["Hel", "lo"]
+    assert events[-1][1]["video"] == {"title": "t", "url": "u"}
+
+
+def test_open_breaker_streams_the_fallback_reply(stream):
+    post, remembered, breaker = stream
+    for _ in range(breaker.min_calls):
+        breaker.record(False, 0.01)
+    events = post.events(["never sent"])
+    assert [event for event, _ in events] == ["meta", "token", "done"]
+    assert events[-1][1]["response"] in backend.CANNED_REPLIES["neutral"]
+    assert remembered == []
@@ -0,0 +1,69 @@
+import time
+
+import pytest
+
+from circuit_breaker import CLOSED, HALF_OPEN, OPEN, CircuitBreaker, CircuitOpen
+
+
+def _fail():
+    raise RuntimeError("upstream down")
+
+
+def _trip(breaker):
+    for _ in range(breaker.min_calls):
+        with pytest.raises(RuntimeError):
+            breaker.call(_fail)
+
+
+def test_opens_on_failure_rate_and_fails_fast():
+    breaker = CircuitBreaker("test", window=10, min_calls=4, failure_rate=0.5)
+    breaker.record(True, 0.01)
+    breaker.record(True, 0.01)
+    breaker.record(False, 0.01)
+    assert breaker.state() == CLOSED
+    breaker.record(False, 0.01)
+    assert breaker.state() == OPEN
+
+    calls = []
+    with pytest.raises(CircuitOpen):
+        breaker.call(calls.append, 1)
+    assert calls == [] and breaker.stats()["rejected"] == 1
+
+
+def test_opens_on_slow_calls():
+    breaker = CircuitBreaker("test", min_calls=3, slow_call_ms=100, slow_call_rate=0.6)
+    for _ in range(3):
+        breaker.record(True, 0.5)
+    assert breaker.state() == OPEN
+
+
+def test_half_open_probes_close_or_reopen():
+    breaker = CircuitBreaker("test", min_calls=2, open_seconds=0.05, half_open_calls=2)
+    _trip(breaker)
+    time.sleep(0.06)
+    assert breaker.state() == HALF_OPEN
+
+    # Only half_open_calls probes go through; one failure reopens
+    assert breaker.allow() and breaker.allow() and not breaker.allow()
+    breaker.record(True, 0.01)
+    breaker.record(False, 0.01)
+    assert breaker.state() == OPEN
+
+    time.sleep(0.06)
+    assert breaker.call(lambda: "ok") == "ok"
+    assert breaker.state() == HALF_OPEN
+    assert breaker.call(lambda: "ok") == "ok"
+    assert breaker.state() == CLOSED
+    assert breaker.stats()["window_failure_rate"] == 0.0
+
+
+def test_abandoned_probes_do_not_pin_it_half_open():
+    breaker = CircuitBreaker("test", min_calls=2, open_seconds=0.05, half_open_calls=1)
+    _trip(breaker)
+    time.sleep(0.06)
+    assert breaker.allow() and not breaker.allow()
+    # The probe never calls record(); after another open_seconds a new one may go
+    time.sleep(0.06)
+    assert breaker.allow()
+    breaker.record(True, 0.01)
+    assert breaker.state() == CLOSED
@@ -0,0 +1,69 @@
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+pytest.importorskip("requests")
+
+import clients  # noqa: E402
+
+
+# Local server that sheds every request with 503 and counts them by method
+@pytest.fixture
+def shedding_server():
+    hits = {"GET": 0, "POST": 0}
+
+    class Handler(BaseHTTPRequestHandler):
+        def _shed(self):
+            hits[self.command] += 1
+            self.rfile.read(int(self.headers.get("Content-Length") or 0))
+            self.send_response(503)
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+
+        do_GET = do_POST = _shed
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    yield f"http://127.0.0.1:{server.server_address[1]}", hits
+    server.shutdown()
+    server.server_close()
+
+
+def test_posts_are_not_retried_on_5xx(shedding_server, monkeypatch):
+    url, hits = shedding_server
+    monkeypatch.setattr(clients, "BACKOFF_BASE", 0.0)
+    session = clients.get_http_session("test-shedding", retries=2)
+    try:
+        assert session.post(url + "/chat", json={"message": "hi"}, timeout=5).status_code == 503
+        assert hits["POST"] == 1
+        assert session.get(url + "/health", timeout=5).status_code == 503
+        assert hits["GET"] == 3
+    finally:
+        session.close()
+        clients._sessions.pop("test-shedding", None)
+
+
+def test_retry_call_only_retries_what_it_is_told_to(monkeypatch):
+    monkeypatch.setattr(clients, "backoff_delay", lambda attempt: 0)
+    calls = []
+
+    def flaky():
+        calls.append(1)
+        if len(calls) < 3:
+            raise TimeoutError("slow upstream")
+        return "ok"
+
+    assert clients.retry_call(flaky, retries=2) == "ok" and len(calls) == 3
+
+    calls.clear()
+    with pytest.raises(TimeoutError):
+        clients.retry_call(flaky, retries=2, should_retry=lambda exc: False)
+    assert len(calls) == 1
+
+
+def test_backoff_delay_is_capped():
+    assert all(0 <= clients.backoff_delay(attempt, base=0.25, cap=1.0) <= 1.0 for attempt in range(10))
@@ -0,0 +1,83 @@
+import pytest
+
+from context_window import ContextWindow, estimate_tokens, extractive_summary, render_context
+from history_store import HistoryStore
+
+
+@pytest.fixture
+def store(tmp_path):
+    store = HistoryStore(str(tmp_path / "history.db"), archive_dir=str(tmp_path / "archive"))
+    yield store
+    store.close()
+
+
+def _chat(store, chat_id, turns):
+    rows = []
+    for n in range(turns):
+        rows.append(("alice", chat_id, "user", f"question {n} " + "word " * 20))
+        rows.append(("alice", chat_id, "bot", f"answer {n} " + "word " * 20))
+    store.save_messages(rows)
+
+
+def test_short_chat_goes_in_verbatim(store):
+    _chat(store, "c1", 2)
+    store.save_message("alice", "c1", "user", "and now?")
+    context = ContextWindow(store).build("c1", "and now?")
+    # The current message, already saved by the page, is not repeated
+    assert [role for role, _ in context["turns"]] == ["user", "bot", "user", "bot"]
+    assert context["summary"] == "" and not context["slid"]
+    assert "Recent conversation:" in render_context(context)
+
+
+def test_window_slides_within_budget(store):
+    _chat(store, "c1", 20)
+    window = ContextWindow(store, token_budget=400, summary_budget=100)
+    context = window.build("c1", "next")
+    assert context["slid"] and context["summary"]
+    assert context["tokens"] + estimate_tokens("next") <= 400
+    assert context["turns"][-1][1].startswith("answer 19")
+
+    # The stored summary is reused: the next request doesn't slide again
+    through_id, summary = store.get_chat_summary("c1")
+    again = window.build("c1", "next")
+    assert not again["slid"] and again["summary"] == summary and again["turns"] == context["turns"]
+
+
+def test_catches_up_on_turns_older_than_max_turns(store):
+    _chat(store, "c1", 40)
+    summaries = []
+
+    def summarize(previous, turns, budget):
+        summaries.append(len(turns))
+        return extractive_summary(previous, turns, budget)
+
+    window = ContextWindow(store, summarize=summarize, token_budget=400, summary_budget=100, max_turns=10)
+    context = window.build("c1")
+    assert context["slid"]
+    # Every message older than the last window was folded in, a page at a time
+    assert sum(summaries) >= 70 and max(summaries) <= 10
+    through_id, _ = store.get_chat_summary("c1")
+    assert all(row[0] > through_id for row in store.load_messages("c1", limit=len(context["turns"])))
+
+
+def test_failing_summarizer_falls_back(store):
+    _chat(store, "c1", 20)
+
+    def summarize(previous, turns, budget):
+        raise RuntimeError("model unavailable")
+
+    context = ContextWindow(store, summarize=summarize, token_budget=400, summary_budget=100).build("c1")
+    assert context["summary"].startswith("- question")
+
+
+def test_accept_clamps_client_context():
+    window = ContextWindow(store=None, token_budget=200, summary_budget=50, max_turns=6)
+    turns = [["user", "x" * 80], ["bot", "y" * 80]] * 5
+    context = window.accept({"summary": "s" * 1000, "turns": turns}, current_message="hi")
+    assert len(context["summary"]) == 200
+    assert 0 < len(context["turns"]) <= 6 and context["turns"][-1] == ("bot", "y" * 80)
+    assert context["tokens"] - estimate_tokens(context["summary"]) <= 200 - 50 - estimate_tokens("hi")
+
+    assert window.accept({"summary": "", "turns": []}) == {"summary": "", "turns": [], "tokens": 0, "slid": False}
+    for malformed in (None, [], {"turns": "nope"}, {"turns": [["user"]]}, {"turns": [["user", 1]]}, {"summary": 5}):
+        assert window.accept(malformed) is None
@@ -0,0 +1,103 @@
+import hashlib
+import threading
+
+import pytest
+
+import credentials
+from credentials import (BoundedVerifier, CredentialService, LoginThrottle, VerifierBusy, hash_password,
+                         verify_password)
+from user_store import UserStore
+
+
+@pytest.fixture(autouse=True)
+def cheap_scrypt(monkeypatch):
+    monkeypatch.setattr(credentials, "SCRYPT_N", 2 ** 8)
+
+
+@pytest.fixture
+def store(tmp_path):
+    store = UserStore(str(tmp_path / "users.db"), legacy_json_path=None)
+    yield store
+    store.close()
+
+
+def test_hashes_are_salted_and_verify():
+    first, second = hash_password("s3cret"), hash_password("s3cret")
+    assert first != second
+    assert verify_password(first, "s3cret") == (True, False)
+    assert verify_password(first, "wrong") == (False, False)
+    # A different cost setting asks for a rehash
+    assert verify_password(first, "s3cret", n=2 ** 9) == (True, True)
+
+
+def test_legacy_sha256_login_upgrades_the_stored_hash(store):
+    store.create_user("alice", hashlib.sha256(b"pw").hexdigest())
+    service = CredentialService(store)
+    assert service.login("alice", "pw", "1.2.3.4") == (True, "")
+    assert store.get_password_hash("alice").startswith("scrypt$")
+    assert service.login("alice", "pw", "1.2.3.4") == (True, "")
+
+
+def test_failed_logins_are_throttled_per_user(store, monkeypatch):
+    monkeypatch.setattr(credentials, "MAX_FAILED_ATTEMPTS", 3)
+    store.create_user("bob", hash_password("right"))
+    service = CredentialService(store)
+    for _ in range(3):
+        assert service.login("bob", "wrong", "1.2.3.4")[1] == "Invalid username or password."
+    ok, message = service.login("bob", "right", "5.6.7.8")
+    assert not ok and message.startswith("Too many failed attempts")
+
+
+# Without a client address there is no shared "unknown" IP bucket to fill
+def test_unknown_client_address_is_not_one_shared_bucket(store, monkeypatch):
+    monkeypatch.setattr(credentials, "MAX_FAILED_ATTEMPTS_PER_IP", 2)
+    store.create_user("carol", hash_password("pw"))
+    service = CredentialService(store)
+    for name in ("x", "y", "z"):
+        service.login(name, "guess", "")
+    assert service.login("carol", "pw", "") == (True, "")
+
+
+def test_busy_verifier_is_reported_not_raised(store):
+    store.create_user("dave", hash_password("pw"))
+    release = threading.Event()
+    verifier = BoundedVerifier(workers=1, max_pending=0)
+    verifier.submit(release.wait, 5)
+    try:
+        ok, message = CredentialService(store, verifier=verifier).login("dave", "pw", "1.2.3.4")
+    finally:
+        release.set()
+    assert not ok and "busy" in message
+
+
+def test_verifier_timeout_raises_busy():
+    verifier = BoundedVerifier(workers=1, max_pending=1)
+    release = threading.Event()
+    try:
+        with pytest.raises(VerifierBusy):
+            verifier.run(release.wait, 5, timeout=0.05)
+    finally:
+        release.set()
+
+
+# A login that would upgrade a legacy hash still succeeds when the pool is busy
+def test_rehash_skipped_when_verifier_busy(store):
+    legacy = hashlib.sha256(b"pw").hexdigest()
+    store.create_user("erin", legacy)
+
+    class RehashBusy(BoundedVerifier):
+        def run(self, func, *args, timeout=None):
+            if func is hash_password:
+                raise VerifierBusy("busy")
+            return super().run(func, *args)
+
+    assert CredentialService(store, verifier=RehashBusy()).login("erin", "pw", "1.2.3.4") == (True, "")
+    assert store.get_password_hash("erin") == legacy
+
+
+def test_throttle_window_expires():
+    throttle = LoginThrottle(window=0.05)
+    throttle.record_failure("k")
+    assert throttle.retry_after("k", 1) > 0
+    threading.Event().wait(0.06)
+    assert throttle.retry_after("k", 1) == 0
@@ -0,0 +1,81 @@
+import json
+import os
+
+from crisis_triage import CrisisTriage, PhraseMatcher, normalize, render_crisis_reply
+
+
+def _write_lexicon(path, phrases):
+    lexicon = {
+        "message": "Please reach out.",
+        "contacts": [{"name": "Helpline", "phone": "555-0100"}],
+        "phrases": phrases,
+    }
+    with open(path, "w", encoding="utf-8") as file:
+        json.dump(lexicon, file)
+
+
+def test_matches_whole_words_only():
+    matcher = PhraseMatcher([("kill myself", "suicide"), ("kill", "violence"), ("suicide", "suicide")])
+    assert [category for _, _, category in matcher.find("i want to kill myself")] == ["suicide"]
+    assert matcher.find("killing time") == [] and matcher.find("suicidesquad") == []
+    # The longer phrase fails its boundary, so the shorter one still matches
+    assert [category for _, _, category in matcher.find("kill myselfie")] == ["violence"]
+    assert PhraseMatcher([]).find("anything") == []
+
+
+# Every phrase occurrence a word-by-word scan finds is covered by a match
+def test_agrees_with_a_naive_scan():
+    phrases = [("end my life", "suicide"), ("end it all", "suicide"), ("hurt myself", "self_harm"),
+               ("hurt", "pain"), ("no reason to live", "suicide")]
+    matcher = PhraseMatcher(phrases)
+    for text in ["i just want to end it all", "it doesn't hurt", "i might hurt myself tonight",
+                 "there's no reason to live and i'd end my life", "happy to be here", "endit all"]:
+        text = normalize(text)
+        words = text.split()
+        naive = []
+        for phrase, _ in phrases:
+            size = len(phrase.split())
+            for i in range(len(words) - size + 1):
+                if words[i:i + size] == phrase.split():
+                    start = len(" ".join(words[:i] + [""])) if i else 0
+                    naive.append((start, start + len(phrase)))
+        found = [(start, end) for start, end, _ in matcher.find(text)]
+        assert set(found) <= set(naive), text
+        assert all(any(start <= s < end for start, end in found) for s, _ in naive), text
+
+
+def test_check_normalizes_case_and_quotes(tmp_path):
+    path = str(tmp_path / "lexicon.json")
+    _write_lexicon(path, {"suicide": ["don't want to live"], "self_harm": ["cut myself"]})
+    triage = CrisisTriage(path, reload_seconds=0)
+    result = triage.check("I DON’T want  to live, I cut myself")
+    assert result["crisis"] and result["categories"] == ["self_harm", "suicide"]
+    assert render_crisis_reply(result) == "Please reach out.\nHelpline: 555-0100"
+    assert triage.check("a calm evening") is None
+    assert triage.stats()["checked"] == 2 and triage.stats()["matched"] == 1
+
+
+def test_reloads_changed_lexicon_and_keeps_the_last_good_one(tmp_path):
+    path = str(tmp_path / "lexicon.json")
+    _write_lexicon(path, {"suicide": ["end it all"]})
+    triage = CrisisTriage(path, reload_seconds=0)
+    assert triage.check("hopeless") is None
+
+    _write_lexicon(path, {"suicide": ["end it all"], "despair": ["hopeless"]})
+    os.utime(path, (os.path.getmtime(path) + 10,) * 2)
+    assert triage.check("hopeless")["categories"] == ["despair"]
+
+    with open(path, "w", encoding="utf-8") as file:
+        file.write("{not json")
+    os.utime(path, (os.path.getmtime(path) + 20,) * 2)
+    assert triage.check("hopeless")["categories"] == ["despair"]
+    stats = triage.stats()
+    assert stats["reloads"] == 1 and stats["reload_errors"] == 1
+
+
+def test_shipped_lexicon_loads():
+    lexicon_path = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "crisis_lexicon.json")
+    triage = CrisisTriage(lexicon_path)
+    assert triage.check("Sometimes I want to kill myself") is not None
+    assert triage.contacts()
+    assert triage.check("I feel fine today") is None
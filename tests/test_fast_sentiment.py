@@ -0,0 +1,53 @@
+import os
+
+import pytest
+
+np = pytest.importorskip("numpy")
+pd = pytest.importorskip("pandas")
+joblib = pytest.importorskip("joblib")
+pytest.importorskip("sklearn")
+
+from fast_sentiment import FastSentimentScorer  # noqa: E402
+from model_registry import export_artifacts  # noqa: E402
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+@pytest.fixture(scope="module")
+def sklearn_model():
+    model = joblib.load(os.path.join(ROOT, "sentiment_model.pkl"))
+    vectorizer = joblib.load(os.path.join(ROOT, "vectorizer.pkl"))
+    return model, vectorizer
+
+
+@pytest.fixture(scope="module")
+def texts():
+    return pd.read_csv(os.path.join(ROOT, "chatbot_data.csv"))["text"].dropna().astype(str).tolist()
+
+
+def assert_parity(scorer, model, vectorizer, texts):
+    features = vectorizer.transform(texts)
+    expected_labels = [str(label) for label in model.predict(features)]
+    assert [scorer.predict_one(text) for text in texts] == expected_labels
+    assert scorer.predict(texts) == expected_labels
+    assert np.abs(scorer.predict_proba(texts) - model.predict_proba(features)).max() < 1e-9
+
+
+# Every message in chatbot_data.csv gets sklearn's label and probabilities
+def test_numpy_scorer_matches_sklearn_on_chatbot_data(sklearn_model, texts):
+    model, vectorizer = sklearn_model
+    assert_parity(FastSentimentScorer.from_sklearn(model, vectorizer), model, vectorizer, texts)
+
+
+# The same holds for a scorer loaded from the exported .npy artifacts
+def test_scorer_from_artifacts_matches_sklearn(sklearn_model, texts, tmp_path):
+    model, vectorizer = sklearn_model
+    export_artifacts(model, vectorizer, str(tmp_path))
+    assert_parity(FastSentimentScorer.from_artifacts(str(tmp_path)), model, vectorizer, texts)
+
+
+def test_empty_and_unknown_text(sklearn_model):
+    model, vectorizer = sklearn_model
+    scorer = FastSentimentScorer.from_sklearn(model, vectorizer)
+    for text in ("", "zzzzqqq xxyyzz"):
+        assert scorer.predict_one(text) == str(model.predict(vectorizer.transform([text]))[0])
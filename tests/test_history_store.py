@@ -0,0 +1,196 @@
+import sqlite3
+import time
+
+import pytest
+
+from history_store import LEGACY_USER, SCHEMA_VERSION, HistoryStore, fts_query, mood_score
+
+
+@pytest.fixture
+def store(tmp_path):
+    store = HistoryStore(str(tmp_path / "history.db"), archive_dir=str(tmp_path / "archive"))
+    yield store
+    store.close()
+
+
+# A database written by the original app: one unindexed table, no user column
+@pytest.fixture
+def legacy_path(tmp_path):
+    path = str(tmp_path / "legacy.db")
+    conn = sqlite3.connect(path)
+    conn.execute("CREATE TABLE conversations (chat_id TEXT, role TEXT, message TEXT, timestamp TEXT)")
+    conn.executemany("INSERT INTO conversations VALUES (?, ?, ?, ?)", [
+        ("c1", "user", "hello there", "2024-01-02 10:00:00"),
+        ("c1", "bot", "hi, how are you?", "2024-01-02 10:00:05"),
+        ("c2", "user", "feeling low", "2024-01-03 09:00:00"),
+    ])
+    conn.commit()
+    conn.close()
+    return path
+
+
+def test_migrates_legacy_conversations(legacy_path):
+    store = HistoryStore(legacy_path)
+    try:
+        conn = store._connection()
+        assert conn.execute("PRAGMA user_version").fetchone()[0] == SCHEMA_VERSION
+        tables = {name for name, in conn.execute("SELECT name FROM sqlite_master WHERE type = 'table'")}
+        assert "conversations_legacy" in tables and "conversations" not in tables
+        assert [(role, message) for _, role, message, _ in store.load_messages("c1")] == [
+            ("user", "hello there"), ("bot", "hi, how are you?")
+        ]
+        assert [timestamp for _, _, timestamp in store.load_chat_history("c1")] == [
+            "2024-01-02 10:00:00", "2024-01-02 10:00:05"
+        ]
+    finally:
+        store.close()
+
+    # Opening it again must not copy the rows a second time
+    store = HistoryStore(legacy_path)
+    try:
+        assert len(store.load_messages("c1")) == 2
+    finally:
+        store.close()
+
+
+def test_legacy_chats_stay_hidden_until_claimed(legacy_path):
+    store = HistoryStore(legacy_path)
+    try:
+        assert store.get_sidebar_summary(LEGACY_USER) == ([], None)
+        assert store.search_messages(LEGACY_USER, "hello") == []
+        assert [(chat_id, count) for chat_id, _, _, count in store.get_legacy_chats()] == [("c1", 2), ("c2", 1)]
+
+        assert store.claim_legacy_chats({"c1": "alice", "c2": ""}) == 1
+        sessions, _ = store.get_sidebar_summary("alice")
+        assert [session["chat_id"] for session in sessions] == ["c1"]
+        assert [result["chat_id"] for result in store.search_messages("alice", "hello")] == ["c1"]
+        assert [chat_id for chat_id, _, _, _ in store.get_legacy_chats()] == ["c2"]
+
+        # Claimed chats are not up for grabs again
+        assert store.claim_legacy_chats({"c1": "mallory"}) == 0
+        assert store.get_sidebar_summary("mallory") == ([], None)
+    finally:
+        store.close()
+
+
+def test_save_messages_returns_their_ids(store):
+    ids = store.save_messages([
+        ("alice", "c1", "user", "first"),
+        ("alice", "c1", "bot", "second"),
+    ])
+    assert ids == [row[0] for row in store.load_messages("c1")]
+    assert store.save_message("alice", "c1", "user", "third") == ids[-1] + 1
+    assert store.save_messages([]) == []
+
+
+def test_sidebar_pages_through_every_chat_once(store):
+    # Five chats share a start time, so paging must break ties by chat id
+    store.save_messages(
+        [("alice", f"c{n}", "user", f"chat {n}", 1000.0 + min(n, 5)) for n in range(10)]
+        + [("alice", "c3", "bot", "reply", 2000.0), ("bob", "b1", "user", "not alice's", 1500.0)]
+    )
+    seen, cursor = [], None
+    while True:
+        sessions, cursor = store.get_sidebar_summary("alice", limit=3, before=cursor)
+        seen += sessions
+        if cursor is None:
+            break
+    assert [session["chat_id"] for session in seen] == ["c9", "c8", "c7", "c6", "c5", "c4", "c3", "c2", "c1", "c0"]
+    counts = {session["chat_id"]: session["message_count"] for session in seen}
+    assert counts["c3"] == 2 and counts["c0"] == 1
+    assert {session["title"] for session in seen if session["chat_id"] == "c3"} == {"chat 3"}
+
+
+def test_sidebar_cursor_is_none_on_an_exact_last_page(store):
+    store.save_messages([("alice", f"c{n}", "user", "hi", 1000.0 + n) for n in range(4)])
+    sessions, cursor = store.get_sidebar_summary("alice", limit=2)
+    assert cursor is not None
+    sessions, cursor = store.get_sidebar_summary("alice", limit=2, before=cursor)
+    assert [session["chat_id"] for session in sessions] == ["c1", "c0"] and cursor is None
+
+
+def test_fts_query_quotes_words_and_prefixes_the_last():
+    assert fts_query("feel anx") == '"feel" "anx"*'
+    # Operators and quotes are taken literally, not as FTS5 syntax
+    assert fts_query('NOT "sad" OR') == '"NOT" "sad" "OR"*'
+    assert fts_query("  ?! ** ") is None
+
+
+def test_search_is_scoped_to_the_user(store):
+    store.save_messages([
+        ("alice", "a1", "user", "I feel anxious about exams"),
+        ("alice", "a1", "bot", "Exams can be stressful"),
+        ("alice", "a2", "user", "Slept well, no anxiety today"),
+        ("bob", "b1", "user", "anxious bob"),
+    ])
+    results = store.search_messages("alice", "anxi")
+    assert {result["chat_id"] for result in results} == {"a1", "a2"}
+    assert all("<mark>" in result["snippet"] for result in results)
+    assert results[0]["title"] in ("I feel anxious about exams", "Slept well, no anxiety today")
+
+    assert [result["chat_id"] for result in store.search_messages("bob", "anxious")] == ["b1"]
+    assert store.search_messages("carol", "anxious") == [] and store.search_messages("ali", "anxious") == []
+    assert store.search_messages("", "anxious") == []
+    assert store.search_messages("alice", "exams") and store.search_messages("alice", "OR") == []
+
+
+def test_search_follows_deletes(store):
+    store.save_messages([("alice", "a1", "user", "remember the lighthouse")])
+    assert store.search_messages("alice", "lighthouse")
+    with store._connection() as conn:
+        conn.execute("DELETE FROM messages WHERE chat_id = 'a1'")
+    assert store.search_messages("alice", "lighthouse") == []
+
+
+# Epoch seconds for noon local time on a "YYYY-MM-DD" day
+def _local_noon(day):
+    return time.mktime(time.strptime(day + " 12:00:00", "%Y-%m-%d %H:%M:%S"))
+
+
+POSITIVE = {"label": "positive", "probabilities": {"positive": 0.8, "neutral": 0.15, "negative": 0.05}}
+NEGATIVE = {"label": "negative", "probabilities": {"positive": 0.1, "neutral": 0.2, "negative": 0.7}}
+
+
+def test_mood_rollups_follow_scoring(store):
+    # Wednesday and Thursday of one week, then the next Monday
+    ids = store.save_messages([
+        ("alice", "a1", "user", "great day", _local_noon("2024-01-03")),
+        ("alice", "a1", "user", "awful night", _local_noon("2024-01-03") + 60),
+        ("alice", "a2", "user", "ok", _local_noon("2024-01-04")),
+        ("alice", "a3", "user", "new week", _local_noon("2024-01-08")),
+    ])
+    assert store.get_mood_rollups("alice") == []
+
+    store.set_sentiment(ids[0], POSITIVE)
+    store.set_sentiment(ids[1], NEGATIVE)
+    store.set_sentiment(ids[3], POSITIVE)
+    days = store.get_mood_rollups("alice", "day")
+    assert [(day["period"], day["total"], day["positive"], day["negative"]) for day in days] == [
+        ("2024-01-03", 2, 1, 1), ("2024-01-08", 1, 1, 0)
+    ]
+    expected = (mood_score(POSITIVE["probabilities"]) + mood_score(NEGATIVE["probabilities"])) / 2
+    assert days[0]["mood"] == pytest.approx(expected)
+
+    # Rescoring moves the message between labels instead of counting it twice
+    store.set_sentiment(ids[1], POSITIVE)
+    weeks = store.get_mood_rollups("alice", "week")
+    assert [(week["period"], week["total"], week["positive"], week["negative"]) for week in weeks] == [
+        ("2024-01-01", 2, 2, 0), ("2024-01-08", 1, 1, 0)
+    ]
+    assert [day["period"] for day in store.get_mood_rollups("alice", since="2024-01-04")] == ["2024-01-08"]
+    assert store.get_mood_rollups("bob") == [] and store.get_mood_rollups("") == []
+
+
+def test_claimed_legacy_moods_move_to_their_user(legacy_path):
+    store = HistoryStore(legacy_path)
+    try:
+        message_id = store.load_messages("c2")[0][0]
+        store.set_sentiment(message_id, NEGATIVE)
+        assert store.get_mood_rollups("alice") == []
+        store.claim_legacy_chats({"c2": "alice"})
+        assert [(day["period"], day["negative"]) for day in store.get_mood_rollups("alice")] == [("2024-01-03", 1)]
+        # Nothing is left behind under the legacy owner
+        leftover = store._connection().execute("SELECT SUM(total) FROM mood_daily WHERE user_id = ''").fetchone()[0]
+        assert not leftover
+    finally:
+        store.close()
@@ -0,0 +1,63 @@
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from metrics import MetricsRegistry, SlowRequestProfiler
+
+
+def test_counter_and_histogram_render():
+    registry = MetricsRegistry()
+    errors = registry.counter("errors_total", "Errors", ("where",))
+    latency = registry.histogram("latency_seconds", "Latency", buckets=(0.1, 1.0))
+    errors.inc(where="youtube")
+    errors.inc(2, where="youtube")
+    latency.observe(0.5)
+    text = registry.render()
+    assert 'errors_total{where="youtube"} 3' in text
+    assert 'latency_seconds_bucket{le="0.1"} 0' in text
+    assert 'latency_seconds_bucket{le="1.0"} 1' in text
+    assert "latency_seconds_count 1" in text
+
+
+def test_multiprocess_totals_include_exited_workers_but_not_their_gauges(tmp_path):
+    directory = str(tmp_path)
+    pids = []
+    for requests in (1, 2):
+        pid = os.fork()
+        if pid == 0:
+            worker = MetricsRegistry()
+            counter = worker.counter("requests_total", "Requests")
+            worker.add_collector("queue", lambda: {"depth": 7})
+            counter.inc(requests)
+            worker.enable_multiprocess(directory, interval=0.1)
+            os._exit(0)
+        pids.append(pid)
+    for pid in pids:
+        os.waitpid(pid, 0)
+    time.sleep(0.4)  # the exited workers' files are now stale
+
+    registry = MetricsRegistry()
+    registry.counter("requests_total", "Requests").inc(4)
+    registry.add_collector("queue", lambda: {"depth": 1})
+    registry.enable_multiprocess(directory, interval=0.1)
+    text = registry.render()
+    assert "requests_total 7" in text
+    assert text.count("queue_depth{") == 1
+    assert f'queue_depth{{worker="{os.getpid()}"}} 1' in text
+
+
+def test_profiler_samples_wrapped_calls_on_other_threads(tmp_path):
+    output = tmp_path / "slow.folded"
+    profiler = SlowRequestProfiler(threshold_ms=1, interval_ms=2, output_path=str(output))
+
+    def slow_upstream_call():
+        time.sleep(0.2)
+
+    with ThreadPoolExecutor(1, thread_name_prefix="chat-io") as executor:
+        assert profiler.wrap(slow_upstream_call) is slow_upstream_call  # not inside a profile
+        with profiler.profile("POST /chat"):
+            executor.submit(profiler.wrap(slow_upstream_call)).result()
+    lines = output.read_text().splitlines()
+    assert any(line.startswith("POST /chat;[chat-io") and "slow_upstream_call" in line for line in lines)
+    assert threading.get_ident() not in profiler._active
@@ -0,0 +1,41 @@
+import os
+import subprocess
+import sys
+
+import pytest
+
+pytest.importorskip("numpy")
+pytest.importorskip("sklearn")
+joblib = pytest.importorskip("joblib")
+
+from model_registry import ModelRegistry, artifacts_exist  # noqa: E402
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+MODEL = os.path.join(ROOT, "sentiment_model.pkl")
+VECTORIZER = os.path.join(ROOT, "vectorizer.pkl")
+
+
+def test_scorer_builds_artifacts_from_pickles_on_a_miss(tmp_path):
+    registry = ModelRegistry(str(tmp_path), legacy_model_path=MODEL, legacy_vectorizer_path=VECTORIZER)
+    scorer = registry.get_scorer()
+    assert artifacts_exist(str(tmp_path))
+    assert registry.is_ready() and registry.status()["source"] == "pickle"
+    model, vectorizer = joblib.load(MODEL), joblib.load(VECTORIZER)
+    text = "I feel hopeless and tired"
+    assert scorer.predict_one(text) == str(model.predict(vectorizer.transform([text]))[0])
+
+
+# With artifacts on disk the scorer loads without importing sklearn or joblib
+def test_scorer_from_artifacts_does_not_import_sklearn(tmp_path):
+    ModelRegistry(str(tmp_path), legacy_model_path=MODEL, legacy_vectorizer_path=VECTORIZER).get_scorer()
+    code = (
+        "import sys\n"
+        "from model_registry import ModelRegistry\n"
+        f"registry = ModelRegistry({str(tmp_path)!r})\n"
+        "print(registry.get_scorer().predict_one('I feel great'), registry.status()['source'])\n"
+        "print(sorted(name for name in ('sklearn', 'joblib', 'scipy') if name in sys.modules))\n"
+    )
+    output = subprocess.run([sys.executable, "-c", code], cwd=ROOT, capture_output=True, text=True, check=True)
+    label_line, modules_line = output.stdout.strip().splitlines()[-2:]
+    assert label_line.endswith("artifacts")
+    assert modules_line == "[]"
@@ -0,0 +1,55 @@
+import time
+
+import pytest
+
+from response_cache import ResponseCache, cosine, normalize, term_vector
+
+
+def test_normalize_and_vectors():
+    assert normalize("  Oh, my   GOSH!!! ") == "oh my gosh"
+    vector = term_vector(["calm", "calm", "down"])
+    assert cosine(vector, vector) == pytest.approx(1.0)
+    assert cosine(vector, term_vector(["upset"])) == 0.0
+    assert term_vector([]) == {}
+
+
+def test_misses_until_enough_variants_then_rotates():
+    cache = ResponseCache(variants=3, min_variants=2)
+    assert cache.get("I feel sad", "negative") is None
+    cache.add("I feel sad", "negative", "first", generate_ms=100)
+    assert cache.get("i feel sad!", "negative") is None
+    cache.add("I feel sad", "negative", "second", generate_ms=300)
+    cache.add("I feel sad", "negative", "second")
+
+    assert [cache.get("I feel sad", "negative") for _ in range(3)] == ["first", "second", "first"]
+    # The sentiment label is part of the key
+    assert cache.get("I feel sad", "neutral") is None
+    stats = cache.stats()
+    assert stats["hits"] == 3 and stats["latency_saved_ms"] == 600.0
+
+
+def test_near_duplicates_share_an_entry():
+    cache = ResponseCache(similarity=0.8, min_variants=1)
+    cache.add("i am so stressed about my exams", "negative", "Exams are tough.")
+    assert cache.get("i am so stressed about my exams today", "negative") == "Exams are tough."
+    assert cache.get("i am excited about my holiday", "negative") is None
+    assert cache.stats()["near_hits"] == 1
+
+    exact_only = ResponseCache(similarity=1.0, min_variants=1)
+    exact_only.add("i am so stressed about my exams", "negative", "Exams are tough.")
+    assert exact_only.get("i am so stressed about my exams today", "negative") is None
+
+
+def test_ttl_size_and_length_limits():
+    cache = ResponseCache(ttl=0.05, max_entries=2, min_variants=1, max_chars=20)
+    cache.add("hello", "neutral", "hi")
+    time.sleep(0.06)
+    assert cache.get("hello", "neutral") is None
+
+    for message in ("one", "two", "three"):
+        cache.add(message, "neutral", message.upper())
+    assert cache.get("one", "neutral") is None and cache.get("three", "neutral") == "THREE"
+    assert cache.stats()["evictions"] == 1
+
+    cache.add("x" * 50, "neutral", "long")
+    assert cache.get("x" * 50, "neutral") is None and cache.stats()["skipped"] == 1
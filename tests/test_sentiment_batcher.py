@@ -0,0 +1,107 @@
+import threading
+import time
+
+import pytest
+
+from sentiment_batcher import SentimentBatcher, percentile
+
+
+def labels(texts):
+    return [f"label:{text}" for text in texts]
+
+
+def test_concurrent_submits_share_batches():
+    sizes = []
+
+    def score(texts):
+        sizes.append(len(texts))
+        return labels(texts)
+
+    batcher = SentimentBatcher(score, max_batch_size=8, max_wait_ms=50)
+    results = {}
+    threads = [threading.Thread(target=lambda i=i: results.__setitem__(i, batcher.submit(str(i))))
+               for i in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert results == {i: f"label:{i}" for i in range(8)}
+    assert len(sizes) < 8
+    batcher.stop()
+
+
+def test_submit_after_stop_starts_a_new_worker():
+    batcher = SentimentBatcher(labels, max_wait_ms=0)
+    assert batcher.submit("a") == "label:a"
+    batcher.stop()
+    assert batcher.submit("b", timeout=2) == "label:b"
+    batcher.stop()
+
+
+# stop() whose join times out mid-batch must not leave later submits waiting
+# behind the old worker
+def test_submit_after_stop_timeout_does_not_wait_for_the_old_worker():
+    release = threading.Event()
+
+    def score(texts):
+        if "slow" in texts:
+            release.wait(5)
+        return labels(texts)
+
+    batcher = SentimentBatcher(score, max_wait_ms=0)
+    slow = threading.Thread(target=lambda: batcher.submit("slow"))
+    slow.start()
+    time.sleep(0.05)
+    batcher.stop(timeout=0.05)
+    start = time.monotonic()
+    assert batcher.submit("fast", timeout=2) == "label:fast"
+    assert time.monotonic() - start < 1
+    release.set()
+    slow.join()
+    batcher.stop()
+
+
+def test_requests_queued_at_stop_fail_instead_of_timing_out():
+    release = threading.Event()
+
+    def score(texts):
+        release.wait(5)
+        return labels(texts)
+
+    batcher = SentimentBatcher(score, max_batch_size=1, max_wait_ms=0)
+    errors = []
+
+    def submit(text):
+        try:
+            batcher.submit(text, timeout=5)
+        except Exception as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=submit, args=(str(i),)) for i in range(3)]
+    for thread in threads:
+        thread.start()
+    time.sleep(0.1)
+    stopper = threading.Thread(target=batcher.stop, kwargs={"timeout": 0.1})
+    stopper.start()
+    stopper.join()
+    release.set()
+    for thread in threads:
+        thread.join()
+    assert len(errors) == 2
+    assert all(isinstance(e, RuntimeError) for e in errors)
+
+
+def test_scoring_error_reaches_every_caller_in_the_batch():
+    def fail(texts):
+        raise ValueError("model broken")
+
+    batcher = SentimentBatcher(fail, max_wait_ms=0)
+    with pytest.raises(ValueError):
+        batcher.submit("x")
+    batcher.stop()
+
+
+def test_percentile_nearest_rank():
+    assert percentile([], 50) == 0.0
+    assert percentile([1, 2, 3, 4], 50) == 2
+    assert percentile([1, 2, 3, 4], 99) == 4
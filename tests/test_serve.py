@@ -0,0 +1,62 @@
+import threading
+
+import pytest
+
+pytest.importorskip("gunicorn")
+
+from serve import ConcurrencyLimiter  # noqa: E402
+
+
+# Like a WSGI server: read the whole body, then close it (which frees the slot)
+def call(app, path):
+    statuses = []
+    result = app({"PATH_INFO": path}, lambda status, headers: statuses.append(status))
+    try:
+        body = b"".join(result)
+    finally:
+        if hasattr(result, "close"):
+            result.close()
+    return statuses[0], body
+
+
+def test_requests_beyond_slots_and_queue_get_503_but_health_checks_pass():
+    release, entered = threading.Event(), threading.Event()
+
+    def app(environ, start_response):
+        if environ["PATH_INFO"] == "/chat":
+            entered.set()
+            release.wait(5)
+        start_response("200 OK", [])
+        return [b"ok"]
+
+    limiter = ConcurrencyLimiter(app, max_concurrent=1, max_queue=0, queue_timeout=0.1)
+    busy = threading.Thread(target=call, args=(limiter, "/chat"))
+    busy.start()
+    assert entered.wait(5)
+    assert call(limiter, "/chat")[0].startswith("503")
+    assert call(limiter, "/ready") == ("200 OK", b"ok")
+    release.set()
+    busy.join()
+    assert limiter.wait_idle(1)
+    stats = limiter.stats()
+    assert stats["admitted"] == 1 and stats["rejected_queue_full"] == 1 and stats["in_flight"] == 0
+
+
+def test_queued_request_gets_the_slot_when_it_frees_up():
+    release = threading.Event()
+
+    def app(environ, start_response):
+        release.wait(5)
+        start_response("200 OK", [])
+        return [b"ok"]
+
+    limiter = ConcurrencyLimiter(app, max_concurrent=1, max_queue=1, queue_timeout=5)
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(call(limiter, "/chat")[0])) for _ in range(2)]
+    for thread in threads:
+        thread.start()
+    release.set()
+    for thread in threads:
+        thread.join()
+    assert results == ["200 OK", "200 OK"]
+    assert limiter.stats()["queued"] == 1
@@ -0,0 +1,25 @@
+import static_assets
+from static_assets import AVATAR, STYLESHEET, asset_url, has_asset, image_markup, stylesheet_markup
+
+
+def test_shipped_assets_are_small():
+    assert has_asset(STYLESHEET) and has_asset(AVATAR)
+    assert len(static_assets.read_asset(AVATAR)) < 200_000
+
+
+def test_urls_carry_a_content_hash(tmp_path, monkeypatch):
+    monkeypatch.setattr(static_assets, "STATIC_DIR", str(tmp_path))
+    # URLs and contents are cached per process; start from a clean cache
+    static_assets.read_asset.cache_clear()
+    static_assets.asset_url.cache_clear()
+    (tmp_path / "a.css").write_text("body { color: red }")
+    (tmp_path / "b.css").write_text("body { color: blue }")
+    try:
+        assert asset_url("a.css").startswith("app/static/a.css?v=")
+        assert asset_url("a.css").split("?v=")[1] != asset_url("b.css").split("?v=")[1]
+        assert stylesheet_markup("a.css") == f'<link rel="stylesheet" href="{asset_url("a.css")}">'
+        assert stylesheet_markup("a.css", inline=True) == "<style>body { color: red }</style>"
+        assert image_markup("a.css", alt="x", css_class="y").startswith('<img src="app/static/a.css?v=')
+    finally:
+        static_assets.read_asset.cache_clear()
+        static_assets.asset_url.cache_clear()
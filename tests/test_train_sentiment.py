@@ -0,0 +1,55 @@
+import numpy as np
+import pytest
+
+pytest.importorskip("sklearn")
+pytest.importorskip("pandas")
+
+import train_sentiment  # noqa: E402
+from train_sentiment import LabelCache, Labeler, StageTimer, train_tfidf  # noqa: E402
+
+ROWS = [
+    ("i love this, it is great", "positive"),
+    ("what a terrible awful day", "negative"),
+    ("the bus comes at nine", "neutral"),
+    ("great friends and a great evening", "positive"),
+    ("i hate feeling this sad", "negative"),
+    ("the meeting is on tuesday", "neutral"),
+    ("so happy and grateful today", "positive"),
+]
+
+
+@pytest.fixture
+def dataset(tmp_path):
+    path = tmp_path / "data.csv"
+    path.write_text("text,label\n" + "".join(f'"{text}",{label}\n' for text, label in ROWS))
+    return str(path)
+
+
+# Training chunk by chunk gives the model a single read would
+def test_chunk_size_does_not_change_the_model(dataset):
+    models = [train_tfidf(Labeler("column"), dataset, chunk_size=size) for size in (2, 1000)]
+    (small, small_vectorizer), (whole, whole_vectorizer) = models
+    assert small_vectorizer.vocabulary_ == whole_vectorizer.vocabulary_
+    assert np.allclose(small.coef_, whole.coef_)
+
+
+def test_polarity_is_computed_once_per_text(tmp_path, monkeypatch):
+    scored = []
+
+    def fake_batch(texts):
+        scored.extend(texts)
+        return [1.0 if "good" in text else -1.0 for text in texts]
+
+    monkeypatch.setattr(train_sentiment, "_polarity_batch", fake_batch)
+    cache = LabelCache(str(tmp_path / "labels.db"))
+    timer = StageTimer()
+    labeler = Labeler(cache=cache, timer=timer)
+    texts = ["good morning", "bad news", "good morning"]
+    assert labeler._polarities(texts) == [1.0, -1.0, 1.0]
+    assert sorted(scored) == ["bad news", "good morning"]
+
+    # A later run reads every score back from the cache
+    assert Labeler(cache=cache, timer=timer)._polarities(texts + ["good night"]) == [1.0, -1.0, 1.0, 1.0]
+    assert scored[2:] == ["good night"]
+    assert timer.counters == {"cache hits": 3, "labeled": 3}
+    cache.close()
@@ -0,0 +1,40 @@
+from transcript_cache import TranscriptCache, bubble_html
+
+
+class FakeStore:
+    def __init__(self, rows):
+        self.rows = rows  # [(id, role, message, created_at)]
+
+    def load_messages(self, chat_id, limit=None, before_id=None, after_id=None):
+        rows = [row for row in self.rows
+                if (before_id is None or row[0] < before_id) and (after_id is None or row[0] > after_id)]
+        return rows[-limit:] if limit else rows
+
+
+def test_bubble_escapes_markup_and_keeps_line_breaks():
+    html = bubble_html("bot", "Try this:\n\n    <script>x</script> & breathe", "10:00")
+    assert "<script>" not in html
+    assert "&lt;script&gt;" in html and "&amp;" in html
+    assert "\n" not in html
+    assert html.count("<br>") == 3
+
+
+def test_blank_line_in_one_message_leaves_no_blank_line_in_transcript():
+    store = FakeStore([(1, "bot", "first\n\nparagraph", 0.0), (2, "user", "next", 1.0)])
+    cache = TranscriptCache("chat", page_size=10)
+    cache.refresh(store)
+    transcript = cache.html()
+    assert "\n\n" not in transcript
+    assert transcript.count('<div class="') == 2
+
+
+def test_refresh_appends_only_new_messages_and_pages_backwards():
+    rows = [(i, "user", f"m{i}", float(i)) for i in range(1, 8)]
+    store = FakeStore(rows)
+    cache = TranscriptCache("chat", page_size=3)
+    assert cache.refresh(store) == 3
+    assert [id_ for id_, _ in cache.entries] == [5, 6, 7] and cache.has_earlier
+    store.rows.append((8, "bot", "m8", 8.0))
+    assert cache.refresh(store) == 1
+    assert cache.load_earlier(store) == 3
+    assert [id_ for id_, _ in cache.entries] == [2, 3, 4, 5, 6, 7, 8]
@@ -0,0 +1,48 @@
+import json
+import threading
+
+from user_store import UserStore
+
+
+def test_usernames_are_unique_under_concurrent_signups(tmp_path):
+    store = UserStore(str(tmp_path / "users.db"), legacy_json_path=None)
+    results = []
+    barrier = threading.Barrier(8)
+
+    def signup(n):
+        barrier.wait()
+        results.append((n, store.create_user("alice", f"hash-{n}")))
+        store.close()
+
+    threads = [threading.Thread(target=signup, args=(n,)) for n in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    winners = [n for n, created in results if created]
+    assert len(winners) == 1
+    assert store.get_password_hash("alice") == f"hash-{winners[0]}"
+    assert store.get_password_hash("bob") is None and store.count_users() == 1
+
+
+def test_migrates_users_json_once(tmp_path):
+    json_path = tmp_path / "users.json"
+    json_path.write_text(json.dumps({"alice": "hash-a", "bob": "hash-b"}))
+    db_path = str(tmp_path / "users.db")
+    store = UserStore(db_path, legacy_json_path=str(json_path))
+    assert store.count_users() == 2 and store.get_password_hash("bob") == "hash-b"
+
+    # Later edits to the file are not imported again, and existing users are kept
+    store.set_password_hash("alice", "new-hash")
+    json_path.write_text(json.dumps({"alice": "hash-a", "carol": "hash-c"}))
+    assert UserStore(db_path, legacy_json_path=str(json_path)).count_users() == 2
+    assert store.migrate_from_json(str(json_path), force=True) == 1
+    assert store.get_password_hash("alice") == "new-hash" and store.get_password_hash("carol") == "hash-c"
+
+
+def test_corrupt_users_json_is_skipped(tmp_path):
+    json_path = tmp_path / "users.json"
+    json_path.write_text("{not json")
+    store = UserStore(str(tmp_path / "users.db"), legacy_json_path=str(json_path))
+    assert store.count_users() == 0
@@ -0,0 +1,84 @@
+import threading
+import time
+
+import pytest
+
+from history_store import HistoryStore
+from write_behind import QueuedMessage, WriteBehindStore
+
+
+# HistoryStore whose batch writes block until `release` is set
+class GatedStore(HistoryStore):
+    def __init__(self, path):
+        super().__init__(path)
+        self.release = threading.Event()
+        self.batches = []
+
+    def save_messages(self, rows):
+        self.release.wait(5)
+        self.batches.append(len(rows))
+        return super().save_messages(rows)
+
+
+@pytest.fixture
+def gated(tmp_path):
+    store = GatedStore(str(tmp_path / "history.db"))
+    yield store
+    store.release.set()
+    store.close()
+
+
+def test_queued_rows_commit_in_batches_with_ids(gated):
+    writer = WriteBehindStore(gated, batch_size=100)
+    tickets = writer.save_messages([("alice", "c1", "user", f"message {n}") for n in range(10)])
+    assert all(isinstance(ticket, QueuedMessage) for ticket in tickets)
+    assert tickets[0].wait(0) is None
+    gated.release.set()
+    writer.close()
+
+    rows = gated.load_messages("c1")
+    assert [ticket.wait(0) for ticket in tickets] == [row[0] for row in rows]
+    assert [row[2] for row in rows] == [f"message {n}" for n in range(10)]
+    # The writer took at most the first row alone, then the rest together
+    assert len(gated.batches) <= 2 and sum(gated.batches) == 10
+    stats = writer.stats()
+    assert stats["written"] == 10 and stats["queue_depth"] == 0 and stats["pending"] == 0
+
+
+def test_reads_wait_for_their_own_writes(gated):
+    writer = WriteBehindStore(gated)
+    writer.save_message("alice", "c1", "user", "hello")
+    assert not writer.wait(chat_id="c1", timeout=0.05)
+    # Nothing queued for another chat or user, so those reads don't wait
+    assert writer.wait(chat_id="c2", timeout=0) and writer.wait(user_id="bob", timeout=0)
+
+    threading.Timer(0.05, gated.release.set).start()
+    assert [row[2] for row in writer.load_messages("c1")] == ["hello"]
+    sessions, _ = writer.get_sidebar_summary("alice")
+    assert [session["chat_id"] for session in sessions] == ["c1"]
+    writer.close()
+
+
+def test_full_queue_writes_directly_after_queued_rows(gated):
+    writer = WriteBehindStore(gated, max_queue=1, queue_timeout=0.01)
+    first = writer.save_message("alice", "c1", "user", "first")
+    # The writer holds "first" behind the gate; fill the queue with "second"
+    while writer.stats()["queue_depth"]:
+        time.sleep(0.001)
+    second = writer.save_message("alice", "c1", "bot", "second")
+    threading.Timer(0.05, gated.release.set).start()
+    third = writer.save_message("alice", "c1", "user", "third")
+    writer.close()
+
+    assert writer.stats()["direct_writes"] == 1
+    assert [row[2] for row in gated.load_messages("c1")] == ["first", "second", "third"]
+    assert first.wait(0) < second.wait(0) < third.wait(0)
+
+
+def test_set_sentiment_waits_for_the_row(gated):
+    writer = WriteBehindStore(gated)
+    ticket = writer.save_message("alice", "c1", "user", "great day")
+    threading.Timer(0.05, gated.release.set).start()
+    assert writer.set_sentiment(ticket, {"label": "positive", "probabilities": {"positive": 1.0}}) == 1
+    assert [day["positive"] for day in writer.get_mood_rollups("alice")] == [1]
+    writer.close()
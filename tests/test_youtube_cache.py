@@ -0,0 +1,85 @@
+import threading
+import time
+
+from youtube_cache import MemoryBackend, RecommendationCache, SQLiteBackend
+
+
+# fetch_videos stand-in that counts calls and can be held until `release` is set
+class FakeSearch:
+    def __init__(self):
+        self.calls = 0
+        self.release = threading.Event()
+        self.release.set()
+
+    def __call__(self, query, count):
+        self.calls += 1
+        self.release.wait(5)
+        return [{"title": f"{query} {n}", "url": f"https://youtu.be/{query}{n}"} for n in range(count)]
+
+
+def test_fresh_hits_rotate_through_the_pool():
+    search = FakeSearch()
+    cache = RecommendationCache(search, pool_size=3)
+    titles = [cache.get("calm")["title"] for _ in range(4)]
+    assert titles == ["calm 0", "calm 1", "calm 2", "calm 0"]
+    assert search.calls == 1
+    stats = cache.stats()
+    assert stats["misses"] == 1 and stats["hits"] == 3 and stats["api_calls_saved"] == 3
+
+
+def test_stale_entry_is_served_while_it_refreshes():
+    search = FakeSearch()
+    backend = MemoryBackend()
+    backend.set("calm", {"videos": [{"title": "old"}], "fetched_at": time.time() - 100})
+    cache = RecommendationCache(search, backend=backend, ttl=10, stale_ttl=1000)
+    assert cache.get("calm")["title"] == "old"
+    for _ in range(100):
+        if cache.stats()["refreshes"]:
+            break
+        time.sleep(0.01)
+    assert search.calls == 1 and backend.get("calm")["videos"][0]["title"] == "calm 0"
+
+
+def test_concurrent_misses_share_one_fetch():
+    search = FakeSearch()
+    search.release.clear()
+    cache = RecommendationCache(search)
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(cache.get("calm"))) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    while cache.stats()["coalesced_misses"] < 7:
+        time.sleep(0.001)
+    search.release.set()
+    for thread in threads:
+        thread.join()
+    assert search.calls == 1 and len(results) == 8 and all(results)
+
+
+def test_failed_refetch_keeps_serving_the_old_entry():
+    def failing(query, count):
+        raise RuntimeError("quota exceeded")
+
+    backend = MemoryBackend()
+    backend.set("calm", {"videos": [{"title": "old"}], "fetched_at": 0})
+    cache = RecommendationCache(failing, backend=backend, ttl=10, stale_ttl=10)
+    assert cache.get("calm")["title"] == "old"
+    assert cache.stats()["refresh_errors"] == 1
+
+
+def test_sqlite_backend_hits_do_not_write_and_eviction_is_lru(tmp_path):
+    path = str(tmp_path / "videos.db")
+    backend = SQLiteBackend(path, max_entries=2, touch_interval=3600, touch_batch=1000)
+    backend.set("a", {"videos": [1], "fetched_at": 1.0})
+    backend.set("b", {"videos": [2], "fetched_at": 1.0})
+    changes = backend._conn.total_changes
+    for _ in range(10):
+        assert backend.get("a") == {"videos": [1], "fetched_at": 1.0}
+    assert backend._conn.total_changes == changes
+
+    # "a" was used more recently than "b", so adding "c" evicts "b"
+    backend.set("c", {"videos": [3], "fetched_at": 1.0})
+    assert backend.get("b") is None and backend.get("a") and backend.get("c")
+
+    reopened = SQLiteBackend(path)
+    assert reopened.get("a") == {"videos": [1], "fetched_at": 1.0}
@@ -0,0 +1,246 @@
+import argparse
+import hashlib
+import os
+import sqlite3
+import time
+from contextlib import contextmanager
+from concurrent.futures import ProcessPoolExecutor
+
+# Sentiment model training pipeline. The CSV is read in chunks; rows are
+# labeled either by TextBlob polarity (the original behaviour, spread across
+# a process pool) or by the CSV's own `label` column. Polarity scores are
+# cached in SQLite by text hash, so retraining on an appended dataset only
+# runs TextBlob on the new rows.
+#
+#   tfidf    TfidfVectorizer + LogisticRegression, exported as versioned
+#            artifacts (model_registry.py) and the legacy pickles
+#   hashing  HashingVectorizer + SGDClassifier.partial_fit, one chunk at a
+#            time, for datasets that do not fit in memory (saved as pickles)
+#
+# Run from the repo root: python train_sentiment.py --help
+
+DATASET_PATH = "chatbot_data.csv"
+LABEL_CACHE_PATH = "label_cache.db"
+CHUNK_SIZE = 5000
+LABEL_BATCH_SIZE = 500
+MAX_FEATURES = 500
+HASHING_FEATURES = 2 ** 18
+TEXTBLOB_CLASSES = ["negative", "neutral", "positive"]
+
+
+def text_hash(text):
+    return hashlib.sha1(text.encode()).hexdigest()
+
+
+def polarity_label(score):
+    return "positive" if score > 0 else "negative" if score < 0 else "neutral"
+
+
+# Runs in pool workers
+def _polarity_batch(texts):
+    from textblob import TextBlob
+    return [TextBlob(text).sentiment.polarity for text in texts]
+
+
+# TextBlob polarity keyed by sha1(text)
+class LabelCache:
+    def __init__(self, path=LABEL_CACHE_PATH):
+        self.conn = sqlite3.connect(path)
+        self.conn.execute("CREATE TABLE IF NOT EXISTS polarity (text_hash TEXT PRIMARY KEY, score REAL NOT NULL)")
+        self.conn.commit()
+
+    def get_many(self, hashes):
+        found = {}
+        unique = list(set(hashes))
+        for i in range(0, len(unique), 500):
+            batch = unique[i:i + 500]
+            placeholders = ",".join("?" * len(batch))
+            found.update(self.conn.execute(
+                f"SELECT text_hash, score FROM polarity WHERE text_hash IN ({placeholders})", batch
+            ))
+        return found
+
+    def put_many(self, items):
+        with self.conn:
+            self.conn.executemany("INSERT OR REPLACE INTO polarity (text_hash, score) VALUES (?, ?)", items)
+
+    def close(self):
+        self.conn.close()
+
+
+# Accumulated wall time and counters per stage
+class StageTimer:
+    def __init__(self):
+        self.seconds = {}
+        self.counters = {}
+
+    @contextmanager
+    def stage(self, name):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.seconds[name] = self.seconds.get(name, 0.0) + time.perf_counter() - start
+
+    def count(self, name, n=1):
+        self.counters[name] = self.counters.get(name, 0) + n
+
+    def report(self):
+        lines = [f"{name:<12} {seconds:8.2f}s" for name, seconds in self.seconds.items()]
+        lines += [f"{name:<12} {value:>8}" for name, value in self.counters.items()]
+        return "\n".join(lines)
+
+
+class Labeler:
+    def __init__(self, source="textblob", cache=None, pool=None, timer=None):
+        self.source = source
+        self.cache = cache
+        self.pool = pool
+        self.timer = timer or StageTimer()
+
+    def _polarities(self, texts):
+        hashes = [text_hash(text) for text in texts]
+        cached = self.cache.get_many(hashes) if self.cache else {}
+        missing = {}
+        for h, text in zip(hashes, texts):
+            if h not in cached:
+                missing.setdefault(h, text)
+        self.timer.count("cache hits", sum(1 for h in hashes if h in cached))
+        self.timer.count("labeled", len(missing))
+
+        if missing:
+            pending = list(missing.items())
+            batches = [[text for _, text in pending[i:i + LABEL_BATCH_SIZE]]
+                       for i in range(0, len(pending), LABEL_BATCH_SIZE)]
+            mapper = self.pool.map if self.pool else map
+            scores = [score for batch in mapper(_polarity_batch, batches) for score in batch]
+            computed = [(h, score) for (h, _), score in zip(pending, scores)]
+            cached.update(computed)
+            if self.cache:
+                self.cache.put_many(computed)
+        return [cached[h] for h in hashes]
+
+    def labels(self, chunk):
+        if self.source == "column":
+            return [str(label) for label in chunk["label"]]
+        return [polarity_label(score) for score in self._polarities(chunk["text"].tolist())]
+
+
+def read_chunks(path, chunk_size):
+    import pandas as pd
+    if not os.path.exists(path):
+        raise FileNotFoundError(f"Dataset file '{path}' not found!")
+    for chunk in pd.read_csv(path, chunksize=chunk_size):
+        chunk["text"] = chunk["text"].fillna("").astype(str)
+        yield chunk
+
+
+def train_tfidf(labeler, dataset_path=DATASET_PATH, chunk_size=CHUNK_SIZE, max_features=MAX_FEATURES):
+    from sklearn.feature_extraction.text import TfidfVectorizer
+    from sklearn.linear_model import LogisticRegression
+
+    timer = labeler.timer
+    texts, labels = [], []
+    chunks = read_chunks(dataset_path, chunk_size)
+    while True:
+        with timer.stage("read"):
+            chunk = next(chunks, None)
+        if chunk is None:
+            break
+        with timer.stage("label"):
+            labels.extend(labeler.labels(chunk))
+        texts.extend(chunk["text"])
+        timer.count("rows", len(chunk))
+
+    with timer.stage("vectorize"):
+        vectorizer = TfidfVectorizer(max_features=max_features)
+        X = vectorizer.fit_transform(texts)
+    with timer.stage("fit"):
+        model = LogisticRegression()
+        model.fit(X, labels)
+    return model, vectorizer
+
+
+def train_hashing(labeler, dataset_path=DATASET_PATH, chunk_size=CHUNK_SIZE, n_features=HASHING_FEATURES, classes=None):
+    import pandas as pd
+    from sklearn.feature_extraction.text import HashingVectorizer
+    from sklearn.linear_model import SGDClassifier
+
+    timer = labeler.timer
+    if classes is None:
+        if labeler.source == "column":
+            classes = sorted({str(label) for label in pd.read_csv(dataset_path, usecols=["label"])["label"]})
+        else:
+            classes = TEXTBLOB_CLASSES
+
+    vectorizer = HashingVectorizer(n_features=n_features, alternate_sign=False, norm="l2")
+    model = SGDClassifier(loss="log_loss")
+    chunks = read_chunks(dataset_path, chunk_size)
+    while True:
+        with timer.stage("read"):
+            chunk = next(chunks, None)
+        if chunk is None:
+            break
+        with timer.stage("label"):
+            labels = labeler.labels(chunk)
+        with timer.stage("vectorize"):
+            X = vectorizer.transform(chunk["text"])
+        with timer.stage("fit"):
+            model.partial_fit(X, labels, classes=classes)
+        timer.count("rows", len(chunk))
+    return model, vectorizer
+
+
+# Train with the defaults backend.py has always used: TextBlob labels and a
+# 500-term TF-IDF vocabulary
+def train(dataset_path=DATASET_PATH, label_source="textblob", label_cache_path=LABEL_CACHE_PATH, workers=None,
+          chunk_size=CHUNK_SIZE, mode="tfidf", timer=None):
+    cache = LabelCache(label_cache_path) if label_cache_path and label_source == "textblob" else None
+    workers = workers if workers is not None else os.cpu_count() or 1
+    pool = ProcessPoolExecutor(max_workers=workers) if workers > 1 and label_source == "textblob" else None
+    labeler = Labeler(label_source, cache=cache, pool=pool, timer=timer)
+    try:
+        if mode == "hashing":
+            return train_hashing(labeler, dataset_path, chunk_size)
+        return train_tfidf(labeler, dataset_path, chunk_size)
+    finally:
+        if pool:
+            pool.shutdown()
+        if cache:
+            cache.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Train the sentiment model.")
+    parser.add_argument("--data", default=DATASET_PATH)
+    parser.add_argument("--mode", choices=("tfidf", "hashing"), default="tfidf")
+    parser.add_argument("--labels", choices=("textblob", "column"), default="textblob",
+                        help="TextBlob polarity (default) or the CSV's label column")
+    parser.add_argument("--label-cache", default=LABEL_CACHE_PATH, help="SQLite polarity cache ('' to disable)")
+    parser.add_argument("--workers", type=int, default=None, help="labeling processes (default: CPU count)")
+    parser.add_argument("--chunk-size", type=int, default=CHUNK_SIZE)
+    parser.add_argument("--artifacts", default="model_artifacts", help="versioned artifact directory (tfidf mode)")
+    parser.add_argument("--model-out", default=None,
+                        help="default: sentiment_model.pkl (tfidf) or sentiment_model_hashing.pkl (hashing)")
+    parser.add_argument("--vectorizer-out", default=None,
+                        help="default: vectorizer.pkl (tfidf) or vectorizer_hashing.pkl (hashing)")
+    args = parser.parse_args()
+    # The backend loads sentiment_model.pkl / vectorizer.pkl and needs a
+    # vocabulary, so hashing models are kept next to them, not over them
+    suffix = "_hashing" if args.mode == "hashing" else ""
+    args.model_out = args.model_out or f"sentiment_model{suffix}.pkl"
+    args.vectorizer_out = args.vectorizer_out or f"vectorizer{suffix}.pkl"
+
+    import joblib
+
+    timer = StageTimer()
+    start = time.perf_counter()
+    model, vectorizer = train(args.data, args.labels, args.label_cache, args.workers, args.chunk_size, args.mode, timer)
+    with timer.stage("save"):
+        if args.mode == "tfidf":
+            from model_registry import export_artifacts
+            print(f"✅ Wrote model artifacts to {export_artifacts(model, vectorizer, args.artifacts)}")
+        joblib.dump(model, args.model_out)
+        joblib.dump(vectorizer, args.vectorizer_out)
+    print(timer.report())
+    print(f"{'total':<12} {time.perf_counter() - start:8.2f}s")
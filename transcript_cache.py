@@ -0,0 +1,88 @@
+import html
+from datetime import datetime
+
+# Per-session cache of a chat transcript that has already been formatted to
+# HTML. Only the last page of messages is loaded at first; later reruns fetch
+# just the messages written since (by id), and older pages are prepended on
+# request. Kept free of Streamlit so it can be benchmarked on its own.
+
+PAGE_SIZE = 50
+
+
+# A message as HTML: escaped, with its line breaks kept. Nothing in the
+# result starts a new markdown block, so one message can't break the bubbles
+# after it when the transcript is rendered as a single st.markdown call.
+def message_html(msg):
+    return html.escape(msg).replace("\r\n", "\n").replace("\n", "<br>")
+
+
+# Chat bubble markup around body, which must already be HTML
+def bubble_markup(role, body, time_label):
+    css_class = "user-bubble" if role == "user" else "bot-bubble"
+    return f'<div class="{css_class}"><b>{time_label}</b><br>{body}</div>'
+
+
+# Chat bubble markup for one message
+def bubble_html(role, msg, time_label):
+    return bubble_markup(role, message_html(msg), time_label)
+
+
+def format_message(role, message, created_at):
+    return bubble_html(role, message, datetime.fromtimestamp(created_at).strftime("%H:%M"))
+
+
+class TranscriptCache:
+    def __init__(self, chat_id, page_size=PAGE_SIZE):
+        self.chat_id = chat_id
+        self.page_size = page_size
+        self.entries = []  # [(message id, bubble html)], oldest first
+        self.has_earlier = False
+        self.loaded = False
+        self._html = None
+
+    @property
+    def oldest_id(self):
+        return self.entries[0][0] if self.entries else None
+
+    @property
+    def newest_id(self):
+        return self.entries[-1][0] if self.entries else None
+
+    def _format(self, rows):
+        return [(message_id, format_message(role, message, created_at))
+                for message_id, role, message, created_at in rows]
+
+    def _load_page(self, store, before_id=None):
+        # One extra row tells us whether there is an earlier page
+        rows = store.load_messages(self.chat_id, limit=self.page_size + 1, before_id=before_id)
+        self.has_earlier = len(rows) > self.page_size
+        return rows[-self.page_size:] if self.has_earlier else rows
+
+    # Bring the cache up to date; returns the number of new messages
+    def refresh(self, store):
+        if not self.loaded:
+            rows = self._load_page(store)
+            self.loaded = True
+        elif self.entries:
+            rows = store.load_messages(self.chat_id, after_id=self.newest_id)
+        else:
+            rows = self._load_page(store)
+        if rows:
+            self.entries.extend(self._format(rows))
+            self._html = None
+        return len(rows)
+
+    # Prepend the previous page; returns the number of messages added
+    def load_earlier(self, store):
+        if not self.has_earlier or not self.entries:
+            return 0
+        rows = self._load_page(store, before_id=self.oldest_id)
+        self.entries[:0] = self._format(rows)
+        self._html = None
+        return len(rows)
+
+    # The whole cached transcript as one HTML block
+    def html(self):
+        if self._html is None:
+            self._html = "".join(html for _, html in self.entries)
+        return self._html
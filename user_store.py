@@ -0,0 +1,131 @@
+import argparse
+import json
+import os
+import sqlite3
+import threading
+import time
+
+# User accounts in SQLite with a unique index on username. Lookups go through
+# the index instead of parsing a JSON file, and registration is a single
+# atomic INSERT, so concurrent signups cannot overwrite each other.
+
+DB_PATH = "users.db"
+LEGACY_JSON_PATH = "users.json"
+
+
+class UserStore:
+    def __init__(self, path=DB_PATH, legacy_json_path=LEGACY_JSON_PATH):
+        self.path = path
+        self._local = threading.local()
+        conn = self._connection()
+        conn.execute("""CREATE TABLE IF NOT EXISTS users (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            username TEXT NOT NULL,
+            password_hash TEXT NOT NULL,
+            created_at REAL NOT NULL
+        )""")
+        conn.execute("CREATE UNIQUE INDEX IF NOT EXISTS idx_users_username ON users (username)")
+        conn.execute("CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT)")
+        conn.commit()
+        if legacy_json_path:
+            self.migrate_from_json(legacy_json_path)
+
+    # One connection per thread, WAL mode so logins never wait on a signup
+    def _connection(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30)
+            conn.execute("PRAGMA journal_mode = WAL")
+            conn.execute("PRAGMA synchronous = NORMAL")
+            conn.execute("PRAGMA busy_timeout = 30000")
+            self._local.conn = conn
+        return conn
+
+    def close(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is not None:
+            conn.close()
+            self._local.conn = None
+
+    # Stored password hash for a user, or None if the user does not exist
+    def get_password_hash(self, username):
+        row = self._connection().execute(
+            "SELECT password_hash FROM users WHERE username = ?", (username,)
+        ).fetchone()
+        return row[0] if row else None
+
+    # Returns False if the username is already taken
+    def create_user(self, username, password_hash):
+        conn = self._connection()
+        with conn:
+            cursor = conn.execute(
+                "INSERT INTO users (username, password_hash, created_at) VALUES (?, ?, ?) "
+                "ON CONFLICT (username) DO NOTHING",
+                (username, password_hash, time.time())
+            )
+        return cursor.rowcount == 1
+
+    def set_password_hash(self, username, password_hash):
+        conn = self._connection()
+        with conn:
+            conn.execute("UPDATE users SET password_hash = ? WHERE username = ?", (password_hash, username))
+
+    def count_users(self):
+        return self._connection().execute("SELECT COUNT(*) FROM users").fetchone()[0]
+
+    # One-shot import of the old users.json ({username: password_hash}).
+    # Existing usernames are left untouched, and the import is recorded in the
+    # meta table so it never runs twice (pass force=True to re-run it).
+    def migrate_from_json(self, json_path=LEGACY_JSON_PATH, force=False):
+        if not os.path.exists(json_path):
+            return 0
+        conn = self._connection()
+        if not force and conn.execute("SELECT 1 FROM meta WHERE key = 'users_json_migrated'").fetchone():
+            return 0
+        try:
+            with open(json_path, "r") as file:
+                users = json.load(file)
+        except json.JSONDecodeError:
+            print(f"⚠️ {json_path} is corrupted; skipping user migration")
+            return 0
+
+        now = time.time()
+        with conn:
+            before = conn.total_changes
+            conn.executemany(
+                "INSERT INTO users (username, password_hash, created_at) VALUES (?, ?, ?) "
+                "ON CONFLICT (username) DO NOTHING",
+                [(username, password_hash, now) for username, password_hash in users.items()]
+            )
+            migrated = conn.total_changes - before
+            conn.execute(
+                "INSERT OR REPLACE INTO meta (key, value) VALUES ('users_json_migrated', ?)",
+                (json.dumps({"path": os.path.abspath(json_path), "at": now, "users": migrated}),)
+            )
+        print(f"✅ Migrated {migrated} users from {json_path}")
+        return migrated
+
+
+_stores = {}
+_stores_lock = threading.Lock()
+
+
+# Shared store per database path; Streamlit reruns reuse it
+def get_user_store(path=DB_PATH):
+    with _stores_lock:
+        store = _stores.get(path)
+        if store is None:
+            store = UserStore(path)
+            _stores[path] = store
+        return store
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Migrate users.json into the SQLite user store.")
+    parser.add_argument("--json", default=LEGACY_JSON_PATH)
+    parser.add_argument("--db", default=DB_PATH)
+    args = parser.parse_args()
+
+    store = UserStore(args.db, legacy_json_path=None)
+    store.migrate_from_json(args.json, force=True)
+    print(f"{store.count_users()} users in {args.db}")
@@ -0,0 +1,270 @@
+import atexit
+import logging
+import os
+import threading
+import time
+from collections import Counter, deque
+
+from history_store import DB_PATH, get_history_store
+
+# Write-behind persistence for chat messages. save_message only appends the
+# row (timestamped now) to an in-memory queue; one background writer drains
+# the queue and commits everything waiting in a single transaction, so a
+# burst of messages costs one commit instead of one per row.
+#
+# Reads stay consistent with this process's own writes: a read scoped to a
+# chat (or, for the sidebar, to a user) first waits until that chat's (or
+# user's) queued rows are committed. Reads with nothing queued don't wait.
+#
+# The queue holds at most HISTORY_QUEUE_MAX rows. When it is full,
+# save_message waits up to HISTORY_QUEUE_TIMEOUT for room, then writes the row
+# itself (after the chat's queued rows, to keep their order) rather than drop
+# it. Queued rows are flushed on close() and at interpreter exit.
+#
+# save_message returns a QueuedMessage; its id is known once the row is
+# committed (QueuedMessage.wait), which set_sentiment does for the caller.
+
+HISTORY_QUEUE_MAX = int(os.getenv("HISTORY_QUEUE_MAX", "10000"))
+HISTORY_BATCH_SIZE = int(os.getenv("HISTORY_BATCH_SIZE", "500"))
+HISTORY_QUEUE_TIMEOUT = float(os.getenv("HISTORY_QUEUE_TIMEOUT", "1"))
+# Longest a read waits for the writer before reading whatever is committed
+HISTORY_READ_TIMEOUT = float(os.getenv("HISTORY_READ_TIMEOUT", "5"))
+HISTORY_CLOSE_TIMEOUT = float(os.getenv("HISTORY_CLOSE_TIMEOUT", "10"))
+
+logger = logging.getLogger(__name__)
+
+
+# Handle for a queued row: id is set when it is committed (None if dropped)
+class QueuedMessage:
+    __slots__ = ("id", "_written")
+
+    def __init__(self):
+        self.id = None
+        self._written = threading.Event()
+
+    def _done(self, message_id):
+        self.id = message_id
+        self._written.set()
+
+    # The row's id once committed, or None after timeout
+    def wait(self, timeout=None):
+        self._written.wait(timeout)
+        return self.id
+
+
+class WriteBehindStore:
+    def __init__(self, store, max_queue=HISTORY_QUEUE_MAX, batch_size=HISTORY_BATCH_SIZE,
+                 queue_timeout=HISTORY_QUEUE_TIMEOUT, read_timeout=HISTORY_READ_TIMEOUT):
+        self.store = store
+        self.max_queue = max_queue
+        self.batch_size = batch_size
+        self.queue_timeout = queue_timeout
+        self.read_timeout = read_timeout
+        self._reset()
+        # The writer thread does not survive fork, and the child must not
+        # write the parent's queued rows a second time
+        if hasattr(os, "register_at_fork"):
+            os.register_at_fork(after_in_child=self._reset)
+
+    def _reset(self):
+        self._lock = threading.Lock()
+        self._changed = threading.Condition(self._lock)
+        self._queue = deque()
+        self._pending_chats = Counter()
+        self._pending_users = Counter()
+        self._thread = None
+        self._closed = False
+        self._counters = {"queued": 0, "written": 0, "batches": 0, "direct_writes": 0, "write_errors": 0,
+                          "dropped": 0}
+
+    def _start_writer(self):
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name="history-writer", daemon=True)
+            self._thread.start()
+
+    def save_message(self, user_id, chat_id, role, message, created_at=None):
+        return self.save_messages([(user_id, chat_id, role, message, created_at)])[0]
+
+    # Queue many (user_id, chat_id, role, message[, created_at]) rows; returns a
+    # QueuedMessage per row
+    def save_messages(self, rows):
+        now = time.time()
+        return [
+            self._enqueue((row[0] or "", row[1], row[2], row[3],
+                           row[4] if len(row) > 4 and row[4] is not None else now))
+            for row in rows
+        ]
+
+    def _enqueue(self, row):
+        ticket = QueuedMessage()
+        deadline = time.monotonic() + self.queue_timeout
+        with self._lock:
+            while not self._closed and len(self._queue) >= self.max_queue:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                self._changed.wait(remaining)
+            if not self._closed and len(self._queue) < self.max_queue:
+                self._queue.append((row, ticket))
+                self._pending_chats[row[1]] += 1
+                self._pending_users[row[0]] += 1
+                self._counters["queued"] += 1
+                self._start_writer()
+                self._changed.notify_all()
+                return ticket
+            self._counters["direct_writes"] += 1
+        self.wait(chat_id=row[1])
+        ticket._done(self.store.save_messages([row])[0])
+        return ticket
+
+    def _run(self):
+        while True:
+            with self._lock:
+                while not self._queue and not self._closed:
+                    self._changed.wait()
+                if not self._queue:
+                    return
+                batch = [self._queue.popleft() for _ in range(min(self.batch_size, len(self._queue)))]
+                self._changed.notify_all()
+            ids = self._write([row for row, _ in batch])
+            for (_, ticket), message_id in zip(batch, ids or [None] * len(batch)):
+                ticket._done(message_id)
+            with self._lock:
+                for (user_id, chat_id, *_), _ in batch:
+                    self._pending_chats[chat_id] -= 1
+                    if not self._pending_chats[chat_id]:
+                        del self._pending_chats[chat_id]
+                    self._pending_users[user_id] -= 1
+                    if not self._pending_users[user_id]:
+                        del self._pending_users[user_id]
+                self._counters["written" if ids is not None else "dropped"] += len(batch)
+                self._counters["batches"] += 1
+                self._changed.notify_all()
+
+    # Retry with backoff (e.g. while another process holds the database
+    # locked); only give up once closing, so exit isn't blocked forever.
+    # Returns the rows' ids, or None if they were dropped.
+    def _write(self, batch):
+        delay = 0.1
+        for attempt in range(1, 1000):
+            try:
+                return self.store.save_messages(batch)
+            except Exception as e:
+                with self._lock:
+                    self._counters["write_errors"] += 1
+                    closed = self._closed
+                logger.error("Failed to write %d chat messages (attempt %d): %s", len(batch), attempt, e)
+                if closed and attempt >= 3:
+                    break
+                time.sleep(delay)
+                delay = min(delay * 2, 5.0)
+        logger.error("Dropped %d chat messages", len(batch))
+        return None
+
+    # Block until the queued rows of a chat, of a user, or (with neither)
+    # all queued rows are committed; False if timeout passed first
+    def wait(self, chat_id=None, user_id=None, timeout=None):
+        timeout = self.read_timeout if timeout is None else timeout
+        deadline = time.monotonic() + timeout
+        with self._lock:
+            while True:
+                if chat_id is not None:
+                    pending = self._pending_chats.get(chat_id, 0)
+                elif user_id is not None:
+                    pending = self._pending_users.get(user_id or "", 0)
+                else:
+                    pending = sum(self._pending_chats.values())
+                if not pending:
+                    return True
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    logger.warning("Reading chat history with %d messages still queued", pending)
+                    return False
+                self._changed.wait(remaining)
+
+    def flush(self, timeout=HISTORY_CLOSE_TIMEOUT):
+        return self.wait(timeout=timeout)
+
+    # Stop accepting rows into the queue, write what is queued and stop the writer
+    def close(self, timeout=HISTORY_CLOSE_TIMEOUT):
+        with self._lock:
+            self._closed = True
+            self._changed.notify_all()
+            thread = self._thread
+        if thread is not None:
+            thread.join(timeout)
+            if thread.is_alive():
+                logger.warning("History writer still has %d messages queued at exit", len(self._queue))
+
+    def stats(self):
+        with self._lock:
+            counters = dict(self._counters)
+            counters["queue_depth"] = len(self._queue)
+            counters["pending"] = sum(self._pending_chats.values())
+        return counters
+
+    # Reads scoped to one chat
+    def load_chat_history(self, chat_id):
+        self.wait(chat_id=chat_id)
+        return self.store.load_chat_history(chat_id)
+
+    def load_messages(self, chat_id, limit=50, before_id=None, after_id=None):
+        self.wait(chat_id=chat_id)
+        return self.store.load_messages(chat_id, limit=limit, before_id=before_id, after_id=after_id)
+
+    def get_chat_title(self, chat_id):
+        self.wait(chat_id=chat_id)
+        return self.store.get_chat_title(chat_id)
+
+    # Reads scoped to one user
+    def get_sidebar_summary(self, user_id, limit=50, before=None):
+        self.wait(user_id=user_id)
+        return self.store.get_sidebar_summary(user_id, limit=limit, before=before)
+
+    def get_chat_sessions(self, user_id):
+        self.wait(user_id=user_id)
+        return self.store.get_chat_sessions(user_id)
+
+    def get_chat_history_grouped_by_day(self, user_id):
+        self.wait(user_id=user_id)
+        return self.store.get_chat_history_grouped_by_day(user_id)
+
+    def search_messages(self, user_id, query, limit=20, highlight=("<mark>", "</mark>")):
+        self.wait(user_id=user_id)
+        return self.store.search_messages(user_id, query, limit=limit, highlight=highlight)
+
+    # The message must be committed before its sentiment can be attached;
+    # message is a QueuedMessage from save_message or a row id
+    def set_sentiment(self, message, sentiment):
+        message_id = message.wait(self.read_timeout) if isinstance(message, QueuedMessage) else message
+        if message_id is None:
+            logger.warning("Message not written yet, its sentiment was not stored")
+            return 0
+        return self.store.set_sentiment(message_id, sentiment)
+
+    def get_mood_rollups(self, user_id, period="day", since=None):
+        self.wait(user_id=user_id)
+        return self.store.get_mood_rollups(user_id, period=period, since=since)
+
+    def load_user_messages(self, user_id, after=None, limit=1000):
+        self.wait(user_id=user_id)
+        return self.store.load_user_messages(user_id, after=after, limit=limit)
+
+    # Everything else (chat summaries, ...) goes straight to the store
+    def __getattr__(self, name):
+        return getattr(self.store, name)
+
+
+_stores = {}
+_stores_lock = threading.Lock()
+
+
+# Shared write-behind store per database path, flushed at interpreter exit
+def get_write_behind_store(path=DB_PATH):
+    with _stores_lock:
+        store = _stores.get(path)
+        if store is None:
+            store = WriteBehindStore(get_history_store(path))
+            atexit.register(store.close)
+            _stores[path] = store
+        return store
@@ -0,0 +1,218 @@
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future
+
+
+# In-memory LRU storage for cache entries
+class MemoryBackend:
+    def __init__(self, max_entries=128):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+            return entry
+
+    def set(self, key, entry):
+        with self._lock:
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def delete(self, key):
+        with self._lock:
+            self._entries.pop(key, None)
+
+
+# SQLite storage so cached recommendations survive restarts; evicts the
+# least recently used rows once max_entries is exceeded. Hits don't write:
+# their recency is kept in memory and written back in one transaction every
+# touch_interval seconds or touch_batch hits, and always before evicting.
+class SQLiteBackend:
+    def __init__(self, path, max_entries=128, touch_interval=30.0, touch_batch=256):
+        self.path = path
+        self.max_entries = max_entries
+        self.touch_interval = touch_interval
+        self.touch_batch = touch_batch
+        self._touched = {}
+        self._touch_flushed = time.monotonic()
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        # Forked workers reconnect rather than share the parent's connection
+        if hasattr(os, "register_at_fork"):
+            os.register_at_fork(after_in_child=self._reconnect)
+        self._conn.execute("""CREATE TABLE IF NOT EXISTS video_cache (
+            query TEXT PRIMARY KEY,
+            videos TEXT NOT NULL,
+            fetched_at REAL NOT NULL,
+            last_used REAL NOT NULL
+        )""")
+        self._conn.commit()
+
+    def _reconnect(self):
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(self.path, check_same_thread=False)
+        self._touched = {}
+
+    # Write pending last_used times; caller holds the lock
+    def _flush_touched(self):
+        if self._touched:
+            self._conn.executemany("UPDATE video_cache SET last_used = ? WHERE query = ?",
+                                   [(used, key) for key, used in self._touched.items()])
+            self._conn.commit()
+            self._touched = {}
+        self._touch_flushed = time.monotonic()
+
+    def get(self, key):
+        with self._lock:
+            row = self._conn.execute("SELECT videos, fetched_at FROM video_cache WHERE query = ?", (key,)).fetchone()
+            if row is None:
+                return None
+            self._touched[key] = time.time()
+            if (len(self._touched) >= self.touch_batch
+                    or time.monotonic() - self._touch_flushed >= self.touch_interval):
+                self._flush_touched()
+        return {"videos": json.loads(row[0]), "fetched_at": row[1]}
+
+    def set(self, key, entry):
+        with self._lock:
+            self._touched.pop(key, None)
+            self._flush_touched()
+            self._conn.execute(
+                "INSERT OR REPLACE INTO video_cache (query, videos, fetched_at, last_used) VALUES (?, ?, ?, ?)",
+                (key, json.dumps(entry["videos"]), entry["fetched_at"], time.time())
+            )
+            self._conn.execute("""DELETE FROM video_cache WHERE query NOT IN (
+                SELECT query FROM video_cache ORDER BY last_used DESC LIMIT ?
+            )""", (self.max_entries,))
+            self._conn.commit()
+
+    def delete(self, key):
+        with self._lock:
+            self._touched.pop(key, None)
+            self._conn.execute("DELETE FROM video_cache WHERE query = ?", (key,))
+            self._conn.commit()
+
+
+# Caches the top pool_size search results per query. Fresh entries (younger
+# than ttl) are served directly; stale ones (up to ttl + stale_ttl) are served
+# while a background refresh runs; anything older is fetched synchronously.
+# Each get() rotates through the pool so users don't always see the same video.
+# Concurrent misses for one query share a single fetch.
+class RecommendationCache:
+    def __init__(self, fetch_videos, backend=None, ttl=3600, stale_ttl=86400, pool_size=5):
+        self.fetch_videos = fetch_videos
+        self.backend = backend if backend is not None else MemoryBackend()
+        self.ttl = ttl
+        self.stale_ttl = stale_ttl
+        self.pool_size = pool_size
+        self._lock = threading.Lock()
+        self._rotation = {}
+        self._refreshing = set()
+        self._inflight = {}
+        self._counters = {"hits": 0, "stale_hits": 0, "misses": 0, "coalesced_misses": 0, "refreshes": 0,
+                          "refresh_errors": 0}
+
+    def _count(self, name):
+        with self._lock:
+            self._counters[name] += 1
+
+    def _fetch(self, query):
+        videos = self.fetch_videos(query, self.pool_size)
+        entry = {"videos": videos, "fetched_at": time.time()}
+        if videos:
+            self.backend.set(query, entry)
+        return entry
+
+    # _fetch, but callers missing the same query at the same time wait for
+    # the first one's result instead of each calling the API
+    def _fetch_once(self, query):
+        with self._lock:
+            future = self._inflight.get(query)
+            leader = future is None
+            if leader:
+                future = self._inflight[query] = Future()
+            else:
+                self._counters["coalesced_misses"] += 1
+        if not leader:
+            return future.result()
+        try:
+            entry = self._fetch(query)
+            future.set_result(entry)
+            return entry
+        except Exception as e:
+            future.set_exception(e)
+            raise
+        finally:
+            with self._lock:
+                del self._inflight[query]
+
+    def _refresh(self, query):
+        try:
+            self._fetch(query)
+            self._count("refreshes")
+        except Exception as e:
+            self._count("refresh_errors")
+            print(f"❌ YouTube cache refresh failed for '{query}': {e}")
+        finally:
+            with self._lock:
+                self._refreshing.discard(query)
+
+    def _refresh_in_background(self, query):
+        with self._lock:
+            if query in self._refreshing:
+                return
+            self._refreshing.add(query)
+        threading.Thread(target=self._refresh, args=(query,), daemon=True).start()
+
+    def _pick(self, query, videos):
+        if not videos:
+            return None
+        with self._lock:
+            index = self._rotation.get(query, 0)
+            self._rotation[query] = index + 1
+        return videos[index % len(videos)]
+
+    # Cached entry for a query whether fresh or not, or None
+    def peek(self, query):
+        entry = self.backend.get(query)
+        return self._pick(query, entry["videos"]) if entry else None
+
+    # Return one video dict for the query, or None if the search found nothing
+    def get(self, query):
+        entry = self.backend.get(query)
+        age = time.time() - entry["fetched_at"] if entry else None
+
+        if entry and age < self.ttl:
+            self._count("hits")
+        elif entry and age < self.ttl + self.stale_ttl:
+            self._count("stale_hits")
+            self._refresh_in_background(query)
+        else:
+            self._count("misses")
+            try:
+                entry = self._fetch_once(query)
+            except Exception:
+                if entry is None:
+                    raise
+                self._count("refresh_errors")
+        return self._pick(query, entry["videos"])
+
+    def stats(self):
+        with self._lock:
+            counters = dict(self._counters)
+        lookups = counters["hits"] + counters["stale_hits"] + counters["misses"]
+        counters["hit_rate"] = round((counters["hits"] + counters["stale_hits"]) / lookups, 4) if lookups else 0.0
+        # Every lookup served from cache is one search.list call not made
+        counters["api_calls_saved"] = (counters["hits"] + counters["stale_hits"] + counters["coalesced_misses"]
+                                       - counters["refreshes"])
+        return counters